@@ -0,0 +1,118 @@
+"""Measures bytes saved and CPU cost of response compression and ETags.
+
+Run with `python -m benchmarks.compression [--products N] [--orders N]`.
+Payloads are JSON like `GET /products` and `GET /orders` return. Brotli rows are
+printed only if `brotli` is installed.
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import time
+import uuid
+import zlib
+from typing import Any, Callable
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+REPEAT = 20
+
+
+def products_payload(count: int) -> bytes:
+    category = {"id": str(uuid.uuid4()), "name": "Pizzas"}
+    products = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Pizza {i}",
+            "category": category,
+            "description": "Tomato sauce, mozzarella, basil, olive oil",
+            "variants": [
+                {
+                    "id": str(uuid.uuid4()),
+                    "name": name,
+                    "weight": str(300 + 150 * size),
+                    "weight_units": "g",
+                    "price": f"{4.5 + 2 * size:.2f}",
+                }
+                for size, name in enumerate(("Small", "Medium", "Large"))
+            ],
+            "image_url": f"https://images.example.com/pizzas/{i}.png",
+        }
+        for i in range(count)
+    ]
+    return json.dumps(products).encode()
+
+
+def orders_payload(count: int) -> bytes:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    orders = [
+        {
+            "id": str(uuid.uuid4()),
+            "phone": f"+38099{i % 1000:07d}",
+            "address": f"Baker street {i % 300} B",
+            "status": ("COMPLETED", "UNCOMPLETED", "CANCELLED")[i % 3],
+            "note": "",
+            "created_at": (now - datetime.timedelta(minutes=i)).isoformat(),
+            "items": [
+                {"product_variant_id": str(uuid.uuid4()), "amount": 1 + i % 3}
+                for _ in range(1 + i % 4)
+            ],
+        }
+        for i in range(count)
+    ]
+    return json.dumps(orders).encode()
+
+
+def _measure(func: Callable[[bytes], Any], data: bytes) -> tuple[Any, float]:
+    start = time.process_time()
+    for _ in range(REPEAT):
+        result = func(data)
+    return result, (time.process_time() - start) / REPEAT
+
+
+def _gzip(level: int) -> Callable[[bytes], bytes]:
+    def compress(data: bytes) -> bytes:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    return compress
+
+
+def main(products: int, orders: int) -> None:
+    codecs: dict[str, Callable[[bytes], bytes]] = {
+        f"gzip {level}": _gzip(level) for level in (1, 6, 9)
+    }
+    if brotli is not None:
+        for quality in (1, 4, 11):
+            codecs[f"br {quality}"] = lambda data, q=quality: brotli.compress(
+                data, quality=q
+            )
+
+    for name, payload in (
+        (f"{products} products", products_payload(products)),
+        (f"{orders} orders", orders_payload(orders)),
+    ):
+        print(f"{name}: {len(payload)} bytes")
+        for codec, compress in codecs.items():
+            compressed, seconds = _measure(compress, payload)
+            print(
+                f"  {codec:<8} {len(compressed):>10} bytes"
+                f" {1 - len(compressed) / len(payload):>7.1%} saved"
+                f" {seconds * 1000:>8.2f} ms CPU"
+            )
+        _, seconds = _measure(
+            lambda data: hashlib.blake2b(data, digest_size=16).hexdigest(), payload
+        )
+        print(f"  {'etag':<8} {'':>10}       {'':>7} {seconds * 1000:>8.2f} ms CPU")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--orders", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.products, args.orders)
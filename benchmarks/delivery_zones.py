@@ -0,0 +1,107 @@
+"""Measures delivery zone lookups of order addresses.
+
+Zones are circles of `--vertices` points laid out in a grid over a city,
+addresses are random points in it. Compares the grid `ZoneIndex` with testing
+every zone, and `DeliveryService.get_zone` with a warm geocoding cache.
+
+Run with `python -m benchmarks.delivery_zones [--zones N] [--lookups N]`.
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+
+from pizza_store.services.delivery.exceptions import AddressNotDeliverableError
+from pizza_store.services.delivery.models import DeliveryPolygon, DeliveryZone, Point
+from pizza_store.services.delivery.service import DeliveryService
+from pizza_store.services.delivery.zones import ZoneIndex, _contains
+
+# Longitude, latitude of the city south-west corner and its size in degrees
+ORIGIN = (30.35, 50.35)
+SIZE = 0.3
+
+
+class DictGeocoder:
+    def __init__(self, points: dict[str, Point]) -> None:
+        self._points = points
+
+    async def geocode(self, address: str) -> Point | None:
+        return self._points.get(address)
+
+
+def _zones(count: int, vertices: int) -> list[DeliveryZone]:
+    side = math.ceil(math.sqrt(count))
+    step = SIZE / side
+    zones = []
+    for i in range(count):
+        cx = ORIGIN[0] + (i % side + 0.5) * step
+        cy = ORIGIN[1] + (i // side + 0.5) * step
+        ring = [
+            (
+                cx + step * 0.6 * math.cos(2 * math.pi * k / vertices),
+                cy + step * 0.6 * math.sin(2 * math.pi * k / vertices),
+            )
+            for k in range(vertices)
+        ]
+        zones.append(
+            DeliveryZone(name=f"zone-{i}", polygons=[DeliveryPolygon(ring, [])])
+        )
+    return zones
+
+
+def _report(name: str, elapsed: float, lookups: int) -> None:
+    print(f"{name:<12} {elapsed / lookups * 1e6:>8.2f} us/lookup")
+
+
+async def main(zone_count: int, vertices: int, lookups: int) -> None:
+    zones = _zones(zone_count, vertices)
+    points = [
+        (ORIGIN[0] + random.random() * SIZE, ORIGIN[1] + random.random() * SIZE)
+        for _ in range(lookups)
+    ]
+    index = ZoneIndex(zones, cell_size=SIZE / math.ceil(math.sqrt(zone_count)))
+
+    start = time.perf_counter()
+    found = [index.find(p) for p in points]
+    _report("grid", time.perf_counter() - start, lookups)
+
+    start = time.perf_counter()
+    scanned = [
+        next(
+            (
+                z
+                for z in zones
+                if any(_contains(polygon, x, y) for polygon in z.polygons)
+            ),
+            None,
+        )
+        for x, y in points
+    ]
+    _report("scan", time.perf_counter() - start, lookups)
+    assert found == scanned
+
+    addresses = [f"street {i}" for i in range(lookups)]
+    service = DeliveryService(index, DictGeocoder(dict(zip(addresses, points))))
+    for address in addresses:
+        try:
+            await service.get_zone(address)
+        except AddressNotDeliverableError:
+            pass
+    start = time.perf_counter()
+    for address in addresses:
+        try:
+            await service.get_zone(address)
+        except AddressNotDeliverableError:
+            pass
+    _report("cached", time.perf_counter() - start, lookups)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zones", type=int, default=100)
+    parser.add_argument("--vertices", type=int, default=64)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.zones, args.vertices, args.lookups))
@@ -0,0 +1,81 @@
+"""Reports app import cost from `python -X importtime`.
+
+Run with `python -m benchmarks.import_time [--module M] [--top N]`. Imports
+`--module` in a fresh interpreter, prints the total, the slowest modules by
+own and by cumulative time and the cost per top-level package, then times
+`create_app()` the way a worker does it without `preload_app`.
+"""
+
+import argparse
+import collections
+import os
+import subprocess
+import sys
+
+CREATE_APP = """
+import time
+start = time.perf_counter()
+from pizza_store.adapters.app.app import create_app
+create_app()
+print(time.perf_counter() - start)
+"""
+
+
+def import_times(module: str) -> list[tuple[str, int, int, int]]:
+    """Returns (module, own us, cumulative us, depth) of every import."""
+
+    env = {"EDGEDB_DSN": "edgedb://localhost", "JWT_SECRET": "secret", **os.environ}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        times.append((name.strip(), int(own), int(cumulative), depth))
+    return times
+
+
+def main(module: str, top: int) -> None:
+    times = import_times(module)
+    total = sum(own for _, own, _, _ in times)
+    print(f"{module}: {len(times)} modules, {total / 1000:.1f} ms")
+
+    print(f"\nslowest {top} by own time:")
+    for name, own, _, _ in sorted(times, key=lambda t: -t[1])[:top]:
+        print(f"  {own / 1000:>8.1f} ms  {name}")
+
+    print(f"\nslowest {top} by cumulative time:")
+    for name, _, cumulative, _ in sorted(times, key=lambda t: -t[2])[:top]:
+        print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+
+    packages: collections.Counter[str] = collections.Counter()
+    for name, own, _, _ in times:
+        packages[name.split(".")[0]] += own
+    print(f"\nslowest {top} packages:")
+    for package, own in packages.most_common(top):
+        print(f"  {own / 1000:>8.1f} ms  {package}")
+
+    env = {"EDGEDB_DSN": "edgedb://localhost", "JWT_SECRET": "secret", **os.environ}
+    result = subprocess.run(
+        [sys.executable, "-c", CREATE_APP],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    print(f"\nimport and create_app(): {float(result.stdout) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="pizza_store.adapters.app.app")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    main(args.module, args.top)
@@ -0,0 +1,84 @@
+"""Measures access token sign and verify throughput per JWT algorithm.
+
+Run with `python -m benchmarks.jwt_algorithms [--tokens N]`. Needs
+`cryptography`. "RS256 (PEM)" passes PEM bytes to PyJWT on every call, the way
+tokens would be handled without `load_jwt_keys`.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from pizza_store.adapters.crypto.jwt_keys import load_jwt_keys
+from pizza_store.services.auth.models import JWTConfig, UserTokenData
+from pizza_store.services.auth.service import AuthService
+
+USER = UserTokenData(id=uuid.uuid4(), is_admin=False)
+PRIVATE_KEYS = {
+    "rs256": lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
+    "es256": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "eddsa": ed25519.Ed25519PrivateKey.generate,
+}
+
+
+def _rate(func: object, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        func()  # type: ignore
+    return count / (time.perf_counter() - start)
+
+
+def _report(name: str, config: JWTConfig, tokens: int) -> None:
+    timestamp = int(time.time())
+    token = AuthService.create_access_token(USER, timestamp, config)
+    sign = _rate(
+        lambda: AuthService.create_access_token(USER, timestamp, config), tokens
+    )
+    verify = _rate(lambda: AuthService.decode_access_token(token, config), tokens)
+    print(f"{name:<12} {sign:>10.0f} signs/s {verify:>10.0f} verifies/s")
+
+
+def main(tokens: int) -> None:
+    hs_config = JWTConfig(algorithm="HS256", secret="secret", expires_in=3600)
+    _report("HS256", hs_config, tokens)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for kid, generate in PRIVATE_KEYS.items():
+            with open(os.path.join(directory, f"{kid}.pem"), "wb") as f:
+                f.write(
+                    generate().private_bytes(
+                        serialization.Encoding.PEM,
+                        serialization.PrivateFormat.PKCS8,
+                        serialization.NoEncryption(),
+                    )
+                )
+        keys = load_jwt_keys(directory)
+        with open(os.path.join(directory, "rs256.pem"), "rb") as f:
+            rs256_pem = f.read()
+
+    for key in keys:
+        config = JWTConfig(
+            algorithm="HS256",
+            secret="secret",
+            expires_in=3600,
+            keys=keys,
+            signing_kid=key.kid,
+        )
+        _report(key.algorithm, config, tokens)
+
+    payload = {"sub": str(USER.id), "exp": int(time.time()) + 3600}
+    sign = _rate(lambda: jwt.encode(payload, rs256_pem, algorithm="RS256"), tokens)
+    print(f"{'RS256 (PEM)':<12} {sign:>10.0f} signs/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.tokens)
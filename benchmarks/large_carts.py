@@ -0,0 +1,137 @@
+"""Measures order intake of large carts with duplicate items and unknown variants.
+
+Orders are created through the real `OrdersServiceRepo` on a stand-in client,
+once as sent by the client and once merged and checked by `OrdersService`
+against the menu index.
+
+Run with `python -m benchmarks.large_carts [--items N] [--distinct N]`.
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import random
+import time
+import uuid
+from decimal import Decimal
+
+from benchmarks.stand_ins import StandInAsyncIOClient
+from pizza_store.adapters.db.repos.orders import OrdersServiceRepo
+from pizza_store.entities.products import (
+    Category,
+    CategoryWithProducts,
+    Product,
+    ProductVariant,
+)
+from pizza_store.services.orders.models import OrderCreate, OrderItemCreate
+from pizza_store.services.orders.service import OrdersService
+from pizza_store.services.products.exceptions import ProductVariantNotFoundError
+from pizza_store.services.products.service import ProductsService
+from pizza_store.utils import UUIDEncoder
+
+
+class SyntheticMenuRepo:
+    def __init__(self, products: int) -> None:
+        category = Category(id=uuid.uuid4(), name="Pizzas")
+        self.menu = [
+            CategoryWithProducts(
+                id=category.id,
+                name=category.name,
+                products=[
+                    Product(
+                        id=uuid.uuid4(),
+                        name=f"Pizza {i}",
+                        category=category,
+                        description="",
+                        image_url="",
+                        variants=[
+                            ProductVariant(
+                                id=uuid.uuid4(),
+                                name=size,
+                                weight=Decimal(300),
+                                weight_units="g",
+                                price=Decimal("9.5"),
+                            )
+                            for size in ("Small", "Large")
+                        ],
+                    )
+                    for i in range(products)
+                ],
+            )
+        ]
+
+    async def get_menu(self) -> list[CategoryWithProducts]:
+        return self.menu
+
+
+def _cart(variant_ids: list[uuid.UUID], items: int, distinct: int) -> OrderCreate:
+    ids = random.sample(variant_ids, distinct)
+    return OrderCreate(
+        phone="+380991231212",
+        items=[
+            OrderItemCreate(product_variant_id=random.choice(ids), amount=1)
+            for _ in range(items)
+        ],
+        note="",
+        address="Baker street 221 B",
+    )
+
+
+def _items_size(order: OrderCreate) -> int:
+    items = [dataclasses.asdict(item) for item in order.items]
+    return len(json.dumps(items, cls=UUIDEncoder))
+
+
+async def main(orders: int, items: int, distinct: int) -> None:
+    menu_repo = SyntheticMenuRepo(products=max(distinct, 500))
+    products = ProductsService(menu_repo)  # type: ignore
+    variant_ids = [v.id for c in menu_repo.menu for p in c.products for v in p.variants]
+    carts = [_cart(variant_ids, items, distinct) for _ in range(orders)]
+    merged = OrdersService.merge_order_items(carts[0].items)
+    print(
+        f"cart of {items} items: {_items_size(carts[0])} bytes of items JSON,"
+        f" {len(merged)} items and"
+        f" {_items_size(dataclasses.replace(carts[0], items=merged))} bytes merged"
+    )
+
+    client = StandInAsyncIOClient()
+    repo = OrdersServiceRepo(client)  # type: ignore
+    start = time.perf_counter()
+    for cart in carts:
+        await repo.create_order(cart)
+    elapsed = time.perf_counter() - start
+    print(f"{'as sent':<10} {elapsed / orders * 1e6:>8.1f} us/order")
+
+    service = OrdersService(repo, variants=products)
+    await products.get_variant_prices([])  # Load the menu index
+    start = time.perf_counter()
+    for cart in carts:
+        await service.create_order(cart)
+    elapsed = time.perf_counter() - start
+    print(f"{'merged':<10} {elapsed / orders * 1e6:>8.1f} us/order")
+
+    invalid = dataclasses.replace(
+        carts[0],
+        items=carts[0].items
+        + [OrderItemCreate(product_variant_id=uuid.uuid4(), amount=1)],
+    )
+    for name, checked in (
+        ("unchecked", OrdersService(repo)),
+        ("checked", service),
+    ):
+        client.queries = 0
+        try:
+            await checked.create_order(invalid)
+        except ProductVariantNotFoundError:
+            pass
+        print(f"{name:<10} {client.queries:>8} queries for an unknown variant")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.items, args.distinct))
@@ -0,0 +1,89 @@
+"""Times `POST /menu/import` parsing and batched upserts of a generated menu.
+
+Generates `--items` variants, 4 per product and 50 products per category, and
+imports them twice (inserts, then updates). Needs a running EdgeDB with
+migrated schema unless `--parse-only` is given:
+
+    python -m benchmarks.menu_import --items 10000
+    python -m benchmarks.menu_import --parse-only --format csv
+"""
+
+import argparse
+import asyncio
+import time
+from decimal import Decimal
+from typing import AsyncIterator
+
+from pizza_store.adapters.files.menu import (
+    MenuFileFormat,
+    read_menu_rows,
+    write_menu_rows,
+)
+from pizza_store.services.products.models import MenuRow
+
+CHUNK_SIZE = 64 * 1024
+VARIANTS = ("Small", "Medium", "Large", "Family")
+
+
+def generate_menu(items: int) -> list[MenuRow]:
+    rows = []
+    for i in range(items):
+        product = i // len(VARIANTS)
+        rows.append(
+            MenuRow(
+                line=i + 1,
+                category=f"Benchmark category {product // 50}",
+                product=f"Benchmark product {product}",
+                description="Tomato sauce, mozzarella",
+                image_url=f"https://image.url/{product}.png",
+                variant=VARIANTS[i % len(VARIANTS)],
+                weight=Decimal(300 + 100 * (i % len(VARIANTS))),
+                weight_units="g",
+                price=Decimal("4.5") + i % len(VARIANTS),
+            )
+        )
+    return rows
+
+
+async def _chunks(data: bytes) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), CHUNK_SIZE):
+        yield data[start : start + CHUNK_SIZE]
+
+
+async def parse(data: bytes, format: MenuFileFormat) -> None:
+    start = time.perf_counter()
+    rows = [row async for row in read_menu_rows(_chunks(data), format)]
+    print(f"parse      {len(rows):>8} rows {time.perf_counter() - start:>8.2f} s")
+
+
+async def main(items: int, format: MenuFileFormat, batch_size: int) -> None:
+    from pizza_store.adapters.db.client import get_client
+    from pizza_store.adapters.db.repos.products import ProductsServiceRepo
+    from pizza_store.services.products.service import ProductsService
+
+    service = ProductsService(ProductsServiceRepo(get_client()))
+    data = "".join(write_menu_rows(generate_menu(items), format)).encode()
+    for name in ("insert", "update"):
+        start = time.perf_counter()
+        result = await service.import_menu(
+            read_menu_rows(_chunks(data), format), batch_size=batch_size
+        )
+        print(
+            f"{name:<10} {result.rows:>8} rows {time.perf_counter() - start:>8.2f} s"
+            f" {len(result.errors)} errors"
+        )
+    await get_client().aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--parse-only", action="store_true")
+    args = parser.parse_args()
+    if args.parse_only:
+        data = "".join(write_menu_rows(generate_menu(args.items), args.format))
+        asyncio.run(parse(data.encode(), args.format))
+    else:
+        asyncio.run(main(args.items, args.format, args.batch_size))
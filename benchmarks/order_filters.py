@@ -0,0 +1,161 @@
+"""Times filtered `GET /orders` queries against a seeded EdgeDB database.
+
+Needs a running EdgeDB with migrated schema (see `make migrate`). Seeding adds
+`--orders` orders spread over the last year, 1000 phones and all statuses:
+
+    python -m benchmarks.order_filters --seed --orders 1000000
+    python -m benchmarks.order_filters
+
+Query plans are printed with `analyze` when the server supports it (EdgeDB 3+),
+on older servers compare timings with and without the indexes in
+`dbschema/orders.esdl` instead.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import statistics
+import time
+from typing import get_args
+
+import edgedb
+
+from pizza_store.adapters.db.client import get_client
+from pizza_store.adapters.db.repos.orders import OrdersServiceRepo
+from pizza_store.entities.orders import OrderStatus
+from pizza_store.services.orders.models import OrdersFilter
+
+SEED_BATCH_SIZE = 5000
+# Store of `OrdersServiceRepo` by default
+STORE = "default"
+PHONES = [f"+38099{i:07d}" for i in range(1000)]
+NOW = datetime.datetime.now(datetime.timezone.utc)
+
+FILTERS = {
+    "last day": OrdersFilter(created_from=NOW - datetime.timedelta(days=1)),
+    "phone": OrdersFilter(phone=PHONES[0]),
+    "uncompleted": OrdersFilter(statuses=["UNCOMPLETED"]),
+    "cancelled last week": OrdersFilter(
+        statuses=["CANCELLED"], created_from=NOW - datetime.timedelta(days=7)
+    ),
+}
+
+
+async def seed(orders: int) -> None:
+    variant_query = """
+    with
+        category := (
+            insert products::Category {
+                name := "Benchmark",
+                store := <str>$store
+            }
+            unless conflict on (.store, .name) else (select products::Category)
+        ),
+        product := (
+            insert products::Product {
+                name := "Benchmark",
+                category := category,
+                image_url := "https://image.url",
+                store := <str>$store
+            }
+            unless conflict on (.store, .name) else (select products::Product)
+        )
+    select (
+        insert products::ProductVariant {
+            name := "Benchmark",
+            weight := 100n,
+            weight_units := "g",
+            price := 2.5n,
+            product := product
+        }
+        unless conflict on (.product, .name)
+        else (select products::ProductVariant)
+    ) { id };
+    """
+    orders_query = """
+    with orders := <array<tuple<
+        phone: str,
+        status: str,
+        created_at: datetime
+    >>><json>$orders
+    for o in array_unpack(orders)
+    union (
+        with customer_order := (
+            insert orders::CustomerOrder {
+                phone := o.phone,
+                address := "Baker street 221 B",
+                status := <orders::OrderStatus>o.status,
+                created_at := o.created_at,
+                store := <str>$store
+            }
+        )
+        insert orders::OrderItem {
+            product_variant := (
+                select products::ProductVariant filter .id = <uuid>$variant_id
+            ),
+            amount := 1,
+            customer_order := customer_order
+        }
+    );
+    """
+    variant = await get_client().query_single(variant_query, store=STORE)
+    statuses = get_args(OrderStatus)
+    for start in range(0, orders, SEED_BATCH_SIZE):
+        batch = [
+            {
+                "phone": random.choice(PHONES),
+                "status": random.choice(statuses),
+                "created_at": (
+                    NOW - datetime.timedelta(seconds=random.randrange(365 * 86400))
+                ).isoformat(),
+            }
+            for _ in range(min(SEED_BATCH_SIZE, orders - start))
+        ]
+        await get_client().query(
+            orders_query, orders=json.dumps(batch), variant_id=variant.id, store=STORE
+        )
+        print(f"seeded {start + len(batch)} of {orders}")
+
+
+async def analyze(query: str, params: dict[str, object]) -> str | None:
+    try:
+        return await get_client().query_single(f"analyze {query}", **params)
+    except edgedb.errors.EdgeDBError:
+        return None
+
+
+async def main(repeat: int) -> None:
+    repo = OrdersServiceRepo(get_client())
+    for name, filter in FILTERS.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = await repo.get_orders(filter)
+            timings.append(time.perf_counter() - start)
+        print(
+            f"{name:<20} {len(result):>8} orders"
+            f" {statistics.median(timings) * 1000:>10.1f} ms p50"
+        )
+
+        conditions, params = repo._build_orders_filter(filter)
+        plan = await analyze(
+            f"select orders::CustomerOrder filter {' and '.join(conditions)};",
+            params,
+        )
+        if plan is not None:
+            print(plan)
+    await get_client().aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if args.seed:
+        asyncio.run(seed(args.orders))
+    else:
+        asyncio.run(main(args.repeat))
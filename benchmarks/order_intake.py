@@ -0,0 +1,82 @@
+"""Compares `POST /orders` accept latency of the sync and journal intake modes.
+
+Run with `python -m benchmarks.order_intake [--orders N] [--concurrency N]`.
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+import uuid
+
+from benchmarks.stand_ins import InMemoryOrdersRepo, StandInClient
+from pizza_store.adapters.journal.orders import OrdersJournal
+from pizza_store.services.orders.drainer import OrdersJournalDrainer
+from pizza_store.services.orders.models import OrderCreate, OrderItemCreate
+from pizza_store.services.orders.service import OrdersService
+
+ORDER = OrderCreate(
+    phone="+380991231212",
+    items=[OrderItemCreate(product_variant_id=uuid.uuid4(), amount=2)],
+    note="",
+    address="Baker street 221 B",
+)
+
+
+async def _load(service: OrdersService, orders: int, concurrency: int) -> list[float]:
+    latencies: list[float] = []
+    queue: asyncio.Queue[None] = asyncio.Queue()
+    for _ in range(orders):
+        queue.put_nowait(None)
+
+    async def worker() -> None:
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            await service.create_order(ORDER)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def _report(name: str, latencies: list[float], elapsed: float) -> None:
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{name:<8} {len(latencies) / elapsed:>10.0f} orders/s"
+        f" {statistics.median(latencies) * 1000:>8.2f} ms p50"
+        f" {p99 * 1000:>8.2f} ms p99"
+    )
+
+
+async def main(orders: int, concurrency: int, round_trip: float) -> None:
+    repo = InMemoryOrdersRepo(StandInClient(round_trip=round_trip))
+    start = time.perf_counter()
+    latencies = await _load(OrdersService(repo), orders, concurrency)
+    _report("sync", latencies, time.perf_counter() - start)
+
+    with tempfile.TemporaryDirectory() as directory:
+        repo = InMemoryOrdersRepo(StandInClient(round_trip=round_trip))
+        journal = OrdersJournal(directory)
+        journal.open()
+        drainer = OrdersJournalDrainer(repo, journal)
+        drainer.start()
+        start = time.perf_counter()
+        latencies = await _load(OrdersService(repo, journal), orders, concurrency)
+        _report("journal", latencies, time.perf_counter() - start)
+        await drainer.stop()
+        journal.close()
+        assert len(repo.orders) == orders
+        elapsed = time.perf_counter() - start
+        print(f"drained  {orders / elapsed:>10.0f} orders/s stored in database")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--round-trip", type=float, default=0.002)
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.concurrency, args.round_trip))
@@ -0,0 +1,153 @@
+"""In-memory stand-ins for EdgeDB repos used by benchmarks.
+
+Every repo call sleeps for a configurable round-trip time and holds one of
+`pool_size` connections while doing it, which is close enough to how
+`AsyncIOClient` behaves under load.
+"""
+
+import asyncio
+import datetime
+import types
+import uuid
+
+from pizza_store.entities.orders import Order, OrderStatusSummary
+from pizza_store.services.orders.exceptions import OrderNotFoundError
+from pizza_store.services.orders.models import (
+    JournaledOrder,
+    OrderCreate,
+    OrderCreated,
+    OrdersFilter,
+    OrderUpdate,
+    OrderUpdated,
+    RejectedOrder,
+)
+
+
+class StandInClient:
+    def __init__(self, round_trip: float = 0.002, pool_size: int = 10) -> None:
+        self.round_trip = round_trip
+        self.queries = 0
+        self._pool = asyncio.Semaphore(pool_size)
+
+    async def query(self, round_trips: int = 1) -> None:
+        async with self._pool:
+            for _ in range(round_trips):
+                self.queries += 1
+                await asyncio.sleep(self.round_trip)
+
+
+class InMemoryOrdersRepo:
+    def __init__(self, client: StandInClient) -> None:
+        self._client = client
+        self.orders: dict[uuid.UUID, OrderCreate] = {}
+        self.intake_ids: set[uuid.UUID] = set()
+
+    async def create_order(self, order: OrderCreate) -> OrderCreated:
+        # Transaction: insert order, insert items, commit
+        await self._client.query(round_trips=3)
+        id = uuid.uuid4()
+        self.orders[id] = order
+        return OrderCreated(id=id)
+
+    async def create_journaled_orders(
+        self, orders: list[JournaledOrder]
+    ) -> list[OrderCreated]:
+        # Transaction: select stored intake ids, batch insert, commit
+        await self._client.query(round_trips=3)
+        result = []
+        for o in orders:
+            if o.id in self.intake_ids:
+                continue
+            self.intake_ids.add(o.id)
+            id = uuid.uuid4()
+            self.orders[id] = o.order
+            result.append(OrderCreated(id=id))
+        return result
+
+    async def get_orders(self, filter: OrdersFilter | None = None) -> list[Order]:
+        await self._client.query()
+        return []
+
+    async def get_order(self, id: uuid.UUID) -> Order:
+        await self._client.query()
+        raise OrderNotFoundError
+
+    async def get_order_by_intake_id(self, intake_id: uuid.UUID) -> Order:
+        await self._client.query()
+        raise OrderNotFoundError
+
+    async def get_orders_summary(self) -> list[OrderStatusSummary]:
+        await self._client.query()
+        return []
+
+    async def archive_orders(
+        self, created_before: datetime.datetime, batch_size: int
+    ) -> int:
+        await self._client.query(round_trips=4)
+        return 0
+
+    async def get_archived_order(self, id: uuid.UUID) -> Order:
+        await self._client.query()
+        raise OrderNotFoundError
+
+    async def reject_journaled_orders(
+        self, orders: list[JournaledOrder], reason: str
+    ) -> None:
+        await self._client.query()
+
+    async def get_rejected_order(self, intake_id: uuid.UUID) -> RejectedOrder:
+        await self._client.query()
+        raise OrderNotFoundError
+
+    async def update_order(self, order: OrderUpdate) -> OrderUpdated:
+        # Conditional update, then items are replaced
+        await self._client.query(round_trips=3)
+        return OrderUpdated(id=order.id, version=2)
+
+
+class _StandInTransaction:
+    def __init__(self, client: "StandInAsyncIOClient") -> None:
+        self._client = client
+        self._attempted = False
+
+    def __aiter__(self) -> "_StandInTransaction":
+        return self
+
+    async def __anext__(self) -> "StandInAsyncIOClient":
+        if self._attempted:
+            raise StopAsyncIteration
+        self._attempted = True
+        return self._client
+
+
+class StandInAsyncIOClient:
+    """Answers queries of real repos without a server.
+
+    `query` returns no rows and `query_single` a new object with an id, which
+    is what `OrdersServiceRepo.create_order` reads.
+    """
+
+    def __init__(self, round_trip: float = 0.0) -> None:
+        self.round_trip = round_trip
+        self.queries = 0
+
+    async def query(self, query: str, *args: object, **kwargs: object) -> list[object]:
+        await self._round_trip()
+        return []
+
+    async def query_single(self, query: str, *args: object, **kwargs: object) -> object:
+        await self._round_trip()
+        return types.SimpleNamespace(id=uuid.uuid4())
+
+    def transaction(self) -> _StandInTransaction:
+        return _StandInTransaction(self)
+
+    async def __aenter__(self) -> "StandInAsyncIOClient":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        return None
+
+    async def _round_trip(self) -> None:
+        self.queries += 1
+        await asyncio.sleep(self.round_trip)
@@ -0,0 +1,158 @@
+"""Measures CPU overhead of tracing `POST /orders` at different sample rates.
+
+Run with `python -m benchmarks.tracing [--rounds N] [--rate R]`. Requests are
+sent to the app in-process and the real orders repo runs on a stand-in client,
+so request CPU excludes HTTP parsing and the EdgeDB protocol and the relative
+overhead is the worst case. The share of a core spent on tracing at `--rate`
+requests/s per worker is what has to stay under 1%.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+from fastapi import FastAPI
+
+from benchmarks.stand_ins import StandInAsyncIOClient
+from pizza_store.adapters.app.app import create_app
+from pizza_store.adapters.app.dependencies import get_orders_service
+from pizza_store.adapters.app.tracing import (
+    TracingMiddleware,
+    instrument_routes,
+    trace_service,
+)
+from pizza_store.adapters.db.query_log import InstrumentedClient
+from pizza_store.adapters.db.repos.orders import OrdersServiceRepo
+from pizza_store.adapters.tracing.tracer import (
+    FileSpanExporter,
+    InMemorySpanExporter,
+    SpanExporter,
+    Tracer,
+)
+from pizza_store.services.orders.service import OrdersService
+
+ORDER = json.dumps(
+    {
+        "phone": "+380991231212",
+        "items": [{"product_variant_id": str(uuid.uuid4()), "amount": 2}],
+        "note": "",
+        "address": "Baker street 221 B",
+    }
+).encode()
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "POST",
+    "scheme": "http",
+    "path": "/orders",
+    "raw_path": b"/orders",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [
+        (b"host", b"localhost"),
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(ORDER)).encode()),
+    ],
+    "client": ("127.0.0.1", 50000),
+    "server": ("127.0.0.1", 8000),
+}
+
+
+def build_app(tracer: Tracer | None) -> FastAPI:
+    app = create_app()
+    client = StandInAsyncIOClient()
+    repo = OrdersServiceRepo(client)  # type: ignore
+    if tracer is not None:
+        repo = OrdersServiceRepo(InstrumentedClient(client, None, tracer))  # type: ignore
+        instrument_routes(app, tracer)
+        app.add_middleware(TracingMiddleware, tracer=tracer)
+    service = trace_service(OrdersService(repo), tracer)
+
+    async def get_service() -> OrdersService:
+        # Sync dependencies run in a thread pool, which would dominate CPU time
+        return service
+
+    app.dependency_overrides[get_orders_service] = get_service
+    return app
+
+
+async def _request(app: FastAPI) -> None:
+    messages = [{"type": "http.request", "body": ORDER, "more_body": False}]
+    status = None
+
+    async def receive() -> dict[str, object]:
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message: dict[str, object]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(dict(SCOPE), receive, send)
+    assert status == 200, status
+
+
+async def _measure(
+    apps: dict[str, FastAPI], batch: int, rounds: int
+) -> dict[str, float]:
+    """Returns median CPU seconds per request of every app.
+
+    Batches of the apps are interleaved, so drift affects all of them alike.
+    """
+
+    for app in apps.values():
+        for _ in range(100):
+            await _request(app)
+    samples: dict[str, list[float]] = {name: [] for name in apps}
+    for _ in range(rounds):
+        for name, app in apps.items():
+            start = time.process_time()
+            for _ in range(batch):
+                await _request(app)
+            samples[name].append((time.process_time() - start) / batch)
+    return {name: statistics.median(s) for name, s in samples.items()}
+
+
+def main(batch: int, rounds: int, rate: float) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        variants: dict[str, tuple[float, SpanExporter | None]] = {
+            "off": (0.0, None),
+            "sample 0": (0.0, InMemorySpanExporter()),
+            "sample 0.01": (0.01, InMemorySpanExporter()),
+            "sample 0.1": (0.1, InMemorySpanExporter()),
+            "sample 1": (1.0, InMemorySpanExporter()),
+            "sample 1 file": (1.0, FileSpanExporter(os.path.join(directory, "t"))),
+        }
+        apps = {
+            name: build_app(
+                None if exporter is None else Tracer(exporter, sample_rate=rate)
+            )
+            for name, (rate, exporter) in variants.items()
+        }
+        seconds = asyncio.run(_measure(apps, batch, rounds))
+        for _, exporter in variants.values():
+            if exporter is not None:
+                exporter.shutdown()
+
+    print(f"CPU per request, overhead and share of a core at {rate:.0f} requests/s")
+    for name, value in seconds.items():
+        overhead = value - seconds["off"]
+        print(
+            f"{name:<14} {value * 1e6:>8.1f} us {overhead * 1e6:>+8.1f} us"
+            f" {overhead / seconds['off']:>+8.2%} {overhead * rate:>+8.2%} of a core"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=200, help="requests/s per worker")
+    args = parser.parse_args()
+    main(args.batch, args.rounds, args.rate)
@@ -0,0 +1,188 @@
+"""Compares gunicorn worker profiles serving `POST /orders`.
+
+Run with `python -m benchmarks.worker_profiles [--duration S] [--connections N]`.
+Starts gunicorn for every profile with the orders repo replaced by the
+in-memory stand-in, whose pool has `EDGEDB_POOL_SIZE` connections per worker,
+and loads it over keep-alive connections. Profiles are the `2 * cores + 1`
+sync-worker rule, `get_worker_count` and one worker, on every available loop.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+from fastapi import FastAPI
+from uvicorn.workers import UvicornWorker
+
+from pizza_store.adapters.app.workers import (
+    AsyncioWorker,
+    UvloopWorker,
+    get_worker_count,
+    has_uvloop,
+)
+from pizza_store.settings import settings
+
+HOST = "127.0.0.1"
+PORT = 8765
+ORDER = json.dumps(
+    {
+        "phone": "+380991231212",
+        "items": [{"product_variant_id": str(uuid.uuid4()), "amount": 2}],
+        "note": "",
+        "address": "Baker street 221 B",
+    }
+).encode()
+REQUEST = (
+    f"POST /orders HTTP/1.1\r\nHost: {HOST}\r\n"
+    f"Content-Type: application/json\r\nContent-Length: {len(ORDER)}\r\n\r\n"
+).encode() + ORDER
+
+
+def create_app() -> FastAPI:
+    """Returns the app with the orders repo replaced by the stand-in."""
+
+    from benchmarks.stand_ins import InMemoryOrdersRepo, StandInClient
+    from pizza_store.adapters.app.app import create_app
+    from pizza_store.adapters.app.dependencies import get_orders_service
+    from pizza_store.services.orders.service import OrdersService
+
+    app = create_app()
+    service = None
+
+    def get_stand_in_orders_service() -> OrdersService:
+        # Created in the worker, the pool semaphore belongs to its loop
+        nonlocal service
+        if service is None:
+            client = StandInClient(
+                round_trip=float(os.environ["BENCHMARK_ROUND_TRIP"]),
+                pool_size=settings.edgedb_pool_size,
+            )
+            service = OrdersService(InMemoryOrdersRepo(client))
+        return service
+
+    app.dependency_overrides[get_orders_service] = get_stand_in_orders_service
+    return app
+
+
+async def _read_response(reader: asyncio.StreamReader) -> None:
+    headers = await reader.readuntil(b"\r\n\r\n")
+    for line in headers.split(b"\r\n"):
+        name, _, value = line.partition(b":")
+        if name.lower() == b"content-length":
+            await reader.readexactly(int(value))
+            return
+
+
+async def _load(connections: int, duration: float) -> list[float]:
+    latencies: list[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def connection() -> None:
+        reader, writer = await asyncio.open_connection(HOST, PORT)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(REQUEST)
+            await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+
+    await asyncio.gather(*(connection() for _ in range(connections)))
+    return latencies
+
+
+def _wait_until_listening(process: subprocess.Popen[bytes]) -> None:
+    while process.poll() is None:
+        try:
+            socket.create_connection((HOST, PORT), timeout=0.1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("gunicorn exited")
+
+
+def run_profile(
+    workers: int, worker_class: str, connections: int, duration: float
+) -> list[float]:
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "benchmarks.worker_profiles:create_app()",
+            f"--bind={HOST}:{PORT}",
+            f"--workers={workers}",
+            f"--worker-class={worker_class}",
+            "--preload",
+            "--log-level=warning",
+        ],
+        env={
+            "EDGEDB_DSN": "edgedb://localhost",
+            "JWT_SECRET": "secret",
+            "PRICE_LISTS_SCHEDULER_ENABLED": "false",
+            **os.environ,
+        },
+    )
+    try:
+        _wait_until_listening(process)
+        # Warm up every worker before measuring
+        asyncio.run(_load(connections, 1.0))
+        return asyncio.run(_load(connections, duration))
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+
+
+def _report(name: str, latencies: list[float], elapsed: float) -> None:
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{name:<24} {len(latencies) / elapsed:>10.0f} req/s"
+        f" {statistics.median(latencies) * 1000:>8.2f} ms p50"
+        f" {p99 * 1000:>8.2f} ms p99"
+    )
+
+
+def main(connections: int, duration: float, round_trip: float) -> None:
+    os.environ["BENCHMARK_ROUND_TRIP"] = str(round_trip)
+    cpu_count = len(os.sched_getaffinity(0))
+    counts = {
+        "sync rule": cpu_count * 2 + 1,
+        "auto": get_worker_count(
+            cpu_count, settings.edgedb_pool_size, settings.edgedb_max_connections
+        ),
+        "single": 1,
+    }
+    worker_classes: dict[str, type[UvicornWorker]] = {"asyncio": AsyncioWorker}
+    if has_uvloop:
+        worker_classes["uvloop"] = UvloopWorker
+
+    print(
+        f"{cpu_count} CPUs, pool of {settings.edgedb_pool_size} per worker,"
+        f" {connections} connections"
+    )
+    for loop, worker in worker_classes.items():
+        for name, workers in counts.items():
+            latencies = run_profile(
+                workers,
+                f"{worker.__module__}.{worker.__qualname__}",
+                connections,
+                duration,
+            )
+            _report(f"{loop} {name} ({workers})", latencies, duration)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--round-trip", type=float, default=0.002)
+    args = parser.parse_args()
+    main(args.connections, args.duration, args.round_trip)
@@ -1,8 +1,14 @@
-import multiprocessing
-
+from pizza_store.adapters.app.workers import get_worker_profile
 from pizza_store.settings import settings
 
+profile = get_worker_profile(settings)
+
 wsgi_app = "pizza_store.adapters.app.app:create_app()"
 bind = f"{settings.app_host}:{settings.app_port}"
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "uvicorn.workers.UvicornWorker"
+workers = profile.workers
+worker_class = profile.worker_class
+keepalive = profile.keepalive
+backlog = profile.backlog
+max_requests = profile.max_requests
+max_requests_jitter = profile.max_requests_jitter
+preload_app = settings.gunicorn_preload_app
@@ -1,14 +1,56 @@
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from pizza_store.adapters.app.dependencies import (
+    get_delivery_service,
+    get_orders_journal,
+    get_orders_journal_drainer,
+    get_price_list_scheduler,
+    get_shared_cache,
+    get_store_kitchen_service,
+)
+from pizza_store.adapters.app.middleware import (
+    CompressionMiddleware,
+    ETagMiddleware,
+    ReadYourWritesMiddleware,
+)
 from pizza_store.adapters.app.routes.root import router
-from pizza_store.adapters.db.client import client
+from pizza_store.adapters.app.tracing import TracingMiddleware, instrument_routes
+from pizza_store.adapters.db.client import (
+    get_client,
+    get_replica_router,
+    get_store_client,
+)
+from pizza_store.adapters.redis.cache import RedisSharedCache
+from pizza_store.adapters.tracing.tracer import get_tracer
+from pizza_store.settings import settings
+
+logger = logging.getLogger(__name__)
 
 
 def create_app() -> FastAPI:
     app = FastAPI()
     app.include_router(router)
 
+    # Added first to run after compression, ETags are hashes of uncompressed bodies
+    if settings.etag_enabled:
+        app.add_middleware(ETagMiddleware)
+    if settings.compression_enabled:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.compression_minimum_size,
+            gzip_level=settings.compression_gzip_level,
+            brotli_quality=settings.compression_brotli_quality,
+        )
+
+    if settings.edgedb_replica_dsn is not None:
+        app.add_middleware(
+            ReadYourWritesMiddleware,
+            sticky_seconds=settings.edgedb_replica_sticky_seconds,
+        )
+
     # Enable CORS
     app.add_middleware(
         CORSMiddleware,
@@ -18,8 +60,72 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    tracer = get_tracer()
+    if tracer is not None:
+        instrument_routes(app, tracer)
+        # Added last, the request span covers all middlewares
+        app.add_middleware(TracingMiddleware, tracer=tracer)
+
+    @app.on_event("startup")
+    async def _load_delivery_zones() -> None:
+        # Zones and the gazetteer are loaded before the first order
+        get_delivery_service()
+
+    @app.on_event("startup")
+    async def _rebuild_kitchen_queues() -> None:
+        for store in settings.stores:
+            kitchen = get_store_kitchen_service(store)
+            if kitchen is None:
+                continue
+            try:
+                await kitchen.rebuild()
+            except Exception:
+                # The queue is loaded on first read
+                logger.exception("Failed to rebuild kitchen queue of %s", store)
+
+    @app.on_event("startup")
+    async def _start_orders_journal_drainers() -> None:
+        for store in settings.stores:
+            drainer = get_orders_journal_drainer(store)
+            if drainer is not None:
+                drainer.start()
+
+    @app.on_event("startup")
+    async def _start_price_list_schedulers() -> None:
+        for store in settings.stores:
+            scheduler = get_price_list_scheduler(store)
+            if scheduler is not None:
+                scheduler.start()
+
+    @app.on_event("startup")
+    async def _start_replica_router() -> None:
+        replicas = get_replica_router()
+        if replicas is not None:
+            replicas.start()
+
     @app.on_event("shutdown")
     async def _() -> None:
-        await client.aclose()
+        replicas = get_replica_router()
+        if replicas is not None:
+            await replicas.stop()
+            await replicas.replica.aclose()
+        for store in settings.stores:
+            scheduler = get_price_list_scheduler(store)
+            if scheduler is not None:
+                await scheduler.stop()
+            drainer = get_orders_journal_drainer(store)
+            if drainer is not None:
+                await drainer.stop()
+            journal = get_orders_journal(store)
+            if journal is not None:
+                journal.close()
+            if store in settings.store_edgedb_dsns:
+                await get_store_client(store).aclose()
+        await get_client().aclose()
+        shared_cache = get_shared_cache()
+        if isinstance(shared_cache, RedisSharedCache):
+            await shared_cache.close()
+        if tracer is not None:
+            tracer.shutdown()
 
     return app
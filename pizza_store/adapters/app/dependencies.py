@@ -1,48 +1,251 @@
+import dataclasses
+import os
 from functools import lru_cache
 from typing import Callable
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security.oauth2 import OAuth2PasswordBearer
 
-from pizza_store.adapters.db.client import client
+from pizza_store.adapters.app.tracing import trace_service
+from pizza_store.adapters.db.client import (
+    get_client,
+    get_query_log,
+    get_store_client,
+    get_store_replica_router,
+)
 from pizza_store.adapters.db.repos.auth import AuthServiceRepo
 from pizza_store.adapters.db.repos.orders import OrdersServiceRepo
 from pizza_store.adapters.db.repos.products import ProductsServiceRepo
+from pizza_store.adapters.geo.geocoder import CsvGeocoder
+from pizza_store.adapters.geo.zones import load_delivery_zones
+from pizza_store.adapters.journal.orders import OrdersJournal
+from pizza_store.adapters.redis.cache import RedisSharedCache
+from pizza_store.adapters.shared_memory.cache import SharedMemoryCache
+from pizza_store.adapters.shared_memory.token_buckets import SharedMemoryTokenBuckets
+from pizza_store.adapters.tracing.tracer import get_tracer
+from pizza_store.services.auth.cache import CachedAuthServiceRepo
 from pizza_store.services.auth.exceptions import (
     AccessForbiddenError,
     InvalidAccessToken,
 )
 from pizza_store.services.auth.models import JWTConfig, UserTokenData
 from pizza_store.services.auth.service import AuthService
+from pizza_store.services.auth.throttling import LoginThrottleConfig, LoginThrottler
+from pizza_store.services.cache import ISharedCache
+from pizza_store.services.delivery.service import DeliveryService
+from pizza_store.services.delivery.zones import ZoneIndex
+from pizza_store.services.kitchen.models import KitchenConfig
+from pizza_store.services.kitchen.service import KitchenService
+from pizza_store.services.orders.drainer import OrdersJournalDrainer
 from pizza_store.services.orders.service import OrdersService
+from pizza_store.services.products.scheduler import PriceListScheduler
 from pizza_store.services.products.service import ProductsService
 from pizza_store.settings import settings
 
 
 @lru_cache
-def get_products_service() -> ProductsService:
-    repo = ProductsServiceRepo(client)
-    service = ProductsService(repo)
-    return service
+def get_shared_cache() -> ISharedCache | None:
+    if settings.shared_cache_backend == "shared_memory":
+        slots = settings.shared_cache_slots
+        if slots is None:
+            # Spare slots keep probing short and leave room for keys of
+            # stores that were removed or renamed
+            slots = max(16, 2 * (2 * len(settings.stores) + 1))
+        return SharedMemoryCache(
+            settings.shared_cache_path,
+            slots=slots,
+            max_value_size=settings.shared_cache_max_value_size,
+        )
+    if settings.shared_cache_backend == "redis":
+        if settings.shared_cache_redis_url is None:
+            raise ValueError("SHARED_CACHE_REDIS_URL is required for redis cache")
+        return RedisSharedCache.from_url(settings.shared_cache_redis_url)
+    return None
+
+
+async def get_store(x_store: str | None = Header(None)) -> str:
+    """Returns the store of the request, chosen by the `X-Store` header."""
+
+    if x_store is None:
+        return settings.stores[0]
+    if x_store not in settings.stores:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Store not found."
+        )
+    return x_store
+
+
+@lru_cache
+def get_store_products_service(store: str) -> ProductsService:
+    repo = ProductsServiceRepo(
+        get_store_client(store), get_store_replica_router(store), store=store
+    )
+    service = ProductsService(
+        repo,
+        menu_ttl=settings.menu_index_ttl,
+        shared_cache=get_shared_cache(),
+        store=store,
+    )
+    return trace_service(service, get_tracer())
+
+
+async def get_products_service(store: str = Depends(get_store)) -> ProductsService:
+    return get_store_products_service(store)
+
+
+@lru_cache
+def get_price_list_scheduler(store: str) -> PriceListScheduler | None:
+    if not settings.price_lists_scheduler_enabled:
+        return None
+    return PriceListScheduler(
+        get_store_products_service(store), interval=settings.price_lists_interval
+    )
+
+
+@lru_cache
+def get_orders_journal(store: str) -> OrdersJournal | None:
+    if settings.orders_intake_mode != "journal":
+        return None
+    # The first store keeps the journal of a single store app
+    directory = settings.orders_journal_dir
+    if store != settings.stores[0]:
+        directory = os.path.join(directory, store)
+    journal = OrdersJournal(
+        directory,
+        flush_interval=settings.orders_journal_flush_interval,
+    )
+    journal.open()
+    return journal
+
+
+@lru_cache
+def get_store_kitchen_service(store: str) -> KitchenService | None:
+    if not settings.kitchen_queue_enabled:
+        return None
+    service = KitchenService(
+        # From the primary, a queue loaded after another worker's event must
+        # have its order and is shared with other workers at that version
+        OrdersServiceRepo(get_store_client(store), store=store),
+        get_store_products_service(store),
+        KitchenConfig(
+            stations=settings.kitchen_stations,
+            promise_seconds=settings.kitchen_promise_minutes * 60,
+            base_prep_seconds=settings.kitchen_base_prep_seconds,
+            item_prep_seconds=settings.kitchen_item_prep_seconds,
+            category_prep_seconds=settings.kitchen_category_prep_seconds,
+        ),
+        queue_ttl=settings.kitchen_queue_ttl,
+        shared_cache=get_shared_cache(),
+        store=store,
+    )
+    return trace_service(service, get_tracer())
+
+
+async def get_kitchen_service(
+    store: str = Depends(get_store),
+) -> KitchenService | None:
+    return get_store_kitchen_service(store)
+
+
+@lru_cache
+def get_orders_journal_drainer(store: str) -> OrdersJournalDrainer | None:
+    journal = get_orders_journal(store)
+    if journal is None:
+        return None
+    return OrdersJournalDrainer(
+        OrdersServiceRepo(get_store_client(store), store=store),
+        journal,
+        batch_size=settings.orders_journal_drain_batch_size,
+        interval=settings.orders_journal_drain_interval,
+        max_retries=settings.orders_journal_drain_max_retries,
+        kitchen=get_store_kitchen_service(store),
+    )
+
+
+@lru_cache
+def get_delivery_service() -> DeliveryService | None:
+    if settings.delivery_zones_path is None:
+        return None
+    if settings.delivery_geocoder_path is None:
+        raise ValueError("DELIVERY_GEOCODER_PATH is required for delivery zones")
+    service = DeliveryService(
+        ZoneIndex(
+            load_delivery_zones(settings.delivery_zones_path),
+            cell_size=settings.delivery_zones_cell_size,
+        ),
+        CsvGeocoder(settings.delivery_geocoder_path),
+        cache_size=settings.delivery_geocoding_cache_size,
+        cache_ttl=settings.delivery_geocoding_cache_ttl,
+        negative_ttl=settings.delivery_unknown_addresses_cache_ttl,
+    )
+    return trace_service(service, get_tracer())
 
 
 @lru_cache
-def get_orders_service() -> OrdersService:
-    repo = OrdersServiceRepo(client)
-    service = OrdersService(repo)
-    return service
+def get_store_orders_service(store: str) -> OrdersService:
+    repo = OrdersServiceRepo(
+        get_store_client(store), get_store_replica_router(store), store=store
+    )
+    service = OrdersService(
+        repo,
+        get_orders_journal(store),
+        summary_ttl=settings.orders_summary_ttl,
+        variants=get_store_products_service(store),
+        delivery=get_delivery_service(),
+        kitchen=get_store_kitchen_service(store),
+    )
+    return trace_service(service, get_tracer())
+
+
+async def get_orders_service(store: str = Depends(get_store)) -> OrdersService:
+    return get_store_orders_service(store)
 
 
 @lru_cache
 def get_auth_service() -> AuthService:
-    repo = AuthServiceRepo(client)
+    repo = CachedAuthServiceRepo(
+        AuthServiceRepo(get_client()),
+        max_size=settings.auth_users_cache_size,
+        ttl=settings.auth_users_cache_ttl,
+        negative_max_size=settings.auth_unknown_usernames_cache_size,
+        negative_ttl=settings.auth_unknown_usernames_cache_ttl,
+        shared_cache=get_shared_cache(),
+    )
     jwt_config = JWTConfig(
         algorithm=settings.jwt_algorithm,
         secret=settings.jwt_secret,
         expires_in=settings.jwt_expires_in,
+        refresh_expires_in=settings.jwt_refresh_expires_in,
+        accept_legacy_secret=settings.jwt_accept_legacy_secret,
     )
-    service = AuthService(repo, jwt_config)
-    return service
+    if settings.jwt_keys_dir is not None:
+        # Imports key types from `cryptography`, only needed with asymmetric keys
+        from pizza_store.adapters.crypto.jwt_keys import load_jwt_keys
+
+        keys = load_jwt_keys(settings.jwt_keys_dir)
+        signing_key = next((k for k in keys if k.kid == settings.jwt_signing_kid), None)
+        if signing_key is None or signing_key.signing_key is None:
+            raise ValueError(
+                f"No private key {settings.jwt_signing_kid!r} in {settings.jwt_keys_dir}"
+            )
+        jwt_config = dataclasses.replace(
+            jwt_config, keys=keys, signing_kid=signing_key.kid
+        )
+    login_throttler = None
+    if settings.login_throttle_enabled:
+        login_throttler = LoginThrottler(
+            SharedMemoryTokenBuckets(settings.login_throttle_path),
+            LoginThrottleConfig(
+                username_burst=settings.login_username_burst,
+                username_per_minute=settings.login_username_per_minute,
+                ip_burst=settings.login_ip_burst,
+                ip_per_minute=settings.login_ip_per_minute,
+                username_total_burst=settings.login_username_total_burst,
+                username_total_per_minute=settings.login_username_total_per_minute,
+            ),
+        )
+    service = AuthService(repo, jwt_config, login_throttler)
+    return trace_service(service, get_tracer())
 
 
 def get_current_user(
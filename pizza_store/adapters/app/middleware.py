@@ -0,0 +1,304 @@
+import hashlib
+import time
+import zlib
+from math import ceil
+from typing import Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from pizza_store.adapters.db.replicas import primary_reads
+
+try:
+    import brotli
+except ImportError:
+    has_brotli = False
+else:
+    has_brotli = True
+
+
+COMPRESSIBLE_CONTENT_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/",
+)
+
+
+class _Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes:
+        ...
+
+    def flush(self) -> bytes:
+        """Returns all data compressed so far, so a chunk can be sent."""
+        ...
+
+    def finish(self) -> bytes:
+        ...
+
+
+class _GzipCompressor:
+    def __init__(self, level: int) -> None:
+        # wbits 31 writes gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def parse_accept_encoding(value: str) -> dict[str, float]:
+    """Returns q-values of encodings from an `Accept-Encoding` header."""
+
+    encodings = {}
+    for item in value.split(","):
+        name, *params = item.strip().split(";")
+        q = 1.0
+        for param in params:
+            key, _, param_value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(param_value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            encodings[name.strip().lower()] = q
+    return encodings
+
+
+class CompressionMiddleware:
+    """Compresses text and JSON responses with brotli or gzip.
+
+    Brotli is preferred if the client accepts it and `brotli` is installed.
+    Responses sent in one body message are compressed only if they are at
+    least `minimum_size` bytes. Streamed responses are always compressed and
+    flushed after every chunk, so clients get rows as soon as they are sent.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._choose_encoding(
+            Headers(scope=scope).get("accept-encoding", "")
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        compressor: _Compressor | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough
+            if passthrough or message["type"] not in (
+                "http.response.start",
+                "http.response.body",
+            ):
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Headers depend on the first body message
+                start_message = message
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                assert start_message is not None
+                headers = MutableHeaders(raw=list(start_message["headers"]))
+                if not self._is_compressible(headers) or (
+                    not more_body and len(body) < self.minimum_size
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = self._create_compressor(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "content-length" in headers:
+                    del headers["content-length"]
+                await send({**start_message, "headers": headers.raw})
+
+            if more_body:
+                data = compressor.compress(body) + compressor.flush()
+            else:
+                data = compressor.compress(body) + compressor.finish()
+            await send(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
+
+        await self.app(scope, receive, send_compressed)
+
+    def _choose_encoding(self, accept_encoding: str) -> str | None:
+        encodings = parse_accept_encoding(accept_encoding)
+        if has_brotli and encodings.get("br", 0) > 0:
+            return "br"
+        if encodings.get("gzip", encodings.get("*", 0)) > 0:
+            return "gzip"
+        return None
+
+    def _create_compressor(self, encoding: str) -> _Compressor:
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+    @classmethod
+    def _is_compressible(cls, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of `etag` with an `If-None-Match` header."""
+
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque_tag for tag in if_none_match.split(",")
+    )
+
+
+class ETagMiddleware:
+    """Adds weak ETags to GET responses and answers `If-None-Match` with 304.
+
+    The ETag is a hash of the response body, so only responses sent in one
+    body message get it, streamed responses are not buffered to hash them.
+    Routes still run for conditional requests, only sending the body is saved.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start_message: Message | None = None
+
+        async def send_with_etag(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                start_message = message
+                return
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = MutableHeaders(raw=list(start["headers"]))
+            body = message.get("body", b"")
+            if message.get("more_body", False) or "etag" in headers:
+                await send(start)
+                await send(message)
+                return
+
+            etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            headers["ETag"] = etag
+            if if_none_match is not None and etag_matches(if_none_match, etag):
+                for name in ("content-length", "content-type"):
+                    if name in headers:
+                        del headers[name]
+                await send({**start, "status": 304, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send({**start, "headers": headers.raw})
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+
+class ReadYourWritesMiddleware:
+    """Reads from the primary for clients which recently wrote.
+
+    Requests other than GET and HEAD and requests with a fresh sticky cookie
+    run in `primary_reads`. Successful writes set the cookie for
+    `sticky_seconds`, so the client reads its writes even if replicas lag.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sticky_seconds: float = 5.0,
+        cookie_name: str = "primary_reads_until",
+    ) -> None:
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+        self.cookie_name = cookie_name
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["method"] in ("GET", "HEAD"):
+            if self._is_sticky(scope):
+                with primary_reads():
+                    await self.app(scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = int(time.time() + self.sticky_seconds)
+                headers = MutableHeaders(raw=list(message["headers"]))
+                headers.append(
+                    "Set-Cookie",
+                    f"{self.cookie_name}={until}; Max-Age={ceil(self.sticky_seconds)};"
+                    " Path=/; HttpOnly; SameSite=Lax",
+                )
+                message = {**message, "headers": headers.raw}
+            await send(message)
+
+        with primary_reads():
+            await self.app(scope, receive, send_with_cookie)
+
+    def _is_sticky(self, scope: Scope) -> bool:
+        cookie = Headers(scope=scope).get("cookie")
+        if cookie is None:
+            return False
+        for item in cookie.split(";"):
+            name, _, value = item.strip().partition("=")
+            if name == self.cookie_name:
+                try:
+                    return time.time() < int(value)
+                except ValueError:
+                    return False
+        return False
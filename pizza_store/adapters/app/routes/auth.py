@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import math
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic.main import BaseModel
 
 from pizza_store.adapters.app.dependencies import get_auth_service
 from pizza_store.services.auth.exceptions import (
     InvalidCredentialsError,
+    InvalidRefreshToken,
+    TooManyLoginAttemptsError,
     UserAlreadyExistsError,
 )
 from pizza_store.services.auth.models import UserCreate, UserLogIn
@@ -27,6 +32,15 @@ class TokenPydantic(BaseModel):
     access_token: str
     token_type: str
     expires_in: int
+    refresh_token: str | None = None
+
+
+class RefreshTokenPydantic(BaseModel):
+    refresh_token: str
+
+
+class JWKSPydantic(BaseModel):
+    keys: list[dict[str, Any]]
 
 
 @router.post("/register")
@@ -46,17 +60,26 @@ async def register_user(
         access_token=token.access_token,
         token_type=token.token_type,
         expires_in=token.expires_in,
+        refresh_token=token.refresh_token,
     )
 
 
 @router.post("/login")
 async def login_user(
+    request: Request,
     user: OAuth2PasswordRequestForm = Depends(),
     service: AuthService = Depends(get_auth_service),
 ) -> TokenPydantic:
     try:
         token = await service.login_user(
-            UserLogIn(username=user.username, password=user.password)
+            UserLogIn(username=user.username, password=user.password),
+            ip=request.client.host if request.client else None,
+        )
+    except TooManyLoginAttemptsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts.",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
         )
     except InvalidCredentialsError:
         raise HTTPException(
@@ -67,4 +90,33 @@ async def login_user(
         access_token=token.access_token,
         token_type=token.token_type,
         expires_in=token.expires_in,
+        refresh_token=token.refresh_token,
     )
+
+
+@router.post("/refresh")
+async def refresh_user_token(
+    token: RefreshTokenPydantic,
+    service: AuthService = Depends(get_auth_service),
+) -> TokenPydantic:
+    try:
+        new_token = service.refresh_user_token(token.refresh_token)
+    except InvalidRefreshToken:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token."
+        )
+    return TokenPydantic(
+        access_token=new_token.access_token,
+        token_type=new_token.token_type,
+        expires_in=new_token.expires_in,
+        refresh_token=new_token.refresh_token,
+    )
+
+
+@router.get("/jwks")
+async def get_jwks(
+    response: Response,
+    service: AuthService = Depends(get_auth_service),
+) -> JWKSPydantic:
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return JWKSPydantic(keys=service.get_jwks())
@@ -1,6 +1,8 @@
 import uuid
+from decimal import Decimal
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from pydantic import BaseModel
 
 from pizza_store.adapters.app.dependencies import get_current_user, get_products_service
@@ -9,7 +11,11 @@ from pizza_store.services.products.exceptions import (
     CategoryAlreadyExistsError,
     CategoryNotFoundError,
 )
-from pizza_store.services.products.models import CategoryCreate, CategoryUpdate
+from pizza_store.services.products.models import (
+    CategoryCreate,
+    CategoryUpdate,
+    CategoryUpsert,
+)
 from pizza_store.services.products.service import ProductsService
 
 router = APIRouter(prefix="/categories")
@@ -34,17 +40,77 @@ class CategoryUpdatedPydantic(BaseModel):
     id: uuid.UUID
 
 
+class CategoryUpsertedPydantic(BaseModel):
+    id: uuid.UUID
+    created: bool
+
+
 class CategoryPydantic(BaseModel):
     id: uuid.UUID
     name: str
 
 
+class CategoryProductVariantPydantic(BaseModel):
+    id: uuid.UUID
+    name: str
+    weight: Decimal
+    weight_units: str
+    price: Decimal
+
+
+class CategoryProductPydantic(BaseModel):
+    id: uuid.UUID
+    name: str
+    description: str
+    variants: list[CategoryProductVariantPydantic]
+    image_url: str
+
+
+class CategoryWithProductsPydantic(CategoryPydantic):
+    products_count: int
+    products: list[CategoryProductPydantic] | None = None
+
+
 @router.get("")
 async def get_categories(
+    include: Literal["products"] | None = None,
     service: ProductsService = Depends(get_products_service),
-) -> list[CategoryPydantic]:
-    result = await service.get_categories()
-    return [CategoryPydantic(id=c.id, name=c.name) for c in result]
+) -> list[CategoryWithProductsPydantic]:
+    result = await service.get_menu()
+    if include != "products":
+        return [
+            CategoryWithProductsPydantic(
+                id=c.id, name=c.name, products_count=len(c.products)
+            )
+            for c in result
+        ]
+    return [
+        CategoryWithProductsPydantic(
+            id=c.id,
+            name=c.name,
+            products_count=len(c.products),
+            products=[
+                CategoryProductPydantic(
+                    id=p.id,
+                    name=p.name,
+                    description=p.description,
+                    variants=[
+                        CategoryProductVariantPydantic(
+                            id=v.id,
+                            name=v.name,
+                            weight=v.weight,
+                            weight_units=v.weight_units,
+                            price=v.price,
+                        )
+                        for v in p.variants
+                    ],
+                    image_url=p.image_url,
+                )
+                for p in c.products
+            ],
+        )
+        for c in result
+    ]
 
 
 @router.post("")
@@ -62,6 +128,19 @@ async def create_category(
     return CategoryCreatedPydantic(id=result.id)
 
 
+@router.put("/by-name/{name}")
+async def upsert_category(
+    name: str,
+    response: Response,
+    service: ProductsService = Depends(get_products_service),
+    _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
+) -> CategoryUpsertedPydantic:
+    result = await service.upsert_category(CategoryUpsert(name=name))
+    if result.created:
+        response.status_code = status.HTTP_201_CREATED
+    return CategoryUpsertedPydantic(id=result.id, created=result.created)
+
+
 @router.get("/{id}")
 async def get_category(
     id: uuid.UUID, service: ProductsService = Depends(get_products_service)
@@ -0,0 +1,72 @@
+import datetime
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+
+from pizza_store.adapters.app.dependencies import get_current_user, get_kitchen_service
+from pizza_store.services.auth.models import UserTokenData
+from pizza_store.services.kitchen.exceptions import OrderNotQueuedError
+from pizza_store.services.kitchen.models import QueuedOrder
+from pizza_store.services.kitchen.service import KitchenService
+
+router = APIRouter(prefix="/kitchen")
+
+
+class QueuedOrderPydantic(BaseModel):
+    id: uuid.UUID
+    position: int
+    created_at: datetime.datetime
+    delivery_zone: str | None
+    prep_seconds: float
+    start_by: datetime.datetime
+    eta: datetime.datetime
+
+
+def _get_enabled_kitchen_service(
+    service: KitchenService | None = Depends(get_kitchen_service),
+) -> KitchenService:
+    if service is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Kitchen queue is disabled.",
+        )
+    return service
+
+
+def _to_pydantic(q: QueuedOrder) -> QueuedOrderPydantic:
+    return QueuedOrderPydantic(
+        id=q.order.id,
+        position=q.position,
+        created_at=q.order.created_at,
+        delivery_zone=q.order.delivery_zone,
+        prep_seconds=q.order.prep_seconds,
+        start_by=q.order.start_by,
+        eta=q.eta,
+    )
+
+
+@router.get("/queue")
+async def get_queue(
+    delivery_zone: str | None = None,
+    limit: int | None = Query(None, ge=1),
+    service: KitchenService = Depends(_get_enabled_kitchen_service),
+    _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
+) -> list[QueuedOrderPydantic]:
+    result = await service.get_queue(delivery_zone, limit)
+    return [_to_pydantic(q) for q in result]
+
+
+@router.get("/queue/{id}")
+async def get_queued_order(
+    id: uuid.UUID,
+    service: KitchenService = Depends(_get_enabled_kitchen_service),
+    _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
+) -> QueuedOrderPydantic:
+    try:
+        result = await service.get_queued_order(id)
+    except OrderNotQueuedError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Order is not queued."
+        )
+    return _to_pydantic(result)
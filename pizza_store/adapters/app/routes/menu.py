@@ -0,0 +1,147 @@
+import uuid
+from decimal import Decimal
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from pizza_store.adapters.app.dependencies import get_current_user, get_products_service
+from pizza_store.adapters.files.menu import (
+    MenuFileFormat,
+    read_menu_rows,
+    write_menu_rows,
+)
+from pizza_store.services.auth.models import UserTokenData
+from pizza_store.services.products.models import MenuEntity
+from pizza_store.services.products.service import ProductsService
+from pizza_store.settings import settings
+
+router = APIRouter(prefix="/menu")
+
+MEDIA_TYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv"}
+
+
+class MenuRowErrorPydantic(BaseModel):
+    line: int
+    message: str
+
+
+class MenuImportedPydantic(BaseModel):
+    rows: int
+    errors: list[MenuRowErrorPydantic]
+
+
+class MenuChangeCategoryPydantic(BaseModel):
+    id: uuid.UUID
+    name: str
+
+
+class MenuChangeProductPydantic(BaseModel):
+    id: uuid.UUID
+    category_id: uuid.UUID
+    name: str
+    description: str
+    image_url: str
+
+
+class MenuChangeVariantPydantic(BaseModel):
+    id: uuid.UUID
+    name: str
+    weight: Decimal
+    weight_units: str
+    price: Decimal
+
+
+class MenuDeletedPydantic(BaseModel):
+    entity: MenuEntity
+    id: uuid.UUID
+
+
+class MenuChangesPydantic(BaseModel):
+    version: int
+    snapshot: bool
+    categories: list[MenuChangeCategoryPydantic]
+    products: list[MenuChangeProductPydantic]
+    variants: dict[uuid.UUID, list[MenuChangeVariantPydantic]]
+    deleted: list[MenuDeletedPydantic]
+
+
+@router.get("/changes")
+async def get_menu_changes(
+    since: int | None = Query(None, ge=0),
+    service: ProductsService = Depends(get_products_service),
+) -> MenuChangesPydantic:
+    """Returns menu changes after version `since` of the client's copy.
+
+    Clients apply created or updated entities by id and delete the deleted
+    ones with their products and variants, or replace their copy if
+    `snapshot` is true. Then they keep `version` for the next request.
+    """
+
+    result = await service.get_menu_changes(
+        since, max_changes=settings.menu_changes_max_changes
+    )
+    return MenuChangesPydantic(
+        version=result.version,
+        snapshot=result.snapshot,
+        categories=[
+            MenuChangeCategoryPydantic(id=c.id, name=c.name) for c in result.categories
+        ],
+        products=[
+            MenuChangeProductPydantic(
+                id=p.id,
+                category_id=p.category.id,
+                name=p.name,
+                description=p.description,
+                image_url=p.image_url,
+            )
+            for p in result.products
+        ],
+        variants={
+            product_id: [
+                MenuChangeVariantPydantic(
+                    id=v.id,
+                    name=v.name,
+                    weight=v.weight,
+                    weight_units=v.weight_units,
+                    price=v.price,
+                )
+                for v in variants
+            ]
+            for product_id, variants in result.variants.items()
+        },
+        deleted=[MenuDeletedPydantic(entity=c.entity, id=c.id) for c in result.deleted],
+    )
+
+
+@router.post("/import")
+async def import_menu(
+    request: Request,
+    format: MenuFileFormat = "jsonl",
+    service: ProductsService = Depends(get_products_service),
+    _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
+) -> MenuImportedPydantic:
+    result = await service.import_menu(
+        read_menu_rows(request.stream(), format),
+        batch_size=settings.menu_import_batch_size,
+    )
+    return MenuImportedPydantic(
+        rows=result.rows,
+        errors=[
+            MenuRowErrorPydantic(line=e.line, message=e.message) for e in result.errors
+        ],
+    )
+
+
+@router.get("/export")
+async def export_menu(
+    format: MenuFileFormat = "jsonl",
+    service: ProductsService = Depends(get_products_service),
+    _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
+) -> StreamingResponse:
+    rows = await service.get_menu_rows()
+    return StreamingResponse(
+        write_menu_rows(rows, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="menu.{format}"'},
+    )
@@ -3,7 +3,8 @@ import uuid
 from decimal import Decimal
 
 from fastapi.exceptions import HTTPException
-from fastapi.param_functions import Depends
+from fastapi.param_functions import Depends, Header, Query
+from fastapi.responses import Response
 from fastapi.routing import APIRouter
 from pydantic.main import BaseModel
 from pydantic.types import PositiveInt
@@ -17,8 +18,23 @@ from pizza_store.adapters.app.routes.product_variants import (
 )
 from pizza_store.entities.orders import OrderStatus
 from pizza_store.services.auth.models import UserTokenData
-from pizza_store.services.orders.exceptions import OrderNotFoundError
-from pizza_store.services.orders.models import OrderCreate, OrderItemCreate, OrderUpdate
+from pizza_store.services.delivery.exceptions import (
+    AddressNotDeliverableError,
+    AddressNotFoundError,
+)
+from pizza_store.services.orders.exceptions import (
+    InvalidOrderError,
+    InvalidOrderTransitionError,
+    OrderNotFoundError,
+    OrderRejectedError,
+    OrderVersionConflictError,
+)
+from pizza_store.services.orders.models import (
+    OrderCreate,
+    OrderItemCreate,
+    OrdersFilter,
+    OrderUpdate,
+)
 from pizza_store.services.orders.service import OrdersService
 from pizza_store.services.products.exceptions import ProductVariantNotFoundError
 
@@ -39,6 +55,7 @@ class OrderCreatePydantic(BaseModel):
 
 class OrderCreatedPydantic(BaseModel):
     id: uuid.UUID
+    total_price: Decimal | None
 
 
 class OrderItemPydantic(BaseModel):
@@ -58,6 +75,14 @@ class OrderUpdatePydantic(BaseModel):
 
 class OrderUpdatedPydantic(BaseModel):
     id: uuid.UUID
+    total_price: Decimal | None
+    version: int | None
+
+
+class OrderStatusSummaryPydantic(BaseModel):
+    status: OrderStatus
+    count: int
+    total_price: Decimal
 
 
 class OrderPydantic(BaseModel):
@@ -69,6 +94,8 @@ class OrderPydantic(BaseModel):
     address: str
     total_price: Decimal
     created_at: datetime.datetime
+    delivery_zone: str | None
+    version: int
 
 
 @router.post("")
@@ -95,16 +122,78 @@ async def create_order(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product variant does not exist.",
         )
-    return OrderCreatedPydantic(id=result.id)
+    except InvalidOrderError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Order must contain items with valid amounts.",
+        )
+    except AddressNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Address is not found.",
+        )
+    except AddressNotDeliverableError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Address is outside of delivery zones.",
+        )
+    return OrderCreatedPydantic(id=result.id, total_price=result.total_price)
+
+
+def _order_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def _parse_if_match(if_match: str | None) -> int | None:
+    """Returns order version required by an `If-Match` header, None for "*".
+
+    The header is required, so clients can't overwrite changes they haven't
+    seen by leaving it out.
+    """
+
+    if if_match is None:
+        raise HTTPException(
+            status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+            detail="If-Match is required.",
+        )
+    if if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match must be an order ETag.",
+        )
+
+
+def _as_aware(value: datetime.datetime | None) -> datetime.datetime | None:
+    """Treats datetime without timezone as UTC, EdgeDB requires timezone."""
+
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value
 
 
 @router.get("")
 async def get_orders(
-    status: OrderStatus | None = None,
+    status: list[OrderStatus] | None = Query(None),
+    created_from: datetime.datetime | None = None,
+    created_to: datetime.datetime | None = None,
+    phone: str | None = None,
+    delivery_zone: str | None = None,
     service: OrdersService = Depends(get_orders_service),
     _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
 ) -> list[OrderPydantic]:
-    result = await service.get_orders(status)
+    result = await service.get_orders(
+        OrdersFilter(
+            statuses=status,
+            created_from=_as_aware(created_from),
+            created_to=_as_aware(created_to),
+            phone=phone,
+            delivery_zone=delivery_zone,
+        )
+    )
     return [
         OrderPydantic(
             id=o.id,
@@ -114,6 +203,8 @@ async def get_orders(
             address=o.address,
             total_price=o.total_price,
             created_at=o.created_at,
+            delivery_zone=o.delivery_zone,
+            version=o.version,
             items=[
                 OrderItemPydantic(
                     id=oi.id,
@@ -144,9 +235,24 @@ async def get_orders(
     ]
 
 
+@router.get("/summary")
+async def get_orders_summary(
+    service: OrdersService = Depends(get_orders_service),
+    _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
+) -> list[OrderStatusSummaryPydantic]:
+    result = await service.get_orders_summary()
+    return [
+        OrderStatusSummaryPydantic(
+            status=s.status, count=s.count, total_price=s.total_price
+        )
+        for s in result
+    ]
+
+
 @router.get("/{id}")
 async def get_order(
     id: uuid.UUID,
+    response: Response,
     service: OrdersService = Depends(get_orders_service),
     _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
 ) -> OrderPydantic:
@@ -156,6 +262,12 @@ async def get_order(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Order does not exist."
         )
+    except OrderRejectedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE, detail=f"Order was rejected. {e.reason}"
+        )
+    # Sent back in `If-Match` to update the order only if it was not changed
+    response.headers["ETag"] = _order_etag(o.version)
     return OrderPydantic(
         id=o.id,
         phone=o.phone,
@@ -164,6 +276,8 @@ async def get_order(
         address=o.address,
         total_price=o.total_price,
         created_at=o.created_at,
+        delivery_zone=o.delivery_zone,
+        version=o.version,
         items=[
             OrderItemPydantic(
                 id=oi.id,
@@ -196,9 +310,12 @@ async def get_order(
 async def update_order(
     id: uuid.UUID,
     order: OrderUpdatePydantic,
+    response: Response,
+    if_match: str | None = Header(None),
     service: OrdersService = Depends(get_orders_service),
     _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
 ) -> OrderUpdatedPydantic:
+    version = _parse_if_match(if_match)
     try:
         result = await service.update_order(
             OrderUpdate(
@@ -213,6 +330,7 @@ async def update_order(
                     )
                     for item in order.items
                 ],
+                version=version,
             )
         )
     except OrderNotFoundError:
@@ -224,5 +342,34 @@ async def update_order(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product variant does not exist.",
         )
+    except InvalidOrderError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Order items must have valid amounts.",
+        )
+    except AddressNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Address is not found.",
+        )
+    except AddressNotDeliverableError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Address is outside of delivery zones.",
+        )
+    except OrderVersionConflictError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Order was changed, get it and retry the update.",
+        )
+    except InvalidOrderTransitionError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Order status can't be changed to the requested one.",
+        )
 
-    return OrderUpdatedPydantic(id=result.id)
+    if result.version is not None:
+        response.headers["ETag"] = _order_etag(result.version)
+    return OrderUpdatedPydantic(
+        id=result.id, total_price=result.total_price, version=result.version
+    )
@@ -0,0 +1,103 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel
+
+from pizza_store.adapters.app.dependencies import get_current_user, get_products_service
+from pizza_store.adapters.app.routes.product_variants import VariantPricePydantic
+from pizza_store.services.auth.models import UserTokenData
+from pizza_store.services.products.exceptions import (
+    InvalidPriceError,
+    PriceListNotFoundError,
+    ProductVariantNotFoundError,
+)
+from pizza_store.services.products.models import PriceListCreate, VariantPrice
+from pizza_store.services.products.service import ProductsService
+
+router = APIRouter(prefix="/price-lists")
+
+
+class PriceListCreatePydantic(BaseModel):
+    activate_at: datetime.datetime
+    prices: list[VariantPricePydantic]
+
+
+class PriceListCreatedPydantic(BaseModel):
+    id: uuid.UUID
+
+
+class PriceListDeletedPydantic(BaseModel):
+    id: uuid.UUID
+
+
+class PriceListPydantic(BaseModel):
+    id: uuid.UUID
+    activate_at: datetime.datetime
+    prices: dict[uuid.UUID, Decimal]
+    activated_at: datetime.datetime | None
+
+
+@router.post("")
+async def create_price_list(
+    price_list: PriceListCreatePydantic,
+    service: ProductsService = Depends(get_products_service),
+    _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
+) -> PriceListCreatedPydantic:
+    activate_at = price_list.activate_at
+    if activate_at.tzinfo is None:
+        activate_at = activate_at.replace(tzinfo=datetime.timezone.utc)
+    try:
+        result = await service.create_price_list(
+            PriceListCreate(
+                activate_at=activate_at,
+                prices=[
+                    VariantPrice(id=p.id, price=p.price) for p in price_list.prices
+                ],
+            )
+        )
+    except InvalidPriceError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Price must not be negative.",
+        )
+    except ProductVariantNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product variant does not exist.",
+        )
+    return PriceListCreatedPydantic(id=result.id)
+
+
+@router.get("")
+async def get_price_lists(
+    service: ProductsService = Depends(get_products_service),
+    _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
+) -> list[PriceListPydantic]:
+    result = await service.get_price_lists()
+    return [
+        PriceListPydantic(
+            id=p.id,
+            activate_at=p.activate_at,
+            prices=p.prices,
+            activated_at=p.activated_at,
+        )
+        for p in result
+    ]
+
+
+@router.delete("/{id}")
+async def delete_price_list(
+    id: uuid.UUID,
+    service: ProductsService = Depends(get_products_service),
+    _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
+) -> PriceListDeletedPydantic:
+    try:
+        result = await service.delete_price_list(id)
+    except PriceListNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pending price list does not exist.",
+        )
+    return PriceListDeletedPydantic(id=result.id)
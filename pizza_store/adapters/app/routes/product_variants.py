@@ -8,12 +8,14 @@ from pizza_store.adapters.app.dependencies import get_current_user, get_products
 from pizza_store.adapters.app.routes.categories import CategoryPydantic
 from pizza_store.services.auth.models import UserTokenData
 from pizza_store.services.products.exceptions import (
+    InvalidPriceError,
     ProductNotFoundError,
     ProductVariantNotFoundError,
 )
 from pizza_store.services.products.models import (
     ProductVariantCreate,
     ProductVariantUpdate,
+    VariantPrice,
 )
 from pizza_store.services.products.service import ProductsService
 
@@ -42,6 +44,19 @@ class ProductVariantUpdatedPydantic(BaseModel):
     id: uuid.UUID
 
 
+class VariantPricePydantic(BaseModel):
+    id: uuid.UUID
+    price: Decimal
+
+
+class VariantPricesUpdatePydantic(BaseModel):
+    prices: list[VariantPricePydantic]
+
+
+class VariantPricesUpdatedPydantic(BaseModel):
+    ids: list[uuid.UUID]
+
+
 class ProductVariantPydantic(BaseModel):
     id: uuid.UUID
     name: str
@@ -91,6 +106,29 @@ async def create_product_variant(
     return ProductVariantCreatedPydantic(id=result.id)
 
 
+@router.put("/prices")
+async def update_variant_prices(
+    prices: VariantPricesUpdatePydantic,
+    service: ProductsService = Depends(get_products_service),
+    _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
+) -> VariantPricesUpdatedPydantic:
+    try:
+        result = await service.update_variant_prices(
+            [VariantPrice(id=p.id, price=p.price) for p in prices.prices]
+        )
+    except InvalidPriceError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Price must not be negative.",
+        )
+    except ProductVariantNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product variant does not exist.",
+        )
+    return VariantPricesUpdatedPydantic(ids=result.ids)
+
+
 @router.delete("/{id}")
 async def delete_product_variant(
     id: uuid.UUID,
@@ -1,6 +1,6 @@
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from pydantic import BaseModel
 from pydantic.networks import HttpUrl
 
@@ -13,7 +13,11 @@ from pizza_store.services.products.exceptions import (
     ProductAlreadyExistsError,
     ProductNotFoundError,
 )
-from pizza_store.services.products.models import ProductCreate, ProductUpdate
+from pizza_store.services.products.models import (
+    ProductCreate,
+    ProductUpdate,
+    ProductUpsert,
+)
 from pizza_store.services.products.service import ProductsService
 
 router = APIRouter(prefix="/products")
@@ -45,6 +49,17 @@ class ProductUpdatedPydantic(BaseModel):
     id: uuid.UUID
 
 
+class ProductUpsertPydantic(BaseModel):
+    category_id: uuid.UUID
+    description: str = ""
+    image_url: HttpUrl
+
+
+class ProductUpsertedPydantic(BaseModel):
+    id: uuid.UUID
+    created: bool
+
+
 class ProductPydantic(BaseModel):
     id: uuid.UUID
     name: str
@@ -109,6 +124,32 @@ async def get_products(
     ]
 
 
+@router.put("/by-name/{name}")
+async def upsert_product(
+    name: str,
+    product: ProductUpsertPydantic,
+    response: Response,
+    service: ProductsService = Depends(get_products_service),
+    _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
+) -> ProductUpsertedPydantic:
+    try:
+        result = await service.upsert_product(
+            ProductUpsert(
+                name=name,
+                category_id=product.category_id,
+                description=product.description,
+                image_url=product.image_url,
+            )
+        )
+    except CategoryNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Category does not exist."
+        )
+    if result.created:
+        response.status_code = status.HTTP_201_CREATED
+    return ProductUpsertedPydantic(id=result.id, created=result.created)
+
+
 @router.get("/{id}")
 async def get_product(
     id: uuid.UUID,
@@ -0,0 +1,86 @@
+import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from pydantic import BaseModel
+
+from pizza_store.adapters.app.dependencies import get_current_user, get_query_log
+from pizza_store.adapters.db.query_log import QueryLog
+from pizza_store.services.auth.models import UserTokenData
+
+router = APIRouter(prefix="/db/queries")
+
+
+class SlowQueryPydantic(BaseModel):
+    args: dict[str, str]
+    rows: int | None
+    retries: int
+    duration: float
+    at: datetime.datetime
+
+
+class QueryShapeStatsPydantic(BaseModel):
+    name: str
+    query: str
+    count: int
+    slow_count: int
+    total: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+    last_slow: SlowQueryPydantic | None
+    analyze: str | None
+
+
+def _get_enabled_query_log() -> QueryLog:
+    query_log = get_query_log()
+    if query_log is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Query log is disabled.",
+        )
+    return query_log
+
+
+@router.get("")
+async def get_queries(
+    limit: int = 10,
+    query_log: QueryLog = Depends(_get_enabled_query_log),
+    _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
+) -> list[QueryShapeStatsPydantic]:
+    # Shapes of the worker which serves the request
+    return [
+        QueryShapeStatsPydantic(
+            name=s.name,
+            query=s.query,
+            count=s.count,
+            slow_count=s.slow_count,
+            total=s.total,
+            p50=s.p50,
+            p95=s.p95,
+            p99=s.p99,
+            max=s.max,
+            last_slow=(
+                SlowQueryPydantic(
+                    args=s.last_slow.args,
+                    rows=s.last_slow.rows,
+                    retries=s.last_slow.retries,
+                    duration=s.last_slow.duration,
+                    at=s.last_slow.at,
+                )
+                if s.last_slow is not None
+                else None
+            ),
+            analyze=s.analyze,
+        )
+        for s in query_log.get_top(limit)
+    ]
+
+
+@router.delete("")
+async def clear_queries(
+    query_log: QueryLog = Depends(_get_enabled_query_log),
+    _: UserTokenData = Depends(get_current_user(is_admin_required=True)),
+) -> Response:
+    query_log.clear()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -2,15 +2,23 @@ from fastapi import APIRouter
 
 from pizza_store.adapters.app.routes.auth import router as auth_router
 from pizza_store.adapters.app.routes.categories import router as categories_router
+from pizza_store.adapters.app.routes.kitchen import router as kitchen_router
+from pizza_store.adapters.app.routes.menu import router as menu_router
 from pizza_store.adapters.app.routes.orders import router as orders_router
+from pizza_store.adapters.app.routes.price_lists import router as price_lists_router
 from pizza_store.adapters.app.routes.product_variants import (
     router as product_variants_router,
 )
 from pizza_store.adapters.app.routes.products import router as products_router
+from pizza_store.adapters.app.routes.queries import router as queries_router
 
 router = APIRouter()
 router.include_router(categories_router)
 router.include_router(products_router)
 router.include_router(product_variants_router)
+router.include_router(price_lists_router)
+router.include_router(menu_router)
 router.include_router(orders_router)
+router.include_router(kitchen_router)
 router.include_router(auth_router)
+router.include_router(queries_router)
@@ -0,0 +1,176 @@
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, TypeVar, cast
+
+from fastapi import FastAPI, Request, Response
+from fastapi.routing import APIRoute
+from starlette.routing import request_response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from pizza_store.adapters.tracing.tracer import (
+    Span,
+    Tracer,
+    is_trace_skipped,
+    parse_traceparent,
+)
+
+T = TypeVar("T")
+
+
+class TracingMiddleware:
+    """Runs every HTTP request in a server span.
+
+    The span continues the trace of a W3C `traceparent` request header and is
+    named after the matched route.
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer) -> None:
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        parent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                break
+
+        with self.tracer.span(scope["method"], "SERVER", parent) as span:
+
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status("ERROR")
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                if span.is_recording:
+                    self._set_request_attributes(span, scope)
+
+    @classmethod
+    def _set_request_attributes(cls, span: Span, scope: Scope) -> None:
+        span.set_attribute("http.method", scope["method"])
+        span.set_attribute("http.target", scope["path"])
+        # Set by the router once a route matches
+        route = scope.get("route")
+        if route is not None:
+            span.name = f"{scope['method']} {route.path}"
+            span.set_attribute("http.route", route.path)
+
+
+class _RoutePhases:
+    __slots__ = ("dependencies", "endpoint_end")
+
+    def __init__(self, dependencies: Span) -> None:
+        self.dependencies = dependencies
+        self.endpoint_end: int | None = None
+
+
+_route_phases: ContextVar[_RoutePhases | None] = ContextVar(
+    "route_phases", default=None
+)
+
+
+def _trace_handler(
+    handler: Callable[[Request], Awaitable[Response]], tracer: Tracer
+) -> Callable[[Request], Awaitable[Response]]:
+    async def traced_handler(request: Request) -> Response:
+        if is_trace_skipped():
+            return await handler(request)
+        # Ended by the endpoint, which runs once dependencies are resolved
+        phases = _RoutePhases(tracer.start_span("resolve dependencies"))
+        token = _route_phases.set(phases)
+        try:
+            response = await handler(request)
+        finally:
+            _route_phases.reset(token)
+            phases.dependencies.end()
+        if phases.endpoint_end is not None:
+            tracer.start_span(
+                "serialize response", start_time=phases.endpoint_end
+            ).end()
+        return response
+
+    return traced_handler
+
+
+def _trace_endpoint(
+    endpoint: Callable[..., Awaitable[Any]], tracer: Tracer
+) -> Callable[..., Awaitable[Any]]:
+    @functools.wraps(endpoint)
+    async def traced_endpoint(*args: Any, **kwargs: Any) -> Any:
+        phases = _route_phases.get()
+        if phases is None:
+            return await endpoint(*args, **kwargs)
+        phases.dependencies.end()
+        try:
+            with tracer.span(endpoint.__name__):
+                return await endpoint(*args, **kwargs)
+        finally:
+            phases.endpoint_end = time.time_ns()
+
+    return traced_endpoint
+
+
+def instrument_routes(app: FastAPI, tracer: Tracer) -> None:
+    """Adds spans for dependencies, the endpoint and serialization of routes.
+
+    Only async endpoints are traced, sync ones run in a thread pool.
+    """
+
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        if not inspect.iscoroutinefunction(route.dependant.call):
+            continue
+        route.dependant.call = _trace_endpoint(route.dependant.call, tracer)
+        route.app = request_response(_trace_handler(route.get_route_handler(), tracer))
+
+
+class TracedService:
+    """Proxy of a service which runs calls of its async methods in spans."""
+
+    def __init__(self, service: Any, tracer: Tracer) -> None:
+        self._service = service
+        self._tracer = tracer
+        self._methods: dict[str, Callable[..., Awaitable[Any]]] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        method = self._methods.get(name)
+        if method is not None:
+            return method
+        attr = getattr(self._service, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+        method = self._methods[name] = self._trace(
+            attr, f"{type(self._service).__name__}.{name}"
+        )
+        return method
+
+    def _trace(
+        self, method: Callable[..., Awaitable[Any]], name: str
+    ) -> Callable[..., Awaitable[Any]]:
+        tracer = self._tracer
+
+        async def traced_method(*args: Any, **kwargs: Any) -> Any:
+            if is_trace_skipped():
+                return await method(*args, **kwargs)
+            with tracer.span(name):
+                return await method(*args, **kwargs)
+
+        return traced_method
+
+
+def trace_service(service: T, tracer: Tracer | None) -> T:
+    if tracer is None:
+        return service
+    # Has the service methods used by routes
+    return cast(T, TracedService(service, tracer))
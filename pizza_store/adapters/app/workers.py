@@ -0,0 +1,108 @@
+import os
+from dataclasses import dataclass
+from typing import Literal
+
+from uvicorn.workers import UvicornWorker
+
+from pizza_store.settings import Settings
+
+try:
+    import httptools  # noqa: F401
+    import uvloop  # noqa: F401
+except ImportError:
+    has_uvloop = False
+else:
+    has_uvloop = True
+
+EventLoop = Literal["auto", "uvloop", "asyncio"]
+
+
+class AsyncioWorker(UvicornWorker):
+    """Uvicorn worker on the standard asyncio loop and the h11 parser."""
+
+    CONFIG_KWARGS = {"loop": "asyncio", "http": "h11"}
+
+
+class UvloopWorker(UvicornWorker):
+    """Uvicorn worker on uvloop and the httptools parser.
+
+    Install them with `pip install uvloop httptools`.
+    """
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
+
+
+@dataclass(frozen=True)
+class WorkerProfile:
+    """Gunicorn worker settings.
+
+    Attributes:
+        workers: Number of worker processes.
+        worker_class: Import path of the worker class.
+        keepalive: Seconds an idle keep-alive connection is kept open.
+        backlog: Maximum number of pending connections.
+        max_requests: Requests after which a worker is restarted, 0 disables.
+        max_requests_jitter: Random extra requests added to `max_requests`, so
+            workers are not restarted at the same time.
+    """
+
+    workers: int
+    worker_class: str
+    keepalive: int
+    backlog: int
+    max_requests: int
+    max_requests_jitter: int
+
+
+def get_worker_count(
+    cpu_count: int, edgedb_pool_size: int, edgedb_max_connections: int
+) -> int:
+    """Returns the number of async workers.
+
+    One async worker keeps a core busy, so there is one per core instead of
+    `2 * cores + 1` used for sync workers. Every worker has its own pool of
+    `edgedb_pool_size` connections, workers are limited so the pools together
+    do not exceed `edgedb_max_connections`.
+    """
+
+    workers = min(cpu_count, edgedb_max_connections // edgedb_pool_size)
+    return max(1, workers)
+
+
+def get_worker_class(event_loop: EventLoop) -> str:
+    """Returns the import path of the worker class for `event_loop`.
+
+    "auto" picks uvloop and httptools if both are installed.
+    """
+
+    if event_loop == "uvloop" or (event_loop == "auto" and has_uvloop):
+        worker = UvloopWorker
+    else:
+        worker = AsyncioWorker
+    return f"{worker.__module__}.{worker.__qualname__}"
+
+
+def get_worker_profile(
+    settings: Settings, cpu_count: int | None = None
+) -> WorkerProfile:
+    """Returns gunicorn worker settings from `settings`.
+
+    `settings.gunicorn_workers` overrides the worker count derived from
+    `cpu_count`, the CPUs available to the process by default.
+    """
+
+    workers = settings.gunicorn_workers
+    if workers is None:
+        if cpu_count is None:
+            cpu_count = len(os.sched_getaffinity(0))
+        workers = get_worker_count(
+            cpu_count, settings.edgedb_pool_size, settings.edgedb_max_connections
+        )
+    return WorkerProfile(
+        workers=workers,
+        worker_class=get_worker_class(settings.gunicorn_event_loop),
+        keepalive=settings.gunicorn_keepalive,
+        backlog=settings.gunicorn_backlog,
+        max_requests=settings.gunicorn_max_requests,
+        max_requests_jitter=settings.gunicorn_max_requests_jitter,
+    )
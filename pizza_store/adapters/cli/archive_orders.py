@@ -0,0 +1,40 @@
+"""Moves old completed and cancelled orders to the archive.
+
+Run periodically, for example from cron:
+
+    python -m pizza_store.adapters.cli.archive_orders [--days N] [--batch-size N]
+
+Each run handles one store, `--store NAME` or the first one in settings.
+"""
+
+import argparse
+import asyncio
+import datetime
+
+from pizza_store.adapters.db.client import get_store_client
+from pizza_store.adapters.db.repos.orders import OrdersServiceRepo
+from pizza_store.services.orders.service import OrdersService
+from pizza_store.settings import settings
+
+
+async def main(days: int, batch_size: int, store: str) -> None:
+    client = get_store_client(store)
+    service = OrdersService(OrdersServiceRepo(client, store=store))
+    try:
+        archived = await service.archive_orders(
+            datetime.timedelta(days=days), batch_size
+        )
+    finally:
+        await client.aclose()
+    print(f"Archived {archived} orders of {store} older than {days} days.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=settings.orders_archive_after_days)
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.orders_archive_batch_size
+    )
+    parser.add_argument("--store", default=settings.stores[0])
+    args = parser.parse_args()
+    asyncio.run(main(args.days, args.batch_size, args.store))
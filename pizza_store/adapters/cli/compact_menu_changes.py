@@ -0,0 +1,39 @@
+"""Deletes old menu changes, clients behind them get the whole menu.
+
+Run periodically, for example from cron:
+
+    python -m pizza_store.adapters.cli.compact_menu_changes [--keep-versions N]
+
+Each run handles one store, `--store NAME` or the first one in settings.
+"""
+
+import argparse
+import asyncio
+
+from pizza_store.adapters.db.client import get_store_client
+from pizza_store.adapters.db.repos.products import ProductsServiceRepo
+from pizza_store.services.products.service import ProductsService
+from pizza_store.settings import settings
+
+
+async def main(keep_versions: int, store: str) -> None:
+    client = get_store_client(store)
+    service = ProductsService(ProductsServiceRepo(client, store=store), store=store)
+    try:
+        deleted = await service.compact_menu_changes(keep_versions)
+    finally:
+        await client.aclose()
+    print(
+        f"Deleted {deleted} menu changes of {store},"
+        f" kept the last {keep_versions} versions."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--keep-versions", type=int, default=settings.menu_changes_keep_versions
+    )
+    parser.add_argument("--store", default=settings.stores[0])
+    args = parser.parse_args()
+    asyncio.run(main(args.keep_versions, args.store))
@@ -0,0 +1,94 @@
+import base64
+import json
+import os
+from typing import Any
+
+import jwt.algorithms
+
+from pizza_store.services.auth.models import JWTKey
+
+try:
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+    from cryptography.hazmat.primitives.serialization import (
+        load_pem_private_key,
+        load_pem_public_key,
+    )
+except ImportError:
+    has_crypto = False
+else:
+    has_crypto = True
+
+
+# curve name: JWT algorithm, JWK curve, coordinate size in bytes
+EC_CURVES = {
+    "secp256r1": ("ES256", "P-256", 32),
+    "secp384r1": ("ES384", "P-384", 48),
+}
+
+
+def load_jwt_keys(directory: str) -> tuple[JWTKey, ...]:
+    """Loads access token keys from PEM files in `directory`.
+
+    `<kid>.pem` is a private key used for signing and verification,
+    `<kid>.pub.pem` is a public key of a retired private key that only verifies
+    tokens signed before rotation. Keys are parsed once here, so tokens are
+    signed and verified with ready key objects.
+
+    Supported keys are RSA (RS256), Ed25519 (EdDSA) and EC P-256/P-384
+    (ES256/ES384). Needs `cryptography` (`PyJWT[crypto]`).
+    """
+
+    if not has_crypto:
+        raise RuntimeError("Install PyJWT[crypto] to use asymmetric JWT keys.")
+
+    keys: dict[str, JWTKey] = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".pem"):
+            continue
+        with open(os.path.join(directory, filename), "rb") as f:
+            data = f.read()
+
+        if filename.endswith(".pub.pem"):
+            kid = filename[: -len(".pub.pem")]
+            if kid in keys:
+                continue
+            signing_key = None
+            verifying_key = load_pem_public_key(data)
+        else:
+            kid = filename[: -len(".pem")]
+            signing_key = load_pem_private_key(data, password=None)
+            verifying_key = signing_key.public_key()
+
+        algorithm, jwk = _describe_public_key(verifying_key)
+        keys[kid] = JWTKey(
+            kid=kid,
+            algorithm=algorithm,
+            signing_key=signing_key,
+            verifying_key=verifying_key,
+            jwk={**jwk, "kid": kid, "alg": algorithm, "use": "sig"},
+        )
+    return tuple(keys.values())
+
+
+def _describe_public_key(key: Any) -> tuple[str, dict[str, Any]]:
+    """Returns JWT algorithm for `key` and the key in JWK format."""
+
+    if isinstance(key, rsa.RSAPublicKey):
+        return "RS256", json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(key))
+    if isinstance(key, ed25519.Ed25519PublicKey):
+        return "EdDSA", json.loads(jwt.algorithms.OKPAlgorithm.to_jwk(key))
+    if isinstance(key, ec.EllipticCurvePublicKey) and key.curve.name in EC_CURVES:
+        # PyJWT 2.3 can not export EC keys to JWK
+        algorithm, crv, size = EC_CURVES[key.curve.name]
+        numbers = key.public_numbers()
+        return algorithm, {
+            "kty": "EC",
+            "crv": crv,
+            "x": _base64url(numbers.x.to_bytes(size, "big")),
+            "y": _base64url(numbers.y.to_bytes(size, "big")),
+        }
+    raise ValueError(f"Unsupported JWT key type: {type(key).__name__}")
+
+
+def _base64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
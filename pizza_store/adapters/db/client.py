@@ -1,9 +1,87 @@
+from functools import lru_cache
+from typing import cast
+
 import edgedb
 
-client = edgedb.asyncio_client.create_async_client(
-    user="edgedb",
-    host="localhost",
-    port=5656,
-    database="edgedb",
-    tls_security="insecure",
-)
+from pizza_store.adapters.db.query_log import InstrumentedClient, QueryLog
+from pizza_store.adapters.db.replicas import ReplicaRouter
+from pizza_store.adapters.tracing.tracer import get_tracer
+from pizza_store.settings import settings
+
+
+@lru_cache
+def get_query_log() -> QueryLog | None:
+    if not settings.db_query_log_enabled:
+        return None
+    return QueryLog(
+        slow_threshold=settings.db_slow_query_threshold,
+        analyze_sample_rate=settings.db_query_analyze_sample_rate,
+    )
+
+
+@lru_cache
+def get_client() -> edgedb.AsyncIOClient:
+    """Returns the EdgeDB client, it is created on first use.
+
+    The client is not created on import, so an app preloaded in the gunicorn
+    master does not share one client between forked workers.
+    """
+
+    client = edgedb.asyncio_client.create_async_client(
+        user="edgedb",
+        host="localhost",
+        port=5656,
+        database="edgedb",
+        tls_security="insecure",
+        max_concurrency=settings.edgedb_pool_size,
+    )
+    return _instrument(client)
+
+
+@lru_cache
+def get_replica_router() -> ReplicaRouter | None:
+    """Returns the router of reads to the replica, None if it is not set."""
+
+    if settings.edgedb_replica_dsn is None:
+        return None
+    replica = edgedb.asyncio_client.create_async_client(
+        dsn=settings.edgedb_replica_dsn,
+        max_concurrency=settings.edgedb_pool_size,
+    )
+    return ReplicaRouter(
+        get_client(),
+        _instrument(replica),
+        max_lag=settings.edgedb_replica_max_lag,
+        heartbeat_interval=settings.edgedb_replica_heartbeat_interval,
+    )
+
+
+@lru_cache
+def get_store_client(store: str) -> edgedb.AsyncIOClient:
+    """Returns the client of the store database, the main one if it is not set."""
+
+    dsn = settings.store_edgedb_dsns.get(store)
+    if dsn is None:
+        return get_client()
+    client = edgedb.asyncio_client.create_async_client(
+        dsn=dsn,
+        max_concurrency=settings.edgedb_pool_size,
+    )
+    return _instrument(client)
+
+
+def get_store_replica_router(store: str) -> ReplicaRouter | None:
+    """Returns the replica router, None for stores in their own database."""
+
+    if store in settings.store_edgedb_dsns:
+        return None
+    return get_replica_router()
+
+
+def _instrument(client: edgedb.AsyncIOClient) -> edgedb.AsyncIOClient:
+    query_log = get_query_log()
+    tracer = get_tracer()
+    if query_log is None and tracer is None:
+        return client
+    # Has the client methods used by repos
+    return cast(edgedb.AsyncIOClient, InstrumentedClient(client, query_log, tracer))
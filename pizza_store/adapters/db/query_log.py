@@ -0,0 +1,409 @@
+import asyncio
+import datetime
+import decimal
+import logging
+import random
+import re
+import sys
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+import edgedb
+
+from pizza_store.adapters.tracing.tracer import Tracer, is_trace_skipped
+
+logger = logging.getLogger(__name__)
+
+_WRITE_STATEMENT = re.compile(r"\b(insert|update|delete)\b", re.IGNORECASE)
+_SHOWN_TYPES = (
+    bool,
+    int,
+    float,
+    decimal.Decimal,
+    uuid.UUID,
+    datetime.datetime,
+    datetime.date,
+)
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    """A query which took longer than the slow query threshold.
+
+    Attributes:
+        name: Qualified name of the repo method which ran the query.
+        query: Query text with whitespace collapsed.
+        args: Query arguments, see `redact_args`.
+        rows: Number of returned rows, None for JSON results and `execute`.
+        retries: Transaction attempt the query ran in, 0 outside of transactions.
+        duration: Seconds.
+        at: When the query finished.
+    """
+
+    name: str
+    query: str
+    args: dict[str, str]
+    rows: int | None
+    retries: int
+    duration: float
+    at: datetime.datetime
+
+
+@dataclass(frozen=True)
+class QueryShapeStats:
+    """Durations of one query run from one repo method.
+
+    Percentiles are over the last `QueryLog.samples_per_shape` runs.
+
+    Attributes:
+        name: Qualified name of the repo method which ran the query.
+        query: Query text with whitespace collapsed.
+        count: Number of runs.
+        slow_count: Number of runs over the slow query threshold.
+        total: Seconds spent in all runs.
+        p50: Seconds.
+        p95: Seconds.
+        p99: Seconds.
+        max: Seconds.
+        last_slow: Latest slow run.
+        analyze: Output of `analyze` of a sampled slow run.
+    """
+
+    name: str
+    query: str
+    count: int
+    slow_count: int
+    total: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+    last_slow: SlowQuery | None
+    analyze: str | None
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+
+def redact_args(args: tuple[Any, ...], kwargs: dict[str, Any]) -> dict[str, str]:
+    """Returns query arguments safe to log.
+
+    Numbers, booleans, UUIDs and dates are kept, strings, bytes and
+    collections may hold passwords or personal data and are replaced by
+    their type and length.
+    """
+
+    redacted = {}
+    for name, value in [*enumerate(args), *kwargs.items()]:
+        if value is None or isinstance(value, _SHOWN_TYPES):
+            redacted[str(name)] = str(value)
+        elif isinstance(value, (str, bytes, list, tuple, dict)):
+            redacted[str(name)] = f"<{type(value).__name__} len={len(value)}>"
+        else:
+            redacted[str(name)] = f"<{type(value).__name__}>"
+    return redacted
+
+
+def _percentile(durations: list[float], q: float) -> float:
+    return durations[min(len(durations) - 1, int(len(durations) * q))]
+
+
+class _QueryShape:
+    def __init__(self, samples: int) -> None:
+        self.count = 0
+        self.slow_count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.durations: deque[float] = deque(maxlen=samples)
+        self.last_slow: SlowQuery | None = None
+        self.analyze: str | None = None
+
+
+class QueryLog:
+    """Per-worker statistics of query shapes and log of slow queries.
+
+    A shape is a query text run from one repo method. Slow queries are logged
+    with redacted arguments, `analyze_sample_rate` of slow read-only queries
+    are analyzed in background and the output is kept with their shape.
+    """
+
+    def __init__(
+        self,
+        slow_threshold: float = 0.1,
+        analyze_sample_rate: float = 0.0,
+        samples_per_shape: int = 1000,
+        max_shapes: int = 1000,
+    ) -> None:
+        self.slow_threshold = slow_threshold
+        self.analyze_sample_rate = analyze_sample_rate
+        self.samples_per_shape = samples_per_shape
+        self.max_shapes = max_shapes
+        self._shapes: dict[tuple[str, str], _QueryShape] = {}
+
+    def record(
+        self,
+        name: str,
+        query: str,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        rows: int | None,
+        retries: int,
+        duration: float,
+    ) -> bool:
+        """Records a query run.
+
+        Returns whether the query should be analyzed.
+        """
+
+        key = (name, normalize_query(query))
+        shape = self._shapes.get(key)
+        if shape is None:
+            if len(self._shapes) >= self.max_shapes:
+                return False
+            shape = self._shapes[key] = _QueryShape(self.samples_per_shape)
+        shape.count += 1
+        shape.total += duration
+        shape.max = max(shape.max, duration)
+        shape.durations.append(duration)
+        if duration < self.slow_threshold:
+            return False
+
+        shape.slow_count += 1
+        shape.last_slow = SlowQuery(
+            name=name,
+            query=key[1],
+            args=redact_args(args, kwargs),
+            rows=rows,
+            retries=retries,
+            duration=duration,
+            at=datetime.datetime.now(datetime.timezone.utc),
+        )
+        logger.warning(
+            "Slow query %s took %.1f ms, rows %s, retries %s, args %s: %s",
+            name,
+            duration * 1000,
+            rows,
+            retries,
+            shape.last_slow.args,
+            key[1],
+        )
+        return (
+            random.random() < self.analyze_sample_rate
+            and _WRITE_STATEMENT.search(query) is None
+        )
+
+    def set_analyze(self, name: str, query: str, analyze: str) -> None:
+        shape = self._shapes.get((name, normalize_query(query)))
+        if shape is not None:
+            shape.analyze = analyze
+
+    def get_top(self, limit: int = 10) -> list[QueryShapeStats]:
+        """Returns `limit` shapes with the slowest p99."""
+
+        stats = []
+        for (name, query), shape in self._shapes.items():
+            durations = sorted(shape.durations)
+            stats.append(
+                QueryShapeStats(
+                    name=name,
+                    query=query,
+                    count=shape.count,
+                    slow_count=shape.slow_count,
+                    total=shape.total,
+                    p50=_percentile(durations, 0.5),
+                    p95=_percentile(durations, 0.95),
+                    p99=_percentile(durations, 0.99),
+                    max=shape.max,
+                    last_slow=shape.last_slow,
+                    analyze=shape.analyze,
+                )
+            )
+        stats.sort(key=lambda s: s.p99, reverse=True)
+        return stats[:limit]
+
+    def clear(self) -> None:
+        self._shapes.clear()
+
+
+def _caller_name() -> str:
+    # 0 is this function, 1 is `_Instrumented._run`, 2 is the query method
+    frame = sys._getframe(3)
+    # `co_qualname` is 3.11+, repo methods are named by the class of `self`
+    name = frame.f_code.co_name
+    instance = frame.f_locals.get("self")
+    if instance is None:
+        return name
+    return f"{type(instance).__qualname__}.{name}"
+
+
+def _count_rows(result: Any) -> int | None:
+    if isinstance(result, (list, edgedb.Set)):
+        return len(result)
+    return 0 if result is None else 1
+
+
+class _Instrumented:
+    def __init__(
+        self,
+        executor: Any,
+        client: edgedb.AsyncIOClient,
+        log: QueryLog | None,
+        tracer: Tracer | None,
+        retries: int,
+    ) -> None:
+        self._executor = executor
+        self._client = client
+        self._log = log
+        self._tracer = tracer
+        self._retries = retries
+
+    async def query(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return await self._run(self._executor.query, query, args, kwargs)
+
+    async def query_single(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return await self._run(self._executor.query_single, query, args, kwargs)
+
+    async def query_required_single(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return await self._run(
+            self._executor.query_required_single, query, args, kwargs
+        )
+
+    async def query_json(self, query: str, *args: Any, **kwargs: Any) -> str:
+        return await self._run(
+            self._executor.query_json, query, args, kwargs, rows=False
+        )
+
+    async def query_single_json(self, query: str, *args: Any, **kwargs: Any) -> str:
+        return await self._run(
+            self._executor.query_single_json, query, args, kwargs, rows=False
+        )
+
+    async def execute(self, query: str, *args: Any, **kwargs: Any) -> None:
+        await self._run(self._executor.execute, query, args, kwargs, rows=False)
+
+    async def _run(
+        self,
+        method: Callable[..., Awaitable[Any]],
+        query: str,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        rows: bool = True,
+    ) -> Any:
+        span = None
+        if self._tracer is not None and not is_trace_skipped():
+            span = self._tracer.start_span(f"edgedb {method.__name__}", "CLIENT")
+        if span is None and self._log is None:
+            return await method(query, *args, **kwargs)
+
+        name = _caller_name()
+        if span is not None and span.is_recording:
+            span.set_attribute("db.system", "edgedb")
+            span.set_attribute("db.statement", normalize_query(query))
+            span.set_attribute("code.function", name)
+            if self._retries:
+                span.set_attribute("db.transaction.attempt", self._retries)
+        start = time.perf_counter()
+        try:
+            result = await method(query, *args, **kwargs)
+        except BaseException as e:
+            if span is not None:
+                span.set_error(e)
+            raise
+        finally:
+            if span is not None:
+                span.end()
+        duration = time.perf_counter() - start
+        if self._log is not None and self._log.record(
+            name,
+            query,
+            args,
+            kwargs,
+            _count_rows(result) if rows else None,
+            self._retries,
+            duration,
+        ):
+            _start_analyze(self._client, self._log, name, query, args, kwargs)
+        return result
+
+
+_analyze_tasks: set[asyncio.Task[None]] = set()
+
+
+def _start_analyze(
+    client: edgedb.AsyncIOClient,
+    log: QueryLog,
+    name: str,
+    query: str,
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+) -> None:
+    async def analyze() -> None:
+        try:
+            result = await client.query_single(f"analyze {query}", *args, **kwargs)
+        except edgedb.EdgeDBError as e:
+            # EdgeDB supports `analyze` since 3.0
+            result = f"analyze failed: {e}"
+        log.set_analyze(name, query, str(result))
+
+    task = asyncio.create_task(analyze())
+    _analyze_tasks.add(task)
+    task.add_done_callback(_analyze_tasks.discard)
+
+
+class InstrumentedTransaction(_Instrumented):
+    async def __aenter__(self) -> "InstrumentedTransaction":
+        await self._executor.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> bool | None:
+        return await self._executor.__aexit__(*exc_info)
+
+
+class _InstrumentedRetry:
+    def __init__(
+        self,
+        client: edgedb.AsyncIOClient,
+        log: QueryLog | None,
+        tracer: Tracer | None,
+    ) -> None:
+        self._client = client
+        self._log = log
+        self._tracer = tracer
+        self._retry = client.transaction()
+        self._attempt = -1
+
+    def __aiter__(self) -> "_InstrumentedRetry":
+        return self
+
+    async def __anext__(self) -> InstrumentedTransaction:
+        tx = await self._retry.__anext__()
+        self._attempt += 1
+        return InstrumentedTransaction(
+            tx, self._client, self._log, self._tracer, self._attempt
+        )
+
+
+class InstrumentedClient(_Instrumented):
+    """`AsyncIOClient` which records queries in a `QueryLog` and traces them.
+
+    Queries run in transactions count transaction attempts as retries, retries
+    of single queries happen inside the client and are not seen.
+    """
+
+    def __init__(
+        self,
+        client: edgedb.AsyncIOClient,
+        log: QueryLog | None,
+        tracer: Tracer | None = None,
+    ) -> None:
+        super().__init__(client, client, log, tracer, 0)
+
+    def transaction(self) -> _InstrumentedRetry:
+        return _InstrumentedRetry(self._client, self._log, self._tracer)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
@@ -0,0 +1,129 @@
+import asyncio
+import datetime
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+import edgedb
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_NAME = "primary"
+
+_primary_reads: ContextVar[bool] = ContextVar("primary_reads", default=False)
+
+
+@contextmanager
+def primary_reads() -> Iterator[None]:
+    """Sends reads in the block to the primary, so they see earlier writes."""
+
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+class ReplicaRouter:
+    """Chooses the client for reads which tolerate a lagging replica.
+
+    Replica lag is measured every `heartbeat_interval` seconds by writing the
+    current time to the primary and reading it back from the replica. Reads
+    go to the replica while the lag is at most `max_lag` seconds and to the
+    primary if it is larger, unknown or within `primary_reads`.
+    """
+
+    def __init__(
+        self,
+        primary: edgedb.AsyncIOClient,
+        replica: edgedb.AsyncIOClient,
+        max_lag: float = 2.0,
+        heartbeat_interval: float = 1.0,
+    ) -> None:
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag
+        self.heartbeat_interval = heartbeat_interval
+        self.lag: float | None = None
+        self._lag_expires_at = 0.0
+        self._task: asyncio.Task[None] | None = None
+        self._stopping = asyncio.Event()
+
+    def reader(self) -> edgedb.AsyncIOClient:
+        if _primary_reads.get() or not self.is_replica_fresh():
+            return self.primary
+        return self.replica
+
+    def is_replica_fresh(self) -> bool:
+        # A lag measured long ago is unknown, the heartbeat may be failing
+        return (
+            self.lag is not None
+            and self.lag <= self.max_lag
+            and time.monotonic() < self._lag_expires_at
+        )
+
+    async def check_lag(self) -> float:
+        """Measures and returns replica lag in seconds."""
+
+        write_query = """
+        insert replication::Heartbeat {
+            name := <str>$name,
+            at := <datetime>$at
+        }
+        unless conflict on .name
+        else (
+            update replication::Heartbeat
+            set { at := <datetime>$at }
+        )
+        """
+        read_query = """
+        select replication::Heartbeat { at }
+        filter .name = <str>$name
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        await self.primary.query(write_query, name=HEARTBEAT_NAME, at=now)
+        heartbeat = await self.replica.query_single(read_query, name=HEARTBEAT_NAME)
+        if heartbeat is None:
+            # Replica has not seen any heartbeat yet
+            lag = float("inf")
+        else:
+            lag = (
+                datetime.datetime.now(datetime.timezone.utc) - heartbeat.at
+            ).total_seconds()
+        self.lag = lag
+        self._lag_expires_at = time.monotonic() + 3 * self.heartbeat_interval
+        return lag
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops measuring lag after the running check completes."""
+
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            was_fresh = self.is_replica_fresh()
+            try:
+                await self.check_lag()
+            except Exception:
+                # Lag expires and reads go to the primary until a check succeeds
+                logger.exception("Failed to check replica lag")
+            if was_fresh and not self.is_replica_fresh():
+                logger.warning(
+                    "Replica lag %s s exceeds %s s, reading from primary",
+                    self.lag,
+                    self.max_lag,
+                )
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.heartbeat_interval)
+            except asyncio.TimeoutError:
+                pass
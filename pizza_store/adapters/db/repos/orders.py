@@ -1,30 +1,61 @@
 import dataclasses
+import datetime
 import json
 import uuid
-from typing import cast
+from decimal import Decimal
+from typing import Any, cast, get_args
 
 import edgedb
 
-from pizza_store.entities.orders import Order, OrderItem, OrderStatus
+from pizza_store.adapters.db.replicas import ReplicaRouter
+from pizza_store.entities.orders import (
+    Order,
+    OrderItem,
+    OrderStatus,
+    OrderStatusSummary,
+)
 from pizza_store.entities.products import (
     Category,
     ProductVariantWithProduct,
     ProductWithoutVariants,
 )
-from pizza_store.services.orders.exceptions import OrderNotFoundError
+from pizza_store.services.orders.exceptions import (
+    InvalidOrderTransitionError,
+    OrderNotFoundError,
+    OrderVersionConflictError,
+)
 from pizza_store.services.orders.models import (
+    JournaledOrder,
     OrderCreate,
     OrderCreated,
+    OrdersFilter,
     OrderUpdate,
     OrderUpdated,
+    RejectedOrder,
 )
 from pizza_store.services.products.exceptions import ProductVariantNotFoundError
 from pizza_store.utils import UUIDEncoder
 
 
 class OrdersServiceRepo:
-    def __init__(self, client: edgedb.asyncio_client.AsyncIOClient) -> None:
+    def __init__(
+        self,
+        client: edgedb.asyncio_client.AsyncIOClient,
+        replicas: ReplicaRouter | None = None,
+        store: str = "default",
+    ) -> None:
         self._client = client
+        self._replicas = replicas
+        # Every query is filtered by the store, listings of a store use the
+        # indexes on it and don't scan orders of other stores
+        self._store = store
+
+    def _reader(self) -> edgedb.asyncio_client.AsyncIOClient:
+        # Client for reads which tolerate replica lag, writes and
+        # transactions use `_client`
+        if self._replicas is None:
+            return self._client
+        return self._replicas.reader()
 
     async def create_order(self, order: OrderCreate) -> OrderCreated:
         client = self._client
@@ -33,7 +64,9 @@ class OrdersServiceRepo:
         insert orders::CustomerOrder {
             phone := <str>$phone,
             note := <str>$note,
-            address := <str>$address
+            address := <str>$address,
+            delivery_zone := <optional str>$delivery_zone,
+            store := <str>$store
         };
         """
         create_order_items_query = """
@@ -48,6 +81,7 @@ class OrdersServiceRepo:
                 product_variant := (
                     select products::ProductVariant
                     filter .id = item.product_variant_id
+                        and .product.store = <str>$store
                 ),
                 amount := item.amount,
                 customer_order := (
@@ -67,6 +101,8 @@ class OrdersServiceRepo:
                     phone=order.phone,
                     note=order.note,
                     address=order.address,
+                    delivery_zone=order.delivery_zone,
+                    store=self._store,
                 )
                 order_id = order_result.id
                 try:
@@ -74,6 +110,7 @@ class OrdersServiceRepo:
                         create_order_items_query,
                         order_id=order_id,
                         items=json.dumps(items, cls=UUIDEncoder),
+                        store=self._store,
                     )
                 except edgedb.errors.MissingRequiredError as e:
                     if (
@@ -85,7 +122,105 @@ class OrdersServiceRepo:
                 return OrderCreated(id=order_id)
         assert False, "Unreachable"
 
-    async def get_orders(self, status: OrderStatus | None = None) -> list[Order]:
+    async def create_journaled_orders(
+        self, orders: list[JournaledOrder]
+    ) -> list[OrderCreated]:
+        """Creates orders from the intake journal in one transaction.
+
+        Orders whose intake id is already stored are skipped, so a batch can be
+        safely replayed.
+        """
+
+        stored_intake_ids_query = """
+        select orders::CustomerOrder.intake_id
+        filter orders::CustomerOrder.intake_id in array_unpack(<array<uuid>>$ids);
+        """
+        create_orders_query = """
+        with orders := <array<tuple<
+            intake_id: uuid,
+            created_at: datetime,
+            phone: str,
+            note: str,
+            address: str,
+            # Empty if zones were not checked
+            delivery_zone: str,
+            items: array<tuple<product_variant_id: uuid, amount: int16>>
+        >>><json>$orders
+
+        for o in array_unpack(orders)
+        union (
+            with
+                customer_order := (
+                    insert orders::CustomerOrder {
+                        intake_id := o.intake_id,
+                        created_at := o.created_at,
+                        phone := o.phone,
+                        note := o.note,
+                        address := o.address,
+                        delivery_zone := (
+                            o.delivery_zone if o.delivery_zone != "" else <str>{}
+                        ),
+                        store := <str>$store
+                    }
+                ),
+                order_items := (
+                    for item in array_unpack(o.items)
+                    union (
+                        insert orders::OrderItem {
+                            product_variant := (
+                                select products::ProductVariant
+                                filter .id = item.product_variant_id
+                                    and .product.store = <str>$store
+                            ),
+                            amount := item.amount,
+                            customer_order := customer_order
+                        }
+                    )
+                )
+            select customer_order {
+                id,
+                items_count := count(order_items)
+            }
+        );
+        """
+
+        async for tx in self._client.transaction():
+            async with tx:
+                stored = set(
+                    await tx.query(stored_intake_ids_query, ids=[o.id for o in orders])
+                )
+                new_orders = [
+                    {
+                        "intake_id": o.id,
+                        "created_at": o.accepted_at.isoformat(),
+                        "phone": o.order.phone,
+                        "note": o.order.note,
+                        "address": o.order.address,
+                        "delivery_zone": o.order.delivery_zone or "",
+                        "items": [dataclasses.asdict(item) for item in o.order.items],
+                    }
+                    for o in orders
+                    if o.id not in stored
+                ]
+                if not new_orders:
+                    return []
+                try:
+                    result = await tx.query(
+                        create_orders_query,
+                        orders=json.dumps(new_orders, cls=UUIDEncoder),
+                        store=self._store,
+                    )
+                except edgedb.errors.MissingRequiredError as e:
+                    if (
+                        "missing value for required link 'product_variant'"
+                        in e.get_server_context()
+                    ):
+                        raise ProductVariantNotFoundError
+                    raise
+                return [OrderCreated(id=o.id) for o in result]
+        assert False, "Unreachable"
+
+    async def get_orders(self, filter: OrdersFilter | None = None) -> list[Order]:
         query = """
         select orders::CustomerOrder {
             id,
@@ -94,6 +229,8 @@ class OrdersServiceRepo:
             note,
             address,
             created_at,
+            delivery_zone,
+            version,
             items: {
                 id,
                 product_variant: {
@@ -117,12 +254,9 @@ class OrdersServiceRepo:
             }
         }
         """
-        if status is not None:
-            query = f"{query} filter .status = <orders::OrderStatus>$status;"
-            result = await self._client.query(query, status=status)
-        else:
-            query += ";"
-            result = await self._client.query(query)
+        conditions, params = self._build_orders_filter(filter or OrdersFilter())
+        query = f"{query} filter {' and '.join(conditions)};"
+        result = await self._reader().query(query, **params)
 
         return [
             Order(
@@ -132,6 +266,8 @@ class OrdersServiceRepo:
                 note=o.note,
                 address=o.address,
                 created_at=o.created_at,
+                delivery_zone=o.delivery_zone,
+                version=o.version,
                 items=[
                     OrderItem(
                         id=oi.id,
@@ -160,7 +296,45 @@ class OrdersServiceRepo:
             for o in result
         ]
 
+    def _build_orders_filter(
+        self, filter: OrdersFilter
+    ) -> tuple[list[str], dict[str, Any]]:
+        """Returns EdgeQL filter conditions and their query arguments.
+
+        Every condition compares an indexed property of `orders::CustomerOrder`.
+        The store is always compared, it is the first property of the indexes.
+        """
+
+        conditions = [".store = <str>$store"]
+        params: dict[str, Any] = {"store": self._store}
+        if filter.statuses is not None:
+            conditions.append(
+                ".status in <orders::OrderStatus>array_unpack(<array<str>>$statuses)"
+            )
+            params["statuses"] = filter.statuses
+        if filter.created_from is not None:
+            conditions.append(".created_at >= <datetime>$created_from")
+            params["created_from"] = filter.created_from
+        if filter.created_to is not None:
+            conditions.append(".created_at < <datetime>$created_to")
+            params["created_to"] = filter.created_to
+        if filter.phone is not None:
+            conditions.append(".phone = <str>$phone")
+            params["phone"] = filter.phone
+        if filter.delivery_zone is not None:
+            conditions.append(".delivery_zone = <str>$delivery_zone")
+            params["delivery_zone"] = filter.delivery_zone
+        return conditions, params
+
     async def get_order(self, id: uuid.UUID) -> Order:
+        return await self._get_order(".id = <uuid>$id", id)
+
+    async def get_order_by_intake_id(self, intake_id: uuid.UUID) -> Order:
+        """Returns an order stored from the intake journal by its intake id."""
+
+        return await self._get_order(".intake_id = <uuid>$id", intake_id)
+
+    async def _get_order(self, condition: str, id: uuid.UUID) -> Order:
         query = """
         select orders::CustomerOrder {
             id,
@@ -169,6 +343,8 @@ class OrdersServiceRepo:
             note,
             address,
             created_at,
+            delivery_zone,
+            version,
             items: {
                 id,
                 product_variant: {
@@ -190,9 +366,10 @@ class OrdersServiceRepo:
                 },
                 amount
             },
-        } filter .id = <uuid>$id;
+        }
         """
-        o = await self._client.query_single(query, id=id)
+        query = f"{query} filter {condition} and .store = <str>$store;"
+        o = await self._reader().query_single(query, id=id, store=self._store)
         if o is None:
             raise OrderNotFoundError
 
@@ -203,6 +380,8 @@ class OrdersServiceRepo:
             note=o.note,
             address=o.address,
             created_at=o.created_at,
+            delivery_zone=o.delivery_zone,
+            version=o.version,
             items=[
                 OrderItem(
                     id=oi.id,
@@ -229,20 +408,332 @@ class OrdersServiceRepo:
             ],
         )
 
+    async def get_orders_summary(self) -> list[OrderStatusSummary]:
+        # Server 1.2 has no `group`, so aggregate per status in one `for` query
+        query = """
+        with module orders
+        for status in array_unpack(<array<str>>$statuses)
+        union (
+            with status_orders := (
+                select CustomerOrder
+                filter .store = <str>$store and .status = <OrderStatus>status
+            )
+            select {
+                status := status,
+                count := count(status_orders),
+                total_price := sum((
+                    for item in status_orders.items
+                    union item.amount * item.product_variant.price
+                ))
+            }
+        );
+        """
+        result = await self._reader().query(
+            query, statuses=list(get_args(OrderStatus)), store=self._store
+        )
+        return [
+            OrderStatusSummary(
+                status=cast(OrderStatus, s.status),
+                count=s.count,
+                total_price=s.total_price,
+            )
+            for s in result
+        ]
+
+    async def archive_orders(
+        self, created_before: datetime.datetime, batch_size: int
+    ) -> int:
+        """Moves one batch of old completed or cancelled orders to the archive.
+
+        Returns:
+            Number of archived orders, 0 when there is nothing left to archive.
+        """
+
+        select_orders_query = """
+        select orders::CustomerOrder {
+            id,
+            intake_id,
+            phone,
+            status,
+            note,
+            address,
+            created_at,
+            delivery_zone,
+            version,
+            items: {
+                id,
+                product_variant: {
+                    id,
+                    name,
+                    weight,
+                    weight_units,
+                    price,
+                    product: {
+                        id,
+                        name,
+                        category: {
+                            id,
+                            name
+                        },
+                        description,
+                        image_url
+                    }
+                },
+                amount
+            }
+        }
+        filter .store = <str>$store and .status in {
+            orders::OrderStatus.COMPLETED,
+            orders::OrderStatus.CANCELLED
+        } and .created_at < <datetime>$created_before
+        order by .created_at
+        limit <int64>$batch_size;
+        """
+        archive_orders_query = """
+        with orders := <array<tuple<
+            order_id: uuid,
+            # Empty if the order was not journaled
+            intake_id: str,
+            phone: str,
+            address: str,
+            status: str,
+            note: str,
+            created_at: datetime,
+            delivery_zone: str,
+            version: int64,
+            items: json
+        >>><json>$orders
+        for o in array_unpack(orders)
+        union (
+            insert orders::ArchivedOrder {
+                order_id := o.order_id,
+                intake_id := (
+                    <uuid>o.intake_id if o.intake_id != "" else <uuid>{}
+                ),
+                phone := o.phone,
+                address := o.address,
+                status := <orders::OrderStatus>o.status,
+                note := o.note,
+                created_at := o.created_at,
+                delivery_zone := (
+                    o.delivery_zone if o.delivery_zone != "" else <str>{}
+                ),
+                version := o.version,
+                items := o.items,
+                store := <str>$store
+            }
+        );
+        """
+        delete_orders_query = """
+        delete orders::CustomerOrder
+        filter .id in array_unpack(<array<uuid>>$ids);
+        """
+
+        async for tx in self._client.transaction():
+            async with tx:
+                result = await tx.query(
+                    select_orders_query,
+                    created_before=created_before,
+                    batch_size=batch_size,
+                    store=self._store,
+                )
+                if not result:
+                    return 0
+                orders = [
+                    {
+                        "order_id": o.id,
+                        "intake_id": str(o.intake_id or ""),
+                        "phone": o.phone,
+                        "address": o.address,
+                        "status": str(o.status),
+                        "note": o.note,
+                        "created_at": o.created_at.isoformat(),
+                        "delivery_zone": o.delivery_zone or "",
+                        "version": o.version,
+                        "items": [self._archived_order_item_data(oi) for oi in o.items],
+                    }
+                    for o in result
+                ]
+                await tx.query(
+                    archive_orders_query,
+                    orders=json.dumps(orders, cls=UUIDEncoder),
+                    store=self._store,
+                )
+                await tx.query(delete_orders_query, ids=[o.id for o in result])
+                return len(result)
+        assert False, "Unreachable"
+
+    async def get_archived_order(self, id: uuid.UUID) -> Order:
+        """Returns an archived order by its id or intake id."""
+
+        query = """
+        select orders::ArchivedOrder {
+            order_id,
+            phone,
+            status,
+            note,
+            address,
+            created_at,
+            delivery_zone,
+            version,
+            items
+        }
+        filter (.order_id = <uuid>$id or .intake_id = <uuid>$id)
+            and .store = <str>$store;
+        """
+        o = await self._reader().query_single(query, id=id, store=self._store)
+        if o is None:
+            raise OrderNotFoundError
+
+        return Order(
+            id=o.order_id,
+            phone=o.phone,
+            status=cast(OrderStatus, str(o.status)),
+            note=o.note,
+            address=o.address,
+            created_at=o.created_at,
+            delivery_zone=o.delivery_zone,
+            items=[self._archived_order_item(oi) for oi in json.loads(o.items)],
+            version=o.version,
+        )
+
+    async def reject_journaled_orders(
+        self, orders: list[JournaledOrder], reason: str
+    ) -> None:
+        query = """
+        with orders := <array<tuple<
+            intake_id: uuid,
+            accepted_at: datetime,
+            data: json
+        >>><json>$orders
+        for o in array_unpack(orders)
+        union (
+            insert orders::RejectedOrder {
+                intake_id := o.intake_id,
+                accepted_at := o.accepted_at,
+                reason := <str>$reason,
+                data := o.data,
+                store := <str>$store
+            }
+            unless conflict on .intake_id
+        );
+        """
+        rejected_orders = [
+            {
+                "intake_id": o.id,
+                "accepted_at": o.accepted_at.isoformat(),
+                "data": dataclasses.asdict(o.order),
+            }
+            for o in orders
+        ]
+        await self._client.query(
+            query,
+            orders=json.dumps(rejected_orders, cls=UUIDEncoder),
+            reason=reason,
+            store=self._store,
+        )
+
+    async def get_rejected_order(self, intake_id: uuid.UUID) -> RejectedOrder:
+        query = """
+        select orders::RejectedOrder {
+            intake_id,
+            reason,
+            rejected_at
+        }
+        filter .intake_id = <uuid>$id and .store = <str>$store;
+        """
+        o = await self._reader().query_single(query, id=intake_id, store=self._store)
+        if o is None:
+            raise OrderNotFoundError
+        return RejectedOrder(id=o.intake_id, reason=o.reason, rejected_at=o.rejected_at)
+
+    @classmethod
+    def _archived_order_item_data(cls, item: Any) -> dict[str, Any]:
+        """Returns JSON snapshot of order item for `ArchivedOrder.items`."""
+
+        product_variant = item.product_variant
+        product = product_variant.product
+        return {
+            "id": item.id,
+            "amount": item.amount,
+            "product_variant": {
+                "id": product_variant.id,
+                "name": product_variant.name,
+                "weight": str(product_variant.weight),
+                "weight_units": product_variant.weight_units,
+                "price": str(product_variant.price),
+                "product": {
+                    "id": product.id,
+                    "name": product.name,
+                    "category": {
+                        "id": product.category.id,
+                        "name": product.category.name,
+                    },
+                    "description": product.description,
+                    "image_url": product.image_url,
+                },
+            },
+        }
+
+    @classmethod
+    def _archived_order_item(cls, item: dict[str, Any]) -> OrderItem:
+        product_variant = item["product_variant"]
+        product = product_variant["product"]
+        return OrderItem(
+            id=uuid.UUID(item["id"]),
+            product_variant=ProductVariantWithProduct(
+                id=uuid.UUID(product_variant["id"]),
+                name=product_variant["name"],
+                weight=Decimal(product_variant["weight"]),
+                weight_units=product_variant["weight_units"],
+                price=Decimal(product_variant["price"]),
+                product=ProductWithoutVariants(
+                    id=uuid.UUID(product["id"]),
+                    name=product["name"],
+                    category=Category(
+                        id=uuid.UUID(product["category"]["id"]),
+                        name=product["category"]["name"],
+                    ),
+                    description=product["description"],
+                    image_url=product["image_url"],
+                ),
+            ),
+            amount=item["amount"],
+        )
+
     async def update_order(self, order: OrderUpdate) -> OrderUpdated:
+        """Replaces order data and items if the order matches the update.
+
+        The order is changed by one conditional `update`, which only matches
+        the expected version and statuses and increments the version. Order
+        is read only if nothing matched, to tell why.
+        """
+
         delete_old_order_items_query = """
         delete orders::OrderItem
-        filter .customer_order.id = <uuid>$order_id;
+        filter .customer_order.id = <uuid>$order_id
+            and .customer_order.store = <str>$store;
         """
         update_order_query = """
-        update orders::CustomerOrder
-        filter .id = <uuid>$id
-        set {
-            phone := <str>$phone,
-            status := <orders::OrderStatus>$status,
-            note := <str>$note,
-            address := <str>$address
-        };
+        select (
+            update orders::CustomerOrder
+            filter {conditions}
+            set {{
+                phone := <str>$phone,
+                status := <orders::OrderStatus>$status,
+                note := <str>$note,
+                address := <str>$address,
+                # Kept if zones were not checked
+                delivery_zone := <optional str>$delivery_zone ?? .delivery_zone,
+                version := .version + 1
+            }}
+        ) {{ version }};
+        """
+        current_order_query = """
+        select orders::CustomerOrder {
+            status,
+            version
+        } filter .id = <uuid>$id and .store = <str>$store;
         """
         create_new_order_items_query = """
         with items := <array<tuple<
@@ -254,6 +745,7 @@ class OrdersServiceRepo:
                 product_variant := (
                     select products::ProductVariant
                     filter .id = item.product_variant_id
+                        and .product.store = <str>$store
                 ),
                 amount := item.amount,
                 customer_order := (
@@ -263,6 +755,20 @@ class OrdersServiceRepo:
             }
         );
         """
+        conditions = [".id = <uuid>$id", ".store = <str>$store"]
+        params: dict[str, Any] = {}
+        if order.version is not None:
+            conditions.append(".version = <int64>$version")
+            params["version"] = order.version
+        if order.from_statuses is not None:
+            conditions.append(
+                ".status in"
+                " <orders::OrderStatus>array_unpack(<array<str>>$from_statuses)"
+            )
+            params["from_statuses"] = order.from_statuses
+        update_order_query = update_order_query.format(
+            conditions=" and ".join(conditions)
+        )
 
         async for tx in self._client.transaction():
             async with tx:
@@ -270,9 +776,7 @@ class OrdersServiceRepo:
                 items = [dataclasses.asdict(item) for item in order.items]
                 items_json = json.dumps(items, cls=UUIDEncoder)
 
-                # Delete old order items
-                await tx.query(delete_old_order_items_query, order_id=order_id)
-                # Update order
+                # Update order if it matches, before items are touched
                 result = await tx.query_single(
                     update_order_query,
                     id=order_id,
@@ -280,15 +784,29 @@ class OrdersServiceRepo:
                     status=order.status,
                     note=order.note,
                     address=order.address,
+                    delivery_zone=order.delivery_zone,
+                    store=self._store,
+                    **params,
                 )
                 if result is None:
-                    raise OrderNotFoundError
-                # Create new order items
+                    current = await tx.query_single(
+                        current_order_query, id=order_id, store=self._store
+                    )
+                    if current is None:
+                        raise OrderNotFoundError
+                    if order.version is not None and current.version != order.version:
+                        raise OrderVersionConflictError
+                    raise InvalidOrderTransitionError
+                # Replace order items
+                await tx.query(
+                    delete_old_order_items_query, order_id=order_id, store=self._store
+                )
                 try:
                     await tx.query(
                         create_new_order_items_query,
                         order_id=order_id,
                         items=items_json,
+                        store=self._store,
                     )
                 except edgedb.errors.MissingRequiredError as e:
                     if (
@@ -298,5 +816,5 @@ class OrdersServiceRepo:
                         raise ProductVariantNotFoundError
                     raise
 
-                return OrderUpdated(id=order_id)
+                return OrderUpdated(id=order_id, version=result.version)
         assert False, "Unreachable"
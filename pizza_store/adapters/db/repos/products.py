@@ -1,11 +1,25 @@
+import datetime
+import json
 import uuid
+from decimal import Decimal
+from typing import Iterable, cast
 
 import edgedb
 
-from pizza_store.entities.products import Category, Product, ProductVariant
+from pizza_store.adapters.db.replicas import ReplicaRouter
+from pizza_store.entities.products import (
+    Category,
+    CategoryWithProducts,
+    PriceList,
+    Product,
+    ProductVariant,
+    ProductWithoutVariants,
+)
 from pizza_store.services.products.exceptions import (
     CategoryAlreadyExistsError,
     CategoryNotFoundError,
+    InvalidMenuRowsError,
+    PriceListNotFoundError,
     ProductAlreadyExistsError,
     ProductNotFoundError,
     ProductVariantNotFoundError,
@@ -16,44 +30,116 @@ from pizza_store.services.products.models import (
     CategoryDeleted,
     CategoryUpdate,
     CategoryUpdated,
+    CategoryUpsert,
+    CategoryUpserted,
+    MenuChange,
+    MenuChangeLog,
+    MenuChangeOp,
+    MenuEntity,
+    MenuRow,
+    PriceListCreate,
+    PriceListCreated,
+    PriceListDeleted,
     ProductCreate,
     ProductCreated,
     ProductDeleted,
     ProductUpdate,
     ProductUpdated,
+    ProductUpsert,
+    ProductUpserted,
     ProductVariantCreate,
     ProductVariantCreated,
     ProductVariantDeleted,
     ProductVariantUpdate,
     ProductVariantUpdated,
+    VariantPrice,
+    VariantPricesUpdated,
 )
 
 
 class ProductsServiceRepo:
-    def __init__(self, client: edgedb.asyncio_client.AsyncIOClient) -> None:
+    def __init__(
+        self,
+        client: edgedb.asyncio_client.AsyncIOClient,
+        replicas: ReplicaRouter | None = None,
+        store: str = "default",
+    ) -> None:
         self._client = client
+        self._replicas = replicas
+        # Every query is filtered by the store, so stores sharing a database
+        # don't see each other's menus
+        self._store = store
+        # Data from before stores belongs to "default", which keeps the
+        # version object of the single menu
+        self._menu_version = "menu" if store == "default" else f"menu:{store}"
+
+    def _reader(self) -> edgedb.asyncio_client.AsyncIOClient:
+        # Client for reads which tolerate replica lag, writes and
+        # transactions use `_client`
+        if self._replicas is None:
+            return self._client
+        return self._replicas.reader()
 
     async def create_category(self, category: CategoryCreate) -> CategoryCreated:
         query = """
         insert products::Category {
-            name := <str>$name
+            name := <str>$name,
+            store := <str>$store
         };
         """
         try:
-            result = await self._client.query_single(query, name=category.name)
+            async for tx in self._client.transaction():
+                async with tx:
+                    result = await tx.query_single(
+                        query, name=category.name, store=self._store
+                    )
+                    await self._record_menu_changes(
+                        tx, [("category", result.id, "upsert")]
+                    )
         except edgedb.errors.ConstraintViolationError:
             raise CategoryAlreadyExistsError
 
         return CategoryCreated(id=result.id)
 
+    async def upsert_category(self, category: CategoryUpsert) -> CategoryUpserted:
+        query = """
+        with
+            existing := (
+                select products::Category
+                filter .store = <str>$store and .name = <str>$name
+            ),
+            category := (
+                insert products::Category {
+                    name := <str>$name,
+                    store := <str>$store
+                }
+                unless conflict on (.store, .name)
+                else (select products::Category)
+            )
+        select category {
+            id,
+            created := not exists existing
+        };
+        """
+        async for tx in self._client.transaction():
+            async with tx:
+                result = await tx.query_single(
+                    query, name=category.name, store=self._store
+                )
+                if result.created:
+                    await self._record_menu_changes(
+                        tx, [("category", result.id, "upsert")]
+                    )
+        return CategoryUpserted(id=result.id, created=result.created)
+
     async def get_categories(self) -> list[Category]:
         query = """
         select products::Category {
             id,
             name
-        };
+        } filter .store = <str>$store;
         """
-        result = await self._client.query(query)
+        result = await self._reader().query(query, store=self._store)
         return [Category(id=c.id, name=c.name) for c in result]
 
     async def get_category(self, id: uuid.UUID) -> Category:
@@ -61,37 +147,219 @@ class ProductsServiceRepo:
         select products::Category {
             id,
             name
-        } filter .id = <uuid>$id;
+        } filter .id = <uuid>$id and .store = <str>$store;
         """
-        result = await self._client.query_single(query, id=id)
+        result = await self._reader().query_single(query, id=id, store=self._store)
         if result is None:
             raise CategoryNotFoundError
 
         return Category(id=result.id, name=result.name)
 
+    async def get_menu(self) -> list[CategoryWithProducts]:
+        query = """
+        select products::Category {
+            id,
+            name,
+            products: {
+                id,
+                name,
+                description,
+                variants: {
+                    id,
+                    name,
+                    weight,
+                    weight_units,
+                    price
+                },
+                image_url
+            }
+        } filter .store = <str>$store;
+        """
+        # From the primary, the menu index is rebuilt from it after changes
+        result = await self._client.query(query, store=self._store)
+        menu = []
+        for c in result:
+            category = Category(id=c.id, name=c.name)
+            menu.append(
+                CategoryWithProducts(
+                    id=c.id,
+                    name=c.name,
+                    products=[
+                        Product(
+                            id=p.id,
+                            name=p.name,
+                            category=category,
+                            description=p.description,
+                            image_url=p.image_url,
+                            variants=[
+                                ProductVariant(
+                                    id=v.id,
+                                    name=v.name,
+                                    weight=v.weight,
+                                    weight_units=v.weight_units,
+                                    price=v.price,
+                                )
+                                for v in p.variants
+                            ],
+                        )
+                        for p in c.products
+                    ],
+                )
+            )
+        return menu
+
+    async def import_menu_rows(self, rows: list[MenuRow]) -> None:
+        categories_query = """
+        for name in array_unpack(<array<str>>$names)
+        union (
+            insert products::Category {
+                name := name,
+                store := <str>$store
+            }
+            unless conflict on (.store, .name)
+        );
+        """
+        products_query = """
+        with
+            module products,
+            store := <str>$store
+        for p in json_array_unpack(<json>$products)
+        union (
+            insert Product {
+                name := <str>p['name'],
+                category := (
+                    select Category
+                    filter .store = store and .name = <str>p['category']
+                ),
+                description := <str>p['description'],
+                image_url := <str>p['image_url'],
+                store := store
+            }
+            unless conflict on (.store, .name)
+            else (
+                update Product
+                set {
+                    category := (
+                        select Category
+                        filter .store = store and .name = <str>p['category']
+                    ),
+                    description := <str>p['description'],
+                    image_url := <str>p['image_url']
+                }
+            )
+        );
+        """
+        variants_query = """
+        with module products
+        for v in json_array_unpack(<json>$variants)
+        union (
+            insert ProductVariant {
+                name := <str>v['name'],
+                weight := <decimal><str>v['weight'],
+                weight_units := <str>v['weight_units'],
+                price := <decimal><str>v['price'],
+                product := (
+                    select Product
+                    filter .store = <str>$store and .name = <str>v['product']
+                )
+            }
+            unless conflict on (.product, .name)
+            else (
+                update ProductVariant
+                set {
+                    weight := <decimal><str>v['weight'],
+                    weight_units := <str>v['weight_units'],
+                    price := <decimal><str>v['price']
+                }
+            )
+        );
+        """
+        # A statement can't insert the same name twice, the last row wins
+        categories = list(dict.fromkeys(row.category for row in rows))
+        products = {
+            row.product: {
+                "name": row.product,
+                "category": row.category,
+                "description": row.description,
+                "image_url": row.image_url,
+            }
+            for row in rows
+            if row.product
+        }
+        variants = {
+            (row.product, row.variant): {
+                "name": row.variant,
+                "product": row.product,
+                "weight": str(row.weight),
+                "weight_units": row.weight_units,
+                "price": str(row.price),
+            }
+            for row in rows
+            if row.variant
+        }
+        try:
+            async for tx in self._client.transaction():
+                async with tx:
+                    changes: list[tuple[MenuEntity, uuid.UUID, MenuChangeOp]] = []
+                    result = await tx.query(
+                        categories_query, names=categories, store=self._store
+                    )
+                    changes.extend(("category", c.id, "upsert") for c in result)
+                    if products:
+                        result = await tx.query(
+                            products_query,
+                            products=json.dumps(list(products.values())),
+                            store=self._store,
+                        )
+                        changes.extend(("product", p.id, "upsert") for p in result)
+                    if variants:
+                        result = await tx.query(
+                            variants_query,
+                            variants=json.dumps(list(variants.values())),
+                            store=self._store,
+                        )
+                        changes.extend(("variant", v.id, "upsert") for v in result)
+                    await self._record_menu_changes(tx, changes)
+        except (
+            edgedb.errors.ConstraintViolationError,
+            edgedb.errors.InvalidValueError,
+            edgedb.errors.MissingRequiredError,
+        ) as e:
+            raise InvalidMenuRowsError(str(e))
+
     async def delete_category(self, id: uuid.UUID) -> CategoryDeleted:
         query = """
-        delete products::Category filter .id = <uuid>$id;
+        delete products::Category
+        filter .id = <uuid>$id and .store = <str>$store;
         """
-        result = await self._client.query_single(query, id=id)
-        if result is None:
-            raise CategoryNotFoundError
+        async for tx in self._client.transaction():
+            async with tx:
+                result = await tx.query_single(query, id=id, store=self._store)
+                if result is None:
+                    raise CategoryNotFoundError
+                # Clients delete products of the category with it
+                await self._record_menu_changes(tx, [("category", id, "delete")])
 
         return CategoryDeleted(id=result.id)
 
     async def update_category(self, category: CategoryUpdate) -> CategoryUpdated:
         query = """
         update products::Category
-        filter .id = <uuid>$id
+        filter .id = <uuid>$id and .store = <str>$store
         set {
             name := <str>$name
         };
         """
-        result = await self._client.query_single(
-            query, id=category.id, name=category.name
-        )
-        if result is None:
-            raise CategoryNotFoundError
+        async for tx in self._client.transaction():
+            async with tx:
+                result = await tx.query_single(
+                    query, id=category.id, name=category.name, store=self._store
+                )
+                if result is None:
+                    raise CategoryNotFoundError
+                await self._record_menu_changes(
+                    tx, [("category", category.id, "upsert")]
+                )
 
         return CategoryUpdated(id=result.id)
 
@@ -100,19 +368,29 @@ class ProductsServiceRepo:
         with module products
         insert Product {
             name := <str>$name,
-            category := (select Category filter .id = <uuid>$category_id),
+            category := (
+                select Category
+                filter .id = <uuid>$category_id and .store = <str>$store
+            ),
             description := <str>$description,
-            image_url := <str>$image_url
+            image_url := <str>$image_url,
+            store := <str>$store
         };
         """
         try:
-            result = await self._client.query_single(
-                query,
-                name=product.name,
-                category_id=product.category_id,
-                description=product.description,
-                image_url=product.image_url,
-            )
+            async for tx in self._client.transaction():
+                async with tx:
+                    result = await tx.query_single(
+                        query,
+                        name=product.name,
+                        category_id=product.category_id,
+                        description=product.description,
+                        image_url=product.image_url,
+                        store=self._store,
+                    )
+                    await self._record_menu_changes(
+                        tx, [("product", result.id, "upsert")]
+                    )
         except edgedb.errors.MissingRequiredError as e:
             if "missing value for required link 'category'" in e.get_server_context():
                 raise CategoryNotFoundError
@@ -122,6 +400,59 @@ class ProductsServiceRepo:
 
         return ProductCreated(id=result.id)
 
+    async def upsert_product(self, product: ProductUpsert) -> ProductUpserted:
+        query = """
+        with
+            module products,
+            store := <str>$store,
+            existing := (select Product filter .store = store and .name = <str>$name),
+            category := (
+                select Category filter .id = <uuid>$category_id and .store = store
+            ),
+            product := (
+                insert Product {
+                    name := <str>$name,
+                    category := category,
+                    description := <str>$description,
+                    image_url := <str>$image_url,
+                    store := store
+                }
+                unless conflict on (.store, .name)
+                else (
+                    update Product
+                    set {
+                        category := category,
+                        description := <str>$description,
+                        image_url := <str>$image_url
+                    }
+                )
+            )
+        select product {
+            id,
+            created := not exists existing
+        };
+        """
+        try:
+            async for tx in self._client.transaction():
+                async with tx:
+                    result = await tx.query_single(
+                        query,
+                        name=product.name,
+                        category_id=product.category_id,
+                        description=product.description,
+                        image_url=product.image_url,
+                        store=self._store,
+                    )
+                    await self._record_menu_changes(
+                        tx, [("product", result.id, "upsert")]
+                    )
+        except edgedb.errors.MissingRequiredError as e:
+            if "missing value for required link 'category'" in e.get_server_context():
+                raise CategoryNotFoundError
+            raise
+
+        return ProductUpserted(id=result.id, created=result.created)
+
     async def get_products(self, category_id: uuid.UUID | None = None) -> list[Product]:
         query = """
         select products::Product {
@@ -143,11 +474,16 @@ class ProductsServiceRepo:
         }
         """
         if category_id is not None:
-            query = f"{query} filter .category.id = <uuid>$category_id;"
-            result = await self._client.query(query, category_id=category_id)
+            query = (
+                f"{query} filter .store = <str>$store"
+                " and .category.id = <uuid>$category_id;"
+            )
+            result = await self._reader().query(
+                query, category_id=category_id, store=self._store
+            )
         else:
-            query = f"{query};"
-            result = await self._client.query(query)
+            query = f"{query} filter .store = <str>$store;"
+            result = await self._reader().query(query, store=self._store)
 
         return [
             Product(
@@ -188,10 +524,10 @@ class ProductsServiceRepo:
                 price
             },
             image_url
-        } filter .id = <uuid>$id;
+        } filter .id = <uuid>$id and .store = <str>$store;
         """
 
-        result = await self._client.query_single(query, id=id)
+        result = await self._reader().query_single(query, id=id, store=self._store)
         if result is None:
             raise ProductNotFoundError
 
@@ -216,14 +552,19 @@ class ProductsServiceRepo:
     async def delete_product(self, id: uuid.UUID) -> ProductDeleted:
         query = """
         delete products::Product
-        filter .id = <uuid>$id;
+        filter .id = <uuid>$id and .store = <str>$store;
         """
-        result = await self._client.query_single(
-            query,
-            id=id,
-        )
-        if result is None:
-            raise ProductNotFoundError
+        async for tx in self._client.transaction():
+            async with tx:
+                result = await tx.query_single(
+                    query,
+                    id=id,
+                    store=self._store,
+                )
+                if result is None:
+                    raise ProductNotFoundError
+                # Clients delete variants of the product with it
+                await self._record_menu_changes(tx, [("product", id, "delete")])
 
         return ProductDeleted(id=result.id)
 
@@ -231,23 +572,33 @@ class ProductsServiceRepo:
         query = """
         with module products
         update Product
-        filter .id = <uuid>$id
+        filter .id = <uuid>$id and .store = <str>$store
         set {
             name := <str>$name,
-            category := (select Category filter .id = <uuid>$category_id),
+            category := (
+                select Category
+                filter .id = <uuid>$category_id and .store = <str>$store
+            ),
             description := <str>$description,
             image_url := <str>$image_url
         };
         """
         try:
-            result = await self._client.query_single(
-                query,
-                id=product.id,
-                name=product.name,
-                category_id=product.category_id,
-                description=product.description,
-                image_url=product.image_url,
-            )
+            async for tx in self._client.transaction():
+                async with tx:
+                    result = await tx.query_single(
+                        query,
+                        id=product.id,
+                        name=product.name,
+                        category_id=product.category_id,
+                        description=product.description,
+                        image_url=product.image_url,
+                        store=self._store,
+                    )
+                    if result is not None:
+                        await self._record_menu_changes(
+                            tx, [("product", product.id, "upsert")]
+                        )
         except edgedb.errors.ConstraintViolationError:
             raise ProductAlreadyExistsError
         except edgedb.errors.MissingRequiredError as e:
@@ -267,18 +618,27 @@ class ProductsServiceRepo:
             weight := <decimal>$weight,
             weight_units := <str>$weight_units,
             price := <decimal>$price,
-            product := (select Product filter .id = <uuid>$product_id)
+            product := (
+                select Product
+                filter .id = <uuid>$product_id and .store = <str>$store
+            )
         };
         """
         try:
-            result = await self._client.query_single(
-                query,
-                name=product_variant.name,
-                weight=product_variant.weight,
-                weight_units=product_variant.weight_units,
-                price=product_variant.price,
-                product_id=product_variant.product_id,
-            )
+            async for tx in self._client.transaction():
+                async with tx:
+                    result = await tx.query_single(
+                        query,
+                        name=product_variant.name,
+                        weight=product_variant.weight,
+                        weight_units=product_variant.weight_units,
+                        price=product_variant.price,
+                        product_id=product_variant.product_id,
+                        store=self._store,
+                    )
+                    await self._record_menu_changes(
+                        tx, [("variant", result.id, "upsert")]
+                    )
         except edgedb.errors.MissingRequiredError as e:
             if "missing value for required link 'product'" in e.get_server_context():
                 raise ProductNotFoundError
@@ -289,11 +649,14 @@ class ProductsServiceRepo:
     async def delete_product_variant(self, id: uuid.UUID) -> ProductVariantDeleted:
         query = """
         delete products::ProductVariant
-        filter .id = <uuid>$id;
+        filter .id = <uuid>$id and .product.store = <str>$store;
         """
-        result = await self._client.query_single(query, id=id)
-        if result is None:
-            raise ProductVariantNotFoundError
+        async for tx in self._client.transaction():
+            async with tx:
+                result = await tx.query_single(query, id=id, store=self._store)
+                if result is None:
+                    raise ProductVariantNotFoundError
+                await self._record_menu_changes(tx, [("variant", id, "delete")])
 
         return ProductVariantDeleted(id=result.id)
 
@@ -302,7 +665,7 @@ class ProductsServiceRepo:
     ) -> ProductVariantUpdated:
         query = """
         update products::ProductVariant
-        filter .id = <uuid>$id
+        filter .id = <uuid>$id and .product.store = <str>$store
         set {
             name := <str>$name,
             weight := <decimal>$weight,
@@ -310,15 +673,372 @@ class ProductsServiceRepo:
             price := <decimal>$price
         };
         """
+        async for tx in self._client.transaction():
+            async with tx:
+                result = await tx.query_single(
+                    query,
+                    id=product_variant.id,
+                    name=product_variant.name,
+                    weight=product_variant.weight,
+                    weight_units=product_variant.weight_units,
+                    price=product_variant.price,
+                    store=self._store,
+                )
+                if result is None:
+                    raise ProductVariantNotFoundError
+                await self._record_menu_changes(
+                    tx, [("variant", product_variant.id, "upsert")]
+                )
+
+        return ProductVariantUpdated(id=result.id)
+
+    async def update_variant_prices(
+        self, prices: list[VariantPrice]
+    ) -> VariantPricesUpdated:
+        query = """
+        with module products
+        for p in json_array_unpack(<json>$prices)
+        union (
+            update ProductVariant
+            filter .id = <uuid>p['id'] and .product.store = <str>$store
+            set {
+                price := <decimal><str>p['price']
+            }
+        );
+        """
+        # A statement can't update the same variant twice, the last price wins
+        data = {str(p.id): str(p.price) for p in prices}
+        async for tx in self._client.transaction():
+            async with tx:
+                result = await tx.query(
+                    query,
+                    prices=json.dumps([{"id": k, "price": v} for k, v in data.items()]),
+                    store=self._store,
+                )
+                # Raising rolls back the transaction
+                if len(result) != len(data):
+                    raise ProductVariantNotFoundError
+                await self._record_menu_changes(
+                    tx, [("variant", r.id, "upsert") for r in result]
+                )
+                return VariantPricesUpdated(ids=[r.id for r in result])
+        assert False, "Unreachable"
+
+    async def get_variant_prices(
+        self, ids: Iterable[uuid.UUID]
+    ) -> dict[uuid.UUID, Decimal]:
+        query = """
+        select products::ProductVariant { id, price }
+        filter .id in array_unpack(<array<uuid>>$ids)
+            and .product.store = <str>$store;
+        """
+        # Asked for variants the menu index doesn't know yet, which are
+        # usually just created, so replicas may lag behind
+        result = await self._client.query(query, ids=list(ids), store=self._store)
+        return {r.id: r.price for r in result}
+
+    async def create_price_list(self, price_list: PriceListCreate) -> PriceListCreated:
+        query = """
+        with
+            prices := <json>$prices,
+            variant_ids := <array<uuid>>$variant_ids
+        select (
+            insert products::PriceList {
+                activate_at := <datetime>$activate_at,
+                prices := prices,
+                store := <str>$store
+            }
+        ) {
+            id,
+            variants_count := count(
+                select products::ProductVariant
+                filter .id in array_unpack(variant_ids)
+                    and .product.store = <str>$store
+            )
+        };
+        """
+        variant_ids = list({p.id for p in price_list.prices})
+        async for tx in self._client.transaction():
+            async with tx:
+                result = await tx.query_single(
+                    query,
+                    activate_at=price_list.activate_at,
+                    prices=self._dump_prices(price_list.prices),
+                    variant_ids=variant_ids,
+                    store=self._store,
+                )
+                if result.variants_count != len(variant_ids):
+                    raise ProductVariantNotFoundError
+                return PriceListCreated(id=result.id)
+        assert False, "Unreachable"
+
+    async def get_price_lists(self) -> list[PriceList]:
+        query = """
+        select products::PriceList {
+            id,
+            activate_at,
+            activated_at,
+            prices
+        }
+        filter .store = <str>$store
+        order by .activate_at;
+        """
+        result = await self._reader().query(query, store=self._store)
+        return [self._price_list(p) for p in result]
+
+    async def delete_price_list(self, id: uuid.UUID) -> PriceListDeleted:
+        query = """
+        delete products::PriceList
+        filter .id = <uuid>$id
+            and .store = <str>$store
+            and not exists .activated_at;
+        """
+        result = await self._client.query_single(query, id=id, store=self._store)
+        if result is None:
+            raise PriceListNotFoundError
+
+        return PriceListDeleted(id=result.id)
+
+    async def activate_price_lists(self, now: datetime.datetime) -> list[PriceList]:
+        activate_query = """
+        select (
+            update products::PriceList
+            filter .store = <str>$store
+                and not exists .activated_at
+                and .activate_at <= <datetime>$now
+            set {
+                activated_at := datetime_of_transaction()
+            }
+        ) {
+            id,
+            activate_at,
+            activated_at,
+            prices
+        };
+        """
+        prices_query = """
+        with module products
+        for p in json_object_unpack(<json>$prices)
+        union (
+            update ProductVariant
+            filter .id = <uuid>p.0 and .product.store = <str>$store
+            set {
+                price := <decimal><str>p.1
+            }
+        );
+        """
+        # Concurrent activations conflict and are retried by the transaction,
+        # the retry sees the price lists already activated
+        async for tx in self._client.transaction():
+            async with tx:
+                result = await tx.query(activate_query, now=now, store=self._store)
+                price_lists = sorted(
+                    (self._price_list(p) for p in result),
+                    key=lambda p: p.activate_at,
+                )
+                # Later price lists override earlier ones
+                prices: dict[uuid.UUID, Decimal] = {}
+                for price_list in price_lists:
+                    prices.update(price_list.prices)
+                if prices:
+                    result = await tx.query(
+                        prices_query,
+                        prices=json.dumps({str(k): str(v) for k, v in prices.items()}),
+                        store=self._store,
+                    )
+                    await self._record_menu_changes(
+                        tx, [("variant", r.id, "upsert") for r in result]
+                    )
+                return price_lists
+        assert False, "Unreachable"
+
+    async def get_menu_changes(self, since: int | None) -> MenuChangeLog:
+        query = """
+        with
+            module products,
+            since := <optional int64>$since,
+            store := <str>$store,
+            menu := (
+                select MenuVersion filter .name = <str>$menu_version
+            ),
+            changes := (
+                select MenuChange filter .store = store and .version > since
+            ),
+            changed_ids := changes.entity_id
+        select {
+            version := menu.version ?? 0,
+            compacted_through := menu.compacted_through ?? 0,
+            changes := (
+                select changes { version, entity, entity_id, op }
+                order by .version
+            ),
+            categories := (
+                select Category { id, name }
+                filter .store = store
+                    and (not exists since or .id in changed_ids)
+            ),
+            products := (
+                select Product {
+                    id,
+                    name,
+                    category: { id, name },
+                    description,
+                    image_url
+                }
+                filter .store = store
+                    and (not exists since or .id in changed_ids)
+            ),
+            variants := (
+                select ProductVariant {
+                    id,
+                    name,
+                    weight,
+                    weight_units,
+                    price,
+                    product: { id }
+                }
+                filter .product.store = store
+                    and (not exists since or .id in changed_ids)
+            )
+        };
+        """
+        # One query, so entities are in the state of the returned version
         result = await self._client.query_single(
+            query, since=since, store=self._store, menu_version=self._menu_version
+        )
+        variants: dict[uuid.UUID, list[ProductVariant]] = {}
+        for v in result.variants:
+            variants.setdefault(v.product.id, []).append(
+                ProductVariant(
+                    id=v.id,
+                    name=v.name,
+                    weight=v.weight,
+                    weight_units=v.weight_units,
+                    price=v.price,
+                )
+            )
+        return MenuChangeLog(
+            version=result.version,
+            compacted_through=result.compacted_through,
+            changes=[
+                MenuChange(
+                    version=c.version,
+                    entity=cast(MenuEntity, str(c.entity)),
+                    id=c.entity_id,
+                    op=cast(MenuChangeOp, str(c.op)),
+                )
+                for c in result.changes
+            ],
+            categories=[Category(id=c.id, name=c.name) for c in result.categories],
+            products=[
+                ProductWithoutVariants(
+                    id=p.id,
+                    name=p.name,
+                    category=Category(id=p.category.id, name=p.category.name),
+                    description=p.description,
+                    image_url=p.image_url,
+                )
+                for p in result.products
+            ],
+            variants=variants,
+        )
+
+    async def compact_menu_changes(self, keep_versions: int) -> int:
+        compact_query = """
+        select (
+            update products::MenuVersion
+            filter .name = <str>$menu_version
+                and .version - <int64>$keep_versions > .compacted_through
+            set {
+                compacted_through := .version - <int64>$keep_versions
+            }
+        ) { compacted_through };
+        """
+        delete_query = """
+        select count((
+            delete products::MenuChange
+            filter .store = <str>$store
+                and .version <= <int64>$compacted_through
+        ));
+        """
+        async for tx in self._client.transaction():
+            async with tx:
+                menu = await tx.query_single(
+                    compact_query,
+                    keep_versions=keep_versions,
+                    menu_version=self._menu_version,
+                )
+                if menu is None:
+                    return 0
+                return await tx.query_single(
+                    delete_query,
+                    compacted_through=menu.compacted_through,
+                    store=self._store,
+                )
+        assert False, "Unreachable"
+
+    async def _record_menu_changes(
+        self,
+        tx: edgedb.AsyncIOExecutor,
+        changes: list[tuple[MenuEntity, uuid.UUID, MenuChangeOp]],
+    ) -> None:
+        """Records changes of a mutation in its transaction as a new version.
+
+        Concurrent mutations of the store conflict on its version and are
+        retried by the transaction, so versions are assigned in commit order.
+        Stores are versioned independently.
+        """
+
+        query = """
+        with
+            module products,
+            menu := (
+                insert MenuVersion {
+                    name := <str>$menu_version,
+                    version := 1
+                }
+                unless conflict on .name
+                else (
+                    update MenuVersion
+                    set {
+                        version := .version + 1
+                    }
+                )
+            )
+        for change in json_array_unpack(<json>$changes)
+        union (
+            insert MenuChange {
+                version := menu.version,
+                entity := <MenuEntity><str>change['entity'],
+                entity_id := <uuid>change['id'],
+                op := <MenuChangeOp><str>change['op'],
+                store := <str>$store
+            }
+        );
+        """
+        if not changes:
+            return
+        await tx.query(
             query,
-            id=product_variant.id,
-            name=product_variant.name,
-            weight=product_variant.weight,
-            weight_units=product_variant.weight_units,
-            price=product_variant.price,
+            changes=json.dumps(
+                [{"entity": e, "id": str(id), "op": op} for e, id, op in changes]
+            ),
+            store=self._store,
+            menu_version=self._menu_version,
         )
-        if result is None:
-            raise ProductVariantNotFoundError
 
-        return ProductVariantUpdated(id=result.id)
+    @classmethod
+    def _dump_prices(cls, prices: list[VariantPrice]) -> str:
+        return json.dumps({str(p.id): str(p.price) for p in prices})
+
+    @classmethod
+    def _price_list(cls, result: edgedb.Object) -> PriceList:
+        return PriceList(
+            id=result.id,
+            activate_at=result.activate_at,
+            prices={
+                uuid.UUID(id): Decimal(price)
+                for id, price in json.loads(result.prices).items()
+            },
+            activated_at=result.activated_at,
+        )
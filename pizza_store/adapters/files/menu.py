@@ -0,0 +1,136 @@
+import codecs
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, Literal
+
+from pizza_store.services.products.models import MenuRow, MenuRowError
+
+MenuFileFormat = Literal["jsonl", "csv"]
+
+FIELDS = (
+    "category",
+    "product",
+    "description",
+    "image_url",
+    "variant",
+    "weight",
+    "weight_units",
+    "price",
+)
+DECIMAL_FIELDS = ("weight", "price")
+
+
+async def read_menu_rows(
+    chunks: AsyncIterable[bytes], format: MenuFileFormat
+) -> AsyncIterator[MenuRow | MenuRowError]:
+    """Parses menu rows from a UTF-8 JSONL or CSV stream.
+
+    JSONL lines are objects with `FIELDS` keys. CSV files start with a header
+    of `FIELDS` names. Missing fields are empty. Rows that can't be parsed are
+    returned as `MenuRowError`.
+    """
+
+    lines = _read_lines(chunks)
+    if format == "jsonl":
+        async for number, line in lines:
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line, parse_float=Decimal)
+                if not isinstance(data, dict):
+                    raise ValueError("Row must be an object.")
+                yield _to_menu_row(number, data)
+            except ValueError as e:
+                yield MenuRowError(line=number, message=str(e))
+        return
+
+    header: list[str] | None = None
+    record = ""
+    start = 0
+    async for number, line in lines:
+        if not record:
+            start = number
+        record += line
+        # Quoted values may contain newlines
+        if record.count('"') % 2:
+            continue
+        if not record.strip():
+            record = ""
+            continue
+        values = next(csv.reader([record]))
+        record = ""
+        if header is None:
+            header = [name.strip() for name in values]
+            if "category" not in header:
+                yield MenuRowError(line=start, message="Header has no category.")
+                return
+            continue
+        try:
+            yield _to_menu_row(start, dict(zip(header, values)))
+        except ValueError as e:
+            yield MenuRowError(line=start, message=str(e))
+    if record.strip():
+        yield MenuRowError(line=start, message="Unterminated quoted value.")
+
+
+def write_menu_rows(rows: Iterable[MenuRow], format: MenuFileFormat) -> Iterator[str]:
+    """Formats menu rows as JSONL or CSV readable by `read_menu_rows`."""
+
+    if format == "jsonl":
+        for row in rows:
+            yield json.dumps(_from_menu_row(row)) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(FIELDS)
+    for row in rows:
+        writer.writerow(_from_menu_row(row).values())
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+async def _read_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, str]]:
+    # utf-8-sig drops the BOM spreadsheet apps put to CSV files
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    number = 0
+    tail = ""
+    async for chunk in chunks:
+        *lines, tail = (tail + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            number += 1
+            yield number, line + "\n"
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield number + 1, tail
+
+
+def _to_menu_row(line: int, data: dict[str, Any]) -> MenuRow:
+    values: dict[str, Any] = {}
+    for field in FIELDS:
+        value = data.get(field)
+        if field in DECIMAL_FIELDS:
+            if value is None or value == "":
+                values[field] = None
+                continue
+            try:
+                number = Decimal(str(value).strip())
+            except InvalidOperation:
+                number = None
+            if number is None or not number.is_finite():
+                raise ValueError(f"Invalid {field} {value!r}.")
+            values[field] = number
+        else:
+            values[field] = "" if value is None else str(value).strip()
+    return MenuRow(line=line, **values)
+
+
+def _from_menu_row(row: MenuRow) -> dict[str, str]:
+    values = {}
+    for field in FIELDS:
+        value = getattr(row, field)
+        values[field] = "" if value is None else str(value)
+    return values
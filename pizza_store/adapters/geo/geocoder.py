@@ -0,0 +1,24 @@
+import csv
+
+from pizza_store.services.delivery.models import Point
+from pizza_store.services.delivery.service import normalize_address
+
+
+class CsvGeocoder:
+    """`IGeocoder` backed by a local CSV gazetteer.
+
+    The file has an `address,longitude,latitude` header and is loaded into
+    memory once. Addresses are matched after `normalize_address`.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._points: dict[str, Point] = {}
+        with open(path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                self._points[normalize_address(row["address"])] = (
+                    float(row["longitude"]),
+                    float(row["latitude"]),
+                )
+
+    async def geocode(self, address: str) -> Point | None:
+        return self._points.get(address)
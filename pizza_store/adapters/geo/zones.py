@@ -0,0 +1,42 @@
+import json
+from typing import Any
+
+from pizza_store.services.delivery.models import DeliveryPolygon, DeliveryZone, Ring
+
+
+def load_delivery_zones(path: str) -> list[DeliveryZone]:
+    """Loads delivery zones from a GeoJSON feature collection.
+
+    Every feature is a zone named by its `name` property, with a `Polygon` or
+    `MultiPolygon` geometry in longitude, latitude coordinates. Zones keep the
+    order of features, which decides overlaps, see `ZoneIndex`.
+    """
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    zones = []
+    for feature in data["features"]:
+        geometry = feature["geometry"]
+        if geometry["type"] == "Polygon":
+            polygons = [geometry["coordinates"]]
+        elif geometry["type"] == "MultiPolygon":
+            polygons = geometry["coordinates"]
+        else:
+            raise ValueError(f"Unsupported delivery zone geometry {geometry['type']!r}")
+        zones.append(
+            DeliveryZone(
+                name=feature["properties"]["name"],
+                polygons=[
+                    DeliveryPolygon(
+                        exterior=_ring(rings[0]), holes=[_ring(r) for r in rings[1:]]
+                    )
+                    for rings in polygons
+                ],
+            )
+        )
+    return zones
+
+
+def _ring(coordinates: list[list[Any]]) -> Ring:
+    return [(float(c[0]), float(c[1])) for c in coordinates]
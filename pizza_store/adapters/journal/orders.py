@@ -0,0 +1,258 @@
+import asyncio
+import datetime
+import fcntl
+import json
+import os
+import re
+import uuid
+from typing import IO, Any
+
+from pizza_store.services.orders.models import (
+    JournaledOrder,
+    OrderCreate,
+    OrderItemCreate,
+)
+from pizza_store.utils import UUIDEncoder
+
+_SLOT_FILE = re.compile(r"orders-\d+\.journal")
+
+
+class OrdersJournal:
+    """Append-only on-disk journal of accepted orders.
+
+    Every worker owns one slot file (`orders-<n>.journal`) in `directory`,
+    locked with `flock` for the lifetime of the worker. A restarted worker takes
+    the first unlocked slot, so journals left by dead workers are replayed and
+    drained by their successors. Pending orders of other unlocked slots, left
+    when there are fewer workers than before, are moved into the taken slot.
+
+    Records are JSON lines. Order records are buffered and written with a single
+    `fsync` per `flush_interval`, `append` returns only after its record is on
+    disk. Commit records list drained order ids. Once the file grows over
+    `compact_size` bytes it is rewritten with only the pending orders.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        flush_interval: float = 0.002,
+        compact_size: int = 16 * 1024 * 1024,
+    ) -> None:
+        self._directory = directory
+        self._flush_interval = flush_interval
+        self._compact_size = compact_size
+        self._path: str | None = None
+        self._file: IO[bytes] | None = None
+        self._pending: dict[uuid.UUID, JournaledOrder] = {}
+        self._buffer: list[JournaledOrder] = []
+        self._flushed: asyncio.Future[None] | None = None
+        self._lock = asyncio.Lock()
+        # Referenced until done, the loop keeps only weak references to tasks
+        self._flush_tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def path(self) -> str | None:
+        return self._path
+
+    def open(self) -> None:
+        """Locks a free slot file and replays orders that were not drained."""
+
+        os.makedirs(self._directory, exist_ok=True)
+        slot = 0
+        while True:
+            path = os.path.join(self._directory, f"orders-{slot}.journal")
+            file = open(path, "a+b")
+            try:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                file.close()
+                slot += 1
+                continue
+            break
+
+        self._path = path
+        self._file = file
+        file.seek(0)
+        self._pending, size = self._replay(file)
+        # Drops a torn last record, so appended records start on a new line
+        file.truncate(size)
+        self._adopt_free_slots()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def append(self, order: JournaledOrder) -> None:
+        """Appends `order` to the journal and waits until it is on disk."""
+
+        if self._flushed is None:
+            self._flushed = asyncio.get_running_loop().create_future()
+            task = asyncio.create_task(self._flush_later())
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        flushed = self._flushed
+        self._buffer.append(order)
+        await asyncio.shield(flushed)
+
+    def pending(self, limit: int) -> list[JournaledOrder]:
+        """Returns up to `limit` durable orders in acceptance order."""
+
+        result = []
+        for order in self._pending.values():
+            if len(result) == limit:
+                break
+            result.append(order)
+        return result
+
+    async def commit(self, ids: list[uuid.UUID]) -> None:
+        """Marks orders as stored in the database."""
+
+        record = self._encode({"type": "commit", "ids": ids})
+        async with self._lock:
+            await self._run_in_executor(self._write, [record])
+            for id in ids:
+                self._pending.pop(id, None)
+            if self._size() > self._compact_size:
+                await self._run_in_executor(self._compact)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._flush_interval)
+        orders, flushed = self._buffer, self._flushed
+        self._buffer, self._flushed = [], None
+        assert flushed is not None
+
+        records = [self._encode(self._order_to_record(o)) for o in orders]
+        try:
+            async with self._lock:
+                await self._run_in_executor(self._write, records)
+        except Exception as e:
+            flushed.set_exception(e)
+            return
+        for order in orders:
+            self._pending[order.id] = order
+        flushed.set_result(None)
+
+    def _adopt_free_slots(self) -> None:
+        """Moves pending orders of unlocked slot files into the taken slot.
+
+        Orders are written to the taken slot before the other slot file is
+        emptied, a crash in between leaves them in both and the drainer skips
+        the stored ones. The emptied file is kept, a worker which opened it
+        meanwhile still gets a valid slot.
+        """
+
+        assert self._file is not None
+        for name in sorted(os.listdir(self._directory)):
+            path = os.path.join(self._directory, name)
+            if not _SLOT_FILE.fullmatch(name) or path == self._path:
+                continue
+            with open(path, "r+b") as file:
+                try:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                pending, _ = self._replay(file)
+                orders = [o for o in pending.values() if o.id not in self._pending]
+                if orders:
+                    self._write(
+                        [self._encode(self._order_to_record(o)) for o in orders]
+                    )
+                    self._pending.update((o.id, o) for o in orders)
+                file.truncate(0)
+                os.fsync(file.fileno())
+
+    def _write(self, records: list[bytes]) -> None:
+        assert self._file is not None
+        self._file.write(b"".join(records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _size(self) -> int:
+        assert self._file is not None
+        return os.fstat(self._file.fileno()).st_size
+
+    def _compact(self) -> None:
+        """Rewrites the slot file with pending orders only.
+
+        The lock is held on the old file descriptor until the new file replaces
+        it, so another worker can not take the slot in between.
+        """
+
+        assert self._file is not None and self._path is not None
+        tmp_path = f"{self._path}.tmp"
+        with open(tmp_path, "wb") as tmp:
+            for order in self._pending.values():
+                tmp.write(self._encode(self._order_to_record(order)))
+            tmp.flush()
+            os.fsync(tmp.fileno())
+
+        new_file = open(tmp_path, "a+b")
+        fcntl.flock(new_file.fileno(), fcntl.LOCK_EX)
+        os.replace(tmp_path, self._path)
+        dir_fd = os.open(self._directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        self._file.close()
+        self._file = new_file
+
+    async def _run_in_executor(self, func: Any, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    @classmethod
+    def _replay(cls, file: IO[bytes]) -> tuple[dict[uuid.UUID, JournaledOrder], int]:
+        """Returns pending orders and size of the complete records."""
+
+        pending: dict[uuid.UUID, JournaledOrder] = {}
+        size = 0
+        for line in file:
+            if not line.endswith(b"\n"):
+                # Torn write of the last record, it was never acknowledged
+                break
+            size += len(line)
+            record = json.loads(line)
+            if record["type"] == "order":
+                order = cls._order_from_record(record)
+                pending[order.id] = order
+            elif record["type"] == "commit":
+                for id in record["ids"]:
+                    pending.pop(uuid.UUID(id), None)
+        return pending, size
+
+    @classmethod
+    def _encode(cls, record: dict[str, Any]) -> bytes:
+        return json.dumps(record, cls=UUIDEncoder).encode("utf-8") + b"\n"
+
+    @classmethod
+    def _order_to_record(cls, order: JournaledOrder) -> dict[str, Any]:
+        return {
+            "type": "order",
+            "id": order.id,
+            "accepted_at": order.accepted_at.isoformat(),
+            "phone": order.order.phone,
+            "note": order.order.note,
+            "address": order.order.address,
+            "delivery_zone": order.order.delivery_zone,
+            "items": [
+                [item.product_variant_id, item.amount] for item in order.order.items
+            ],
+        }
+
+    @classmethod
+    def _order_from_record(cls, record: dict[str, Any]) -> JournaledOrder:
+        return JournaledOrder(
+            id=uuid.UUID(record["id"]),
+            accepted_at=datetime.datetime.fromisoformat(record["accepted_at"]),
+            order=OrderCreate(
+                phone=record["phone"],
+                note=record["note"],
+                address=record["address"],
+                delivery_zone=record.get("delivery_zone"),
+                items=[
+                    OrderItemCreate(product_variant_id=uuid.UUID(id), amount=amount)
+                    for id, amount in record["items"]
+                ],
+            ),
+        )
@@ -0,0 +1,100 @@
+import time
+
+try:
+    import redis.asyncio
+except ImportError:
+    has_redis = False
+else:
+    has_redis = True
+
+# KEYS: version, value. ARGV: version, value, ttl ms
+_SET_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[1]) or '0') ~= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'PX', ARGV[3])
+return 1
+"""
+# KEYS: version, value
+_INVALIDATE_SCRIPT = """
+local version = redis.call('INCR', KEYS[1])
+redis.call('DEL', KEYS[2])
+return version
+"""
+
+
+class RedisSharedCache:
+    """`ISharedCache` in Redis, shared by workers on all hosts.
+
+    Versions are checked at most every `version_check_interval` seconds, so
+    a worker notices invalidations by other workers that much later. Needs
+    `redis` (`pip install redis`).
+    """
+
+    def __init__(
+        self,
+        client: "redis.asyncio.Redis",
+        prefix: str = "pizza_store:",
+        version_check_interval: float = 0.1,
+    ) -> None:
+        self._client = client
+        self._prefix = prefix
+        self._version_check_interval = version_check_interval
+        self._versions: dict[str, tuple[float, int]] = {}
+        self._set = client.register_script(_SET_SCRIPT)
+        self._invalidate = client.register_script(_INVALIDATE_SCRIPT)
+
+    @classmethod
+    def from_url(
+        cls,
+        url: str,
+        prefix: str = "pizza_store:",
+        version_check_interval: float = 0.1,
+    ) -> "RedisSharedCache":
+        if not has_redis:
+            raise RuntimeError("Redis shared cache needs `pip install redis`")
+        return cls(redis.asyncio.Redis.from_url(url), prefix, version_check_interval)
+
+    async def close(self) -> None:
+        await self._client.close()
+
+    async def get_version(self, key: str) -> int:
+        item = self._versions.get(key)
+        if item is not None and item[0] > time.monotonic():
+            return item[1]
+        version = int(await self._client.get(self._version_key(key)) or 0)
+        self._remember_version(key, version)
+        return version
+
+    async def get(self, key: str) -> tuple[int, bytes | None]:
+        version, value = await self._client.mget(
+            self._version_key(key), self._value_key(key)
+        )
+        self._remember_version(key, int(version or 0))
+        return int(version or 0), value
+
+    async def set(self, key: str, version: int, value: bytes, ttl: float) -> bool:
+        stored = await self._set(
+            keys=[self._version_key(key), self._value_key(key)],
+            args=[version, value, max(1, int(ttl * 1000))],
+        )
+        return bool(stored)
+
+    async def invalidate(self, key: str) -> int:
+        version = int(
+            await self._invalidate(keys=[self._version_key(key), self._value_key(key)])
+        )
+        self._remember_version(key, version)
+        return version
+
+    def _remember_version(self, key: str, version: int) -> None:
+        self._versions[key] = (
+            time.monotonic() + self._version_check_interval,
+            version,
+        )
+
+    def _version_key(self, key: str) -> str:
+        return f"{self._prefix}{key}:version"
+
+    def _value_key(self, key: str) -> str:
+        return f"{self._prefix}{key}:value"
@@ -0,0 +1,157 @@
+import asyncio
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import time
+from typing import Any, Callable, TypeVar
+
+from pizza_store.adapters.shared_memory.locks import RangeLock
+
+T = TypeVar("T")
+
+# key hash, version, expires at, value length
+HEADER = struct.Struct("<QQdQ")
+
+
+class SharedMemoryCache:
+    """`ISharedCache` shared by all processes that map the same file.
+
+    The file is a table of `slots` keys, each followed by room for a value of
+    up to `max_value_size` bytes. Keys are placed by linear probing and are
+    never removed, so the table suits a few well-known keys. A slot is locked
+    with `RangeLock` on its header while it is read or written, values are
+    read without the lock and dropped if the header changed meanwhile. The
+    file is sparse, only pages of stored values take memory, once for all
+    processes.
+    """
+
+    def __init__(
+        self, path: str, slots: int = 16, max_value_size: int = 8 * 1024 * 1024
+    ) -> None:
+        self._slots = slots
+        self._max_value_size = max_value_size
+        self._slot_size = HEADER.size + max_value_size
+        size = slots * self._slot_size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+        self._offsets: dict[str, int] = {}
+        self._lock = RangeLock(self._fd)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+    async def get_version(self, key: str) -> int:
+        offset = await self._find(key)
+        _, version, _, _ = await self._locked(offset, self._read_header, offset)
+        return version
+
+    async def get(self, key: str) -> tuple[int, bytes | None]:
+        offset = await self._find(key)
+        header = await self._locked(offset, self._read_header, offset)
+        _, version, expires_at, length = header
+        if length == 0 or expires_at <= time.time():
+            return version, None
+        # Copied without the lock, the value is only returned if the slot was
+        # not changed meanwhile. Every `set` changes the expiry
+        start = offset + HEADER.size
+        value = self._map[start : start + length]
+        if await self._locked(offset, self._read_header, offset) == header:
+            return version, value
+        return await self._locked(offset, self._read_value, offset)
+
+    async def set(self, key: str, version: int, value: bytes, ttl: float) -> bool:
+        if not value or len(value) > self._max_value_size:
+            return False
+        offset = await self._find(key)
+        return await self._locked(
+            offset, self._write_value, offset, version, value, ttl
+        )
+
+    async def invalidate(self, key: str) -> int:
+        offset = await self._find(key)
+        return await self._locked(offset, self._invalidate, offset)
+
+    def _read_header(self, offset: int) -> tuple[int, int, float, int]:
+        return HEADER.unpack_from(self._map, offset)
+
+    def _read_value(self, offset: int) -> tuple[int, bytes | None]:
+        _, version, expires_at, length = HEADER.unpack_from(self._map, offset)
+        if length == 0 or expires_at <= time.time():
+            return version, None
+        start = offset + HEADER.size
+        return version, self._map[start : start + length]
+
+    def _write_value(self, offset: int, version: int, value: bytes, ttl: float) -> bool:
+        # Writes are rare, once per version, so the value is copied under the
+        # lock and readers copying it meanwhile retry
+        key_hash, current, current_expires_at, _ = HEADER.unpack_from(self._map, offset)
+        if current != version:
+            return False
+        expires_at = time.time() + ttl
+        if expires_at == current_expires_at:
+            expires_at = math.nextafter(expires_at, math.inf)
+        start = offset + HEADER.size
+        self._map[start : start + len(value)] = value
+        HEADER.pack_into(self._map, offset, key_hash, version, expires_at, len(value))
+        return True
+
+    def _invalidate(self, offset: int) -> int:
+        key_hash, version, _, _ = HEADER.unpack_from(self._map, offset)
+        HEADER.pack_into(self._map, offset, key_hash, version + 1, 0.0, 0)
+        return version + 1
+
+    def _claim(self, offset: int, key_hash: int) -> bool:
+        """Takes a free slot for `key_hash`, returns whether the slot is its."""
+
+        slot_hash, _, _, _ = HEADER.unpack_from(self._map, offset)
+        if slot_hash == 0:
+            HEADER.pack_into(self._map, offset, key_hash, 0, 0.0, 0)
+            slot_hash = key_hash
+        return slot_hash == key_hash
+
+    async def _find(self, key: str) -> int:
+        offset = self._offsets.get(key)
+        if offset is not None:
+            return offset
+
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        key_hash = int.from_bytes(digest, "little") or 1
+        for i in range(self._slots):
+            offset = (key_hash + i) % self._slots * self._slot_size
+            if await self._locked(offset, self._claim, offset, key_hash):
+                self._offsets[key] = offset
+                return offset
+        raise ValueError(f"No free slot for key {key!r}")
+
+    async def _locked(self, offset: int, func: Callable[..., T], *args: Any) -> T:
+        """Calls `func` with the slot at `offset` locked.
+
+        A slot held by another process or thread is waited for in the default
+        executor, so the event loop is not blocked.
+        """
+
+        if self._lock.acquire(offset, HEADER.size, blocking=False):
+            try:
+                return func(*args)
+            finally:
+                self._lock.release(offset, HEADER.size)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._call_locked, offset, func, *args
+        )
+
+    def _call_locked(self, offset: int, func: Callable[..., T], *args: Any) -> T:
+        self._lock.acquire(offset, HEADER.size)
+        try:
+            return func(*args)
+        finally:
+            self._lock.release(offset, HEADER.size)
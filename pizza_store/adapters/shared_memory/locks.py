@@ -0,0 +1,38 @@
+import errno
+import fcntl
+import threading
+
+
+class RangeLock:
+    """Exclusive lock on byte ranges of a file, between processes and threads.
+
+    `lockf` locks belong to the process, a thread of the process locking a
+    range another thread holds gets it too. Ranges are therefore also guarded
+    by one lock of the process, so threads of the default executor and the
+    event loop thread never hold a range together.
+    """
+
+    def __init__(self, fd: int) -> None:
+        self._fd = fd
+        self._lock = threading.Lock()
+
+    def acquire(self, offset: int, length: int, blocking: bool = True) -> bool:
+        """Locks the range, returns False if it is locked and not `blocking`."""
+
+        if not self._lock.acquire(blocking):
+            return False
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.lockf(self._fd, flags, length, offset)
+        except OSError as e:
+            self._lock.release()
+            if not blocking and e.errno in (errno.EACCES, errno.EAGAIN):
+                return False
+            raise
+        return True
+
+    def release(self, offset: int, length: int) -> None:
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, length, offset)
+        finally:
+            self._lock.release()
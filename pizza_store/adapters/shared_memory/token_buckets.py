@@ -0,0 +1,77 @@
+import asyncio
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import time
+
+from pizza_store.adapters.shared_memory.locks import RangeLock
+from pizza_store.services.auth.throttling import refill_and_take
+
+# key hash, tokens, updated at
+SLOT = struct.Struct("<Qdd")
+
+
+class SharedMemoryTokenBuckets:
+    """Token buckets shared by all processes that map the same file.
+
+    The file is a direct-mapped table of `slots` buckets. A slot is locked with
+    `RangeLock` on its byte range while a bucket is updated, a slot locked by
+    another process or thread is waited for in the default executor. A key whose slot is
+    taken by another key evicts it only if that bucket is idle, i.e. fully
+    refilled. Otherwise both keys share the bucket, which can only make limits
+    stricter.
+    """
+
+    def __init__(self, path: str, slots: int = 65536) -> None:
+        self._slots = slots
+        size = slots * SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+        self._lock = RangeLock(self._fd)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        retry_after = self._take(key, capacity, rate, blocking=False)
+        if retry_after is None:
+            # The slot is held, wait for it off the event loop
+            retry_after = await asyncio.get_running_loop().run_in_executor(
+                None, self._take, key, capacity, rate, True
+            )
+        return retry_after
+
+    def _take(
+        self, key: str, capacity: float, rate: float, blocking: bool
+    ) -> float | None:
+        """Returns None if the slot is locked and `blocking` is False."""
+
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        key_hash = int.from_bytes(digest, "little") or 1
+        offset = key_hash % self._slots * SLOT.size
+
+        if not self._lock.acquire(offset, SLOT.size, blocking):
+            return None
+        try:
+            now = time.time()
+            slot_hash, tokens, updated_at = SLOT.unpack_from(self._map, offset)
+            if slot_hash != key_hash:
+                idle = tokens + (now - updated_at) * rate >= capacity
+                if slot_hash == 0 or idle:
+                    tokens, updated_at = capacity, now
+            tokens, retry_after = refill_and_take(
+                tokens, updated_at, now, capacity, rate
+            )
+            SLOT.pack_into(self._map, offset, key_hash, tokens, now)
+        finally:
+            self._lock.release(offset, SLOT.size)
+        return retry_after
@@ -0,0 +1,390 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from queue import SimpleQueue
+from types import TracebackType
+from typing import Any, Literal, Protocol
+
+from pizza_store.settings import settings
+
+SpanKind = Literal["INTERNAL", "SERVER", "CLIENT"]
+SpanStatus = Literal["UNSET", "OK", "ERROR"]
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    """Identifies a span across processes, see W3C Trace Context.
+
+    Attributes:
+        trace_id: 128-bit id shared by all spans of a trace.
+        span_id: 64-bit id of the span.
+        sampled: Whether spans of the trace are exported.
+    """
+
+    trace_id: int
+    span_id: int
+    sampled: bool
+
+
+def parse_traceparent(value: str) -> SpanContext | None:
+    """Returns the span context of a `traceparent` header, None if invalid."""
+
+    match = _TRACEPARENT.match(value.strip())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == "ff" or (version == "00" and len(value.strip()) != 55):
+        return None
+    context = SpanContext(
+        trace_id=int(trace_id, 16),
+        span_id=int(span_id, 16),
+        sampled=bool(int(flags, 16) & 1),
+    )
+    if context.trace_id == 0 or context.span_id == 0:
+        return None
+    return context
+
+
+def format_traceparent(context: SpanContext) -> str:
+    return f"00-{context.trace_id:032x}-{context.span_id:016x}-0{int(context.sampled)}"
+
+
+class Span:
+    """Timed operation of a trace.
+
+    Spans of traces which are not sampled record nothing and are not exported.
+    """
+
+    __slots__ = (
+        "name",
+        "context",
+        "parent_id",
+        "kind",
+        "start_time",
+        "end_time",
+        "attributes",
+        "status",
+        "_tracer",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        context: SpanContext,
+        parent_id: int | None,
+        kind: SpanKind,
+        start_time: int,
+    ) -> None:
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_time = start_time  # ns since epoch
+        self.end_time: int | None = None
+        self.attributes: dict[str, str | int | float | bool] = {}
+        self.status: SpanStatus = "UNSET"
+        self._tracer = tracer
+
+    @property
+    def is_recording(self) -> bool:
+        return self.context.sampled and self.end_time is None
+
+    def set_attribute(self, key: str, value: str | int | float | bool) -> None:
+        if self.context.sampled:
+            self.attributes[key] = value
+
+    def set_status(self, status: SpanStatus) -> None:
+        if self.context.sampled:
+            self.status = status
+
+    def set_error(self, error: BaseException) -> None:
+        if self.context.sampled:
+            self.status = "ERROR"
+            self.attributes["exception.type"] = type(error).__qualname__
+
+    def end(self, end_time: int | None = None) -> None:
+        if not self.is_recording:
+            return
+        self.end_time = time.time_ns() if end_time is None else end_time
+        self._tracer._on_end(self)
+
+
+class SpanExporter(Protocol):
+    def export(self, resource: dict[str, str], spans: list[Span]) -> None:
+        ...
+
+    def shutdown(self) -> None:
+        ...
+
+
+# Context of traces which are not sampled, ids of their spans are not needed
+_NOT_SAMPLED = SpanContext(trace_id=0, span_id=0, sampled=False)
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def get_current_span() -> Span | None:
+    return _current_span.get()
+
+
+def is_trace_skipped() -> bool:
+    """Returns whether the current trace is not sampled.
+
+    Spans of such a trace are not exported, instrumentation checks this to
+    skip creating them.
+    """
+
+    span = _current_span.get()
+    return span is not None and not span.context.sampled
+
+
+class Tracer:
+    """Creates spans and exports sampled ones in batches.
+
+    New traces are sampled with probability `sample_rate`, spans with a
+    parent, local or from a `traceparent` header, follow its decision. Ids
+    are generated only for sampled traces, so skipping one costs little.
+    Finished spans are exported once `batch_size` are collected or
+    `flush_interval` seconds passed since the last export.
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        sample_rate: float = 1.0,
+        service_name: str = "pizza-store",
+        batch_size: int = 512,
+        flush_interval: float = 5.0,
+    ) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.resource = {"service.name": service_name}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._finished: list[Span] = []
+        self._flushed_at = time.monotonic()
+        # Shared by all spans of new traces which are not sampled, it records
+        # nothing, so nothing has to be created for them
+        self._not_sampled_span = Span(self, "", _NOT_SAMPLED, None, "INTERNAL", 0)
+
+    def start_span(
+        self,
+        name: str,
+        kind: SpanKind = "INTERNAL",
+        parent: SpanContext | None = None,
+        start_time: int | None = None,
+    ) -> Span:
+        """Starts a span, a child of `parent` or of the current span.
+
+        The span is not made current, see `span`.
+        """
+
+        if parent is None:
+            current = _current_span.get()
+            if current is not None:
+                parent = current.context
+        if parent is None:
+            if random.random() < self.sample_rate:
+                context = SpanContext(
+                    random.getrandbits(128) or 1, random.getrandbits(64) or 1, True
+                )
+            else:
+                return self._not_sampled_span
+        elif parent.sampled:
+            context = SpanContext(parent.trace_id, random.getrandbits(64) or 1, True)
+        elif parent is _NOT_SAMPLED:
+            return self._not_sampled_span
+        else:
+            # Not exported, the parent context is enough to propagate the trace
+            context = parent
+        return Span(
+            self,
+            name,
+            context,
+            None if parent is None else parent.span_id,
+            kind,
+            time.time_ns() if start_time is None else start_time,
+        )
+
+    def span(
+        self,
+        name: str,
+        kind: SpanKind = "INTERNAL",
+        parent: SpanContext | None = None,
+    ) -> "_ActiveSpan":
+        """Returns a context manager which runs the block in a new current span.
+
+        Errors raised in the block are recorded on the span.
+        """
+
+        return _ActiveSpan(self.start_span(name, kind, parent))
+
+    def flush(self) -> None:
+        spans, self._finished = self._finished, []
+        self._flushed_at = time.monotonic()
+        if spans:
+            self.exporter.export(self.resource, spans)
+
+    def shutdown(self) -> None:
+        self.flush()
+        self.exporter.shutdown()
+
+    def _on_end(self, span: Span) -> None:
+        self._finished.append(span)
+        if (
+            len(self._finished) >= self.batch_size
+            or time.monotonic() - self._flushed_at >= self.flush_interval
+        ):
+            self.flush()
+
+
+class _ActiveSpan:
+    # Not a generator context manager, it is entered for every request
+    __slots__ = ("span", "_token")
+
+    def __init__(self, span: Span) -> None:
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.span.set_error(exc)
+        self.span.end()
+
+
+def _otlp_value(value: str | int | float | bool) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": value}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()]
+
+
+def to_otlp_json(resource: dict[str, str], spans: list[Span]) -> dict[str, Any]:
+    """Returns spans as an OTLP/JSON `ExportTraceServiceRequest`."""
+
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes(resource)},
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "pizza_store"},
+                        "spans": [
+                            {
+                                "traceId": f"{s.context.trace_id:032x}",
+                                "spanId": f"{s.context.span_id:016x}",
+                                "parentSpanId": (
+                                    "" if s.parent_id is None else f"{s.parent_id:016x}"
+                                ),
+                                "name": s.name,
+                                "kind": f"SPAN_KIND_{s.kind}",
+                                "startTimeUnixNano": str(s.start_time),
+                                "endTimeUnixNano": str(s.end_time),
+                                "attributes": _otlp_attributes(s.attributes),
+                                "status": {"code": f"STATUS_CODE_{s.status}"},
+                            }
+                            for s in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class FileSpanExporter:
+    """Appends batches of spans to a file as OTLP/JSON lines.
+
+    The format is read by the OpenTelemetry collector `otlpjsonfile`
+    receiver. Every batch is one `write` to a file opened for appending, so
+    workers can share the file. Batches are serialized and written by a
+    background thread, so exports don't block the event loop.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._batches: SimpleQueue[
+            tuple[dict[str, str], list[Span]] | None
+        ] = SimpleQueue()
+        self._thread: threading.Thread | None = None
+
+    def export(self, resource: dict[str, str], spans: list[Span]) -> None:
+        if self._thread is None:
+            # Started on first export, so forked workers start their own
+            self._thread = threading.Thread(
+                target=self._write_batches, name="FileSpanExporter", daemon=True
+            )
+            self._thread.start()
+        self._batches.put((resource, spans))
+
+    def shutdown(self) -> None:
+        """Waits until exported batches are written."""
+
+        if self._thread is not None:
+            self._batches.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _write_batches(self) -> None:
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        try:
+            while (batch := self._batches.get()) is not None:
+                line = json.dumps(to_otlp_json(*batch), separators=(",", ":"))
+                os.write(fd, line.encode() + b"\n")
+        finally:
+            os.close(fd)
+
+
+class InMemorySpanExporter:
+    """Keeps the last `max_spans` exported spans."""
+
+    def __init__(self, max_spans: int = 10_000) -> None:
+        self.spans: deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, resource: dict[str, str], spans: list[Span]) -> None:
+        self.spans.extend(spans)
+
+    def shutdown(self) -> None:
+        pass
+
+
+@lru_cache
+def get_tracer() -> Tracer | None:
+    if not settings.tracing_enabled:
+        return None
+    exporter: SpanExporter
+    if settings.tracing_exporter == "file":
+        exporter = FileSpanExporter(settings.tracing_file_path)
+    else:
+        exporter = InMemorySpanExporter()
+    return Tracer(
+        exporter,
+        sample_rate=settings.tracing_sample_rate,
+        service_name=settings.tracing_service_name,
+    )
@@ -43,6 +43,9 @@ class Order:
         status: order status.
         address: address to deliver.
         note: customer note.
+        delivery_zone: name of the delivery zone of `address`, None if
+            delivery zones were not checked.
+        version: incremented by every update.
     """
 
     id: uuid.UUID
@@ -52,8 +55,25 @@ class Order:
     note: str
     address: str
     created_at: datetime.datetime
+    delivery_zone: str | None = None
+    version: int = 1
 
     @cached_property
     def total_price(self) -> Decimal:
         prices = [i.total_price for i in self.items]
         return sum(prices, Decimal(0))
+
+
+@dataclass(frozen=True)
+class OrderStatusSummary:
+    """Aggregated orders with the same status.
+
+    Attributes:
+        status: order status.
+        count: number of orders with that status.
+        total_price: sum of total prices of these orders.
+    """
+
+    status: OrderStatus
+    count: int
+    total_price: Decimal
@@ -1,3 +1,4 @@
+import datetime
 import uuid
 from dataclasses import dataclass
 from decimal import Decimal
@@ -82,3 +83,33 @@ class ProductVariantWithProduct(ProductVariant):
     """
 
     product: ProductWithoutVariants
+
+
+@dataclass(frozen=True)
+class CategoryWithProducts(Category):
+    """Product category with its products.
+
+    Attributes:
+        id: category id.
+        name: category name (example: "Pizzas").
+        products: list of category products.
+    """
+
+    products: list[Product]
+
+
+@dataclass(frozen=True)
+class PriceList:
+    """Product variant prices scheduled for a moment.
+
+    Attributes:
+        id: price list id.
+        activate_at: when prices are applied.
+        prices: new prices by product variant id.
+        activated_at: when prices were applied, None for pending price lists.
+    """
+
+    id: uuid.UUID
+    activate_at: datetime.datetime
+    prices: dict[uuid.UUID, Decimal]
+    activated_at: datetime.datetime | None
@@ -0,0 +1,75 @@
+from pizza_store.services.auth.exceptions import (
+    UserAlreadyExistsError,
+    UserNotFoundError,
+)
+from pizza_store.services.auth.interfaces import IAuthServiceRepo
+from pizza_store.services.auth.models import User, UserCreated, UserInRepoCreate
+from pizza_store.services.cache import ISharedCache
+from pizza_store.utils import TTLCache
+
+USERS_CACHE_KEY = "auth.users"
+
+
+class CachedAuthServiceRepo:
+    """`IAuthServiceRepo` that caches users of another repo by username.
+
+    Unknown usernames are cached too, for `negative_ttl` seconds, so repeated
+    logins with mistyped or guessed usernames don't reach the database. Users
+    created through this repo are invalidated. Users are never updated or
+    deleted by the app, so without a shared cache other workers only see a new
+    user after their negative entry expires. With one, creating a user clears
+    the caches of all workers.
+    """
+
+    def __init__(
+        self,
+        repo: IAuthServiceRepo,
+        max_size: int = 1000,
+        ttl: float = 300.0,
+        negative_max_size: int = 10_000,
+        negative_ttl: float = 60.0,
+        shared_cache: ISharedCache | None = None,
+    ) -> None:
+        self._repo = repo
+        self._shared_cache = shared_cache
+        # Shared cache version the cached users were loaded at
+        self._version = 0
+        self._users: TTLCache[str, User] = TTLCache(max_size, ttl)
+        self._unknown_usernames: TTLCache[str, bool] = TTLCache(
+            negative_max_size, negative_ttl
+        )
+
+    async def create_user(self, user: UserInRepoCreate) -> UserCreated:
+        if self._users.get(user.username) is not None:
+            raise UserAlreadyExistsError
+        try:
+            return await self._repo.create_user(user)
+        finally:
+            self.invalidate(user.username)
+            if self._shared_cache is not None:
+                await self._shared_cache.invalidate(USERS_CACHE_KEY)
+
+    async def get_user(self, username: str) -> User:
+        if self._shared_cache is not None:
+            version = await self._shared_cache.get_version(USERS_CACHE_KEY)
+            if version != self._version:
+                self._users.clear()
+                self._unknown_usernames.clear()
+                self._version = version
+        user = self._users.get(username)
+        if user is not None:
+            return user
+        if self._unknown_usernames.get(username):
+            raise UserNotFoundError
+
+        try:
+            user = await self._repo.get_user(username)
+        except UserNotFoundError:
+            self._unknown_usernames.set(username, True)
+            raise
+        self._users.set(username, user)
+        return user
+
+    def invalidate(self, username: str) -> None:
+        self._users.delete(username)
+        self._unknown_usernames.delete(username)
@@ -10,9 +10,25 @@ class InvalidAccessToken(Exception):
     """Will be raised if access token is not valid."""
 
 
+class InvalidRefreshToken(Exception):
+    """Will be raised if refresh token is not valid."""
+
+
 class UserNotFoundError(Exception):
     """Will be raised if user does not exist."""
 
 
 class UserAlreadyExistsError(Exception):
     """Will be raised if user already exists."""
+
+
+class TooManyLoginAttemptsError(Exception):
+    """Will be raised if login attempts limit is exceeded.
+
+    Attributes:
+        retry_after: seconds until the next attempt is allowed.
+    """
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(retry_after)
+        self.retry_after = retry_after
@@ -1,6 +1,6 @@
 import uuid
 from dataclasses import dataclass
-from typing import Literal
+from typing import Any, Literal
 
 
 @dataclass(frozen=True)
@@ -46,10 +46,52 @@ class UserToken:
     access_token: str
     token_type: Literal["Bearer"]
     expires_in: int
+    refresh_token: str | None = None
+
+
+@dataclass(frozen=True)
+class JWTKey:
+    """Asymmetric key for access tokens.
+
+    Attributes:
+        kid: key id, put to the token header.
+        algorithm: JWT algorithm (example: "RS256", "EdDSA").
+        signing_key: parsed private key, None for keys that only verify tokens
+            signed before rotation.
+        verifying_key: parsed public key.
+        jwk: public key in JWK format.
+    """
+
+    kid: str
+    algorithm: str
+    signing_key: Any
+    verifying_key: Any
+    jwk: dict[str, Any]
 
 
 @dataclass(frozen=True)
 class JWTConfig:
+    """Access tokens config.
+
+    Tokens are signed with the key `signing_kid` from `keys` if it is set,
+    otherwise with `secret` and `algorithm`. Tokens without "kid" header are
+    verified with `secret` if there are no `keys` or `accept_legacy_secret`
+    is set, so tokens issued before switching to keys stay valid until they
+    expire.
+
+    Refresh tokens are issued only if `refresh_expires_in` is set.
+    """
+
     algorithm: str
     secret: str
     expires_in: int
+    keys: tuple[JWTKey, ...] = ()
+    signing_kid: str | None = None
+    refresh_expires_in: int | None = None
+    accept_legacy_secret: bool = False
+
+    def get_key(self, kid: str) -> JWTKey | None:
+        for key in self.keys:
+            if key.kid == kid:
+                return key
+        return None
@@ -1,5 +1,6 @@
 import datetime
 import uuid
+from typing import Any
 
 import bcrypt
 import jwt
@@ -8,6 +9,7 @@ from pizza_store.services.auth.exceptions import (
     AccessForbiddenError,
     InvalidAccessToken,
     InvalidCredentialsError,
+    InvalidRefreshToken,
     UserNotFoundError,
 )
 from pizza_store.services.auth.interfaces import IAuthServiceRepo
@@ -19,12 +21,29 @@ from pizza_store.services.auth.models import (
     UserToken,
     UserTokenData,
 )
+from pizza_store.services.auth.throttling import LoginThrottler
+
+# Audience of refresh tokens. They are signed with the same key as access
+# tokens, and JWT libraries reject tokens with an audience unless the
+# verifier expects it, so services verifying access tokens with the
+# published keys don't accept refresh tokens
+REFRESH_TOKEN_AUDIENCE = "pizza-store:refresh"
 
 
 class AuthService:
-    def __init__(self, repo: IAuthServiceRepo, jwt_config: JWTConfig) -> None:
+    # Hash to check passwords of unknown users against, so their logins take
+    # as long as logins of existing users
+    _dummy_password_hash: str | None = None
+
+    def __init__(
+        self,
+        repo: IAuthServiceRepo,
+        jwt_config: JWTConfig,
+        login_throttler: LoginThrottler | None = None,
+    ) -> None:
         self._repo = repo
         self._jwt_config = jwt_config
+        self._login_throttler = login_throttler
 
     @classmethod
     def hash_password(cls, password: str) -> str:
@@ -43,29 +62,44 @@ class AuthService:
     def create_access_token(
         cls, user: UserTokenData, timestamp: int, config: JWTConfig
     ) -> str:
-        user_id = str(user.id)
-        expiration_timestamp = timestamp + config.expires_in
-        data = {
-            "sub": user_id,
-            "iat": timestamp,
-            "exp": expiration_timestamp,
-            "user": {"id": user_id, "is_admin": user.is_admin},
-        }
-        token = jwt.encode(data, config.secret, algorithm=config.algorithm)
-        return token
+        data = cls._create_token_data(user, timestamp, config.expires_in)
+        return cls._encode_token(data, config)
+
+    @classmethod
+    def create_refresh_token(
+        cls, user: UserTokenData, timestamp: int, config: JWTConfig
+    ) -> str:
+        assert config.refresh_expires_in is not None
+        data = cls._create_token_data(user, timestamp, config.refresh_expires_in)
+        data["aud"] = REFRESH_TOKEN_AUDIENCE
+        return cls._encode_token(data, config)
 
     @classmethod
     def decode_access_token(cls, token: str, config: JWTConfig) -> UserTokenData:
         """Decodes access token and returns user from it."""
 
         try:
-            token_data = jwt.decode(token, config.secret, algorithms=[config.algorithm])
+            token_data = cls._decode_token(token, config)
         except jwt.PyJWTError:
             raise InvalidAccessToken
         return UserTokenData(
             id=token_data["user"]["id"], is_admin=token_data["user"]["is_admin"]
         )
 
+    @classmethod
+    def decode_refresh_token(cls, token: str, config: JWTConfig) -> UserTokenData:
+        """Decodes refresh token and returns user from it."""
+
+        try:
+            token_data = cls._decode_token(
+                token, config, audience=REFRESH_TOKEN_AUDIENCE
+            )
+        except jwt.PyJWTError:
+            raise InvalidRefreshToken
+        return UserTokenData(
+            id=token_data["user"]["id"], is_admin=token_data["user"]["is_admin"]
+        )
+
     async def register_user(self, user: UserCreate) -> UserToken:
         """Registers a user.
 
@@ -81,16 +115,27 @@ class AuthService:
 
         return self._create_user_token(user_in_repo.id, is_admin)
 
-    async def login_user(self, user: UserLogIn) -> UserToken:
+    async def login_user(self, user: UserLogIn, ip: str | None = None) -> UserToken:
         """Login a user.
 
+        Attempts are throttled per `ip`, per username from it and per username
+        if the service has a login throttler.
+
         Returns:
             Token
+
+        Raises:
+            TooManyLoginAttemptsError: if login attempts limit is exceeded.
+            InvalidCredentialsError: if username or password is not valid.
         """
 
+        if self._login_throttler is not None:
+            await self._login_throttler.check(user.username, ip)
+
         try:
             user_in_repo = await self._repo.get_user(user.username)
         except UserNotFoundError:
+            self._verify_dummy_password(user.password)
             raise InvalidCredentialsError
 
         if not self.verify_password(user.password, user_in_repo.password_hash):
@@ -98,6 +143,34 @@ class AuthService:
 
         return self._create_user_token(user_in_repo.id, user_in_repo.is_admin)
 
+    def refresh_user_token(self, refresh_token: str) -> UserToken:
+        """Issues a new access token for the user of `refresh_token`.
+
+        The user is taken from the token, without looking it up in the repo,
+        so permission changes apply once the refresh token expires. The same
+        refresh token is returned, it is not extended.
+
+        Raises:
+            InvalidRefreshToken: if token is not valid or refresh tokens are disabled.
+        """
+
+        if self._jwt_config.refresh_expires_in is None:
+            raise InvalidRefreshToken
+        user = self.decode_refresh_token(refresh_token, self._jwt_config)
+        timestamp = int(datetime.datetime.now().timestamp())
+        access_token = self.create_access_token(user, timestamp, self._jwt_config)
+        return UserToken(
+            access_token=access_token,
+            token_type="Bearer",
+            expires_in=self._jwt_config.expires_in,
+            refresh_token=refresh_token,
+        )
+
+    def get_jwks(self) -> list[dict[str, Any]]:
+        """Returns public keys that verify access tokens in JWK format."""
+
+        return [key.jwk for key in self._jwt_config.keys]
+
     def get_user_from_token(self, token: str, is_admin_required: bool) -> UserTokenData:
         """Decodes token and returns user from it.
 
@@ -109,14 +182,68 @@ class AuthService:
             raise AccessForbiddenError
         return user_token_data
 
+    @classmethod
+    def _verify_dummy_password(cls, password: str) -> None:
+        if cls._dummy_password_hash is None:
+            cls._dummy_password_hash = cls.hash_password("dummy password")
+        cls.verify_password(password, cls._dummy_password_hash)
+
+    @classmethod
+    def _create_token_data(
+        cls, user: UserTokenData, timestamp: int, expires_in: int
+    ) -> dict[str, Any]:
+        user_id = str(user.id)
+        return {
+            "sub": user_id,
+            "iat": timestamp,
+            "exp": timestamp + expires_in,
+            "user": {"id": user_id, "is_admin": user.is_admin},
+        }
+
+    @classmethod
+    def _encode_token(cls, data: dict[str, Any], config: JWTConfig) -> str:
+        if config.signing_kid is None:
+            return jwt.encode(data, config.secret, algorithm=config.algorithm)
+
+        key = config.get_key(config.signing_kid)
+        assert key is not None and key.signing_key is not None
+        return jwt.encode(
+            data, key.signing_key, algorithm=key.algorithm, headers={"kid": key.kid}
+        )
+
+    @classmethod
+    def _decode_token(
+        cls, token: str, config: JWTConfig, audience: str | None = None
+    ) -> dict[str, Any]:
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            if config.keys and not config.accept_legacy_secret:
+                raise jwt.InvalidKeyError("Token without key id")
+            return jwt.decode(
+                token, config.secret, algorithms=[config.algorithm], audience=audience
+            )
+        key = config.get_key(kid)
+        if key is None:
+            raise jwt.InvalidKeyError(f"Unknown key {kid!r}")
+        return jwt.decode(
+            token, key.verifying_key, algorithms=[key.algorithm], audience=audience
+        )
+
     def _create_user_token(self, user_id: uuid.UUID, is_admin: bool) -> UserToken:
         timestamp = int(datetime.datetime.now().timestamp())
         config = self._jwt_config
+        user = UserTokenData(id=user_id, is_admin=is_admin)
         access_token = self.create_access_token(
-            user=UserTokenData(id=user_id, is_admin=is_admin),
-            timestamp=timestamp,
-            config=config,
+            user=user, timestamp=timestamp, config=config
         )
+        refresh_token = None
+        if config.refresh_expires_in is not None:
+            refresh_token = self.create_refresh_token(
+                user=user, timestamp=timestamp, config=config
+            )
         return UserToken(
-            access_token=access_token, token_type="Bearer", expires_in=config.expires_in
+            access_token=access_token,
+            token_type="Bearer",
+            expires_in=config.expires_in,
+            refresh_token=refresh_token,
         )
@@ -0,0 +1,117 @@
+import time
+from dataclasses import dataclass
+from typing import Protocol
+
+from pizza_store.services.auth.exceptions import TooManyLoginAttemptsError
+from pizza_store.utils import TTLCache
+
+
+class ITokenBuckets(Protocol):
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        """Takes one token from the bucket of `key`.
+
+        Buckets start full with `capacity` tokens and refill with `rate` tokens
+        per second.
+
+        Returns:
+            0 if token was taken, otherwise seconds until the next token.
+        """
+        ...
+
+
+def refill_and_take(
+    tokens: float, updated_at: float, now: float, capacity: float, rate: float
+) -> tuple[float, float]:
+    """Token bucket step shared by `ITokenBuckets` implementations.
+
+    Returns:
+        Tokens left in the bucket and the `take` result.
+    """
+
+    tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class InMemoryTokenBuckets:
+    """Token buckets of the current process."""
+
+    def __init__(self, max_size: int = 100_000) -> None:
+        # Idle buckets refill in at most a few minutes, one hour is plenty
+        self._buckets: TTLCache[str, tuple[float, float]] = TTLCache(max_size, 3600)
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        now = time.time()
+        tokens, updated_at = self._buckets.get(key) or (capacity, now)
+        tokens, retry_after = refill_and_take(tokens, updated_at, now, capacity, rate)
+        self._buckets.set(key, (tokens, now))
+        return retry_after
+
+
+@dataclass(frozen=True)
+class LoginThrottleConfig:
+    """Login attempts limits.
+
+    Attributes:
+        username_burst: attempts for one username from one IP address before
+            throttling.
+        username_per_minute: attempts per minute for one username from one IP
+            address after that.
+        ip_burst: attempts from one IP address before throttling.
+        ip_per_minute: attempts per minute from one IP address after that.
+        username_total_burst: attempts for one username from all IP addresses
+            before throttling.
+        username_total_per_minute: attempts per minute for one username from
+            all IP addresses after that.
+    """
+
+    username_burst: int
+    username_per_minute: float
+    ip_burst: int
+    ip_per_minute: float
+    username_total_burst: int
+    username_total_per_minute: float
+
+
+class LoginThrottler:
+    """Limits login attempts per client IP address and per username.
+
+    A username has a bucket per IP address and a larger one for all addresses.
+    Failed attempts from one address lock a user out of logging in only from
+    that address, and guessing a password from many addresses is still
+    limited by the total.
+    """
+
+    def __init__(self, buckets: ITokenBuckets, config: LoginThrottleConfig) -> None:
+        self._buckets = buckets
+        self._config = config
+
+    async def check(self, username: str, ip: str | None) -> None:
+        """Consumes a login attempt.
+
+        Raises:
+            TooManyLoginAttemptsError: if username or IP address is out of attempts.
+        """
+
+        config = self._config
+        if ip is not None:
+            retry_after = await self._buckets.take(
+                f"ip:{ip}", config.ip_burst, config.ip_per_minute / 60
+            )
+            if retry_after:
+                raise TooManyLoginAttemptsError(retry_after)
+            retry_after = await self._buckets.take(
+                f"user_ip:{username}:{ip}",
+                config.username_burst,
+                config.username_per_minute / 60,
+            )
+            if retry_after:
+                raise TooManyLoginAttemptsError(retry_after)
+        retry_after = await self._buckets.take(
+            f"user:{username}",
+            config.username_total_burst,
+            config.username_total_per_minute / 60,
+        )
+        if retry_after:
+            raise TooManyLoginAttemptsError(retry_after)
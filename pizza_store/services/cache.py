@@ -0,0 +1,65 @@
+import time
+from typing import Protocol
+
+
+class ISharedCache(Protocol):
+    """Versioned values shared by all workers.
+
+    Every key has a version which only grows. Invalidating a key increments
+    its version and drops its value, so workers which compare the version
+    with the one their local copy was loaded at notice changes made by other
+    workers. A value is stored for the version it was computed at and is
+    rejected if the key was invalidated meanwhile.
+    """
+
+    async def get_version(self, key: str) -> int:
+        ...
+
+    async def get(self, key: str) -> tuple[int, bytes | None]:
+        """Returns the version of `key` and its value, None if not stored."""
+        ...
+
+    async def set(self, key: str, version: int, value: bytes, ttl: float) -> bool:
+        """Stores the value of `key` for `ttl` seconds.
+
+        Returns:
+            Whether the value was stored, it is not if `version` is not the
+            current version or the value is too large.
+        """
+        ...
+
+    async def invalidate(self, key: str) -> int:
+        """Drops the value of `key`.
+
+        Returns:
+            The new version.
+        """
+        ...
+
+
+class InMemorySharedCache:
+    """`ISharedCache` of the current process."""
+
+    def __init__(self) -> None:
+        self._versions: dict[str, int] = {}
+        self._values: dict[str, tuple[float, bytes]] = {}
+
+    async def get_version(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    async def get(self, key: str) -> tuple[int, bytes | None]:
+        item = self._values.get(key)
+        if item is None or item[0] <= time.time():
+            return self._versions.get(key, 0), None
+        return self._versions.get(key, 0), item[1]
+
+    async def set(self, key: str, version: int, value: bytes, ttl: float) -> bool:
+        if self._versions.get(key, 0) != version:
+            return False
+        self._values[key] = (time.time() + ttl, value)
+        return True
+
+    async def invalidate(self, key: str) -> int:
+        version = self._versions[key] = self._versions.get(key, 0) + 1
+        self._values.pop(key, None)
+        return version
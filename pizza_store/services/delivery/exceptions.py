@@ -0,0 +1,6 @@
+class AddressNotFoundError(Exception):
+    """Will be raised if address can't be geocoded."""
+
+
+class AddressNotDeliverableError(Exception):
+    """Will be raised if address is outside of all delivery zones."""
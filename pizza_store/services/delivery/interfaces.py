@@ -0,0 +1,12 @@
+from typing import Protocol
+
+from pizza_store.services.delivery.models import Point
+
+
+class IGeocoder(Protocol):
+    async def geocode(self, address: str) -> Point | None:
+        """Returns the point of normalized `address`, None if it is unknown.
+
+        See `normalize_address`.
+        """
+        ...
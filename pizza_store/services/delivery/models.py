@@ -0,0 +1,32 @@
+from dataclasses import dataclass
+
+# x (longitude), y (latitude)
+Point = tuple[float, float]
+# Closed or open ring of points, the last point connects to the first one
+Ring = list[Point]
+
+
+@dataclass(frozen=True)
+class DeliveryPolygon:
+    """Polygon with optional holes.
+
+    Attributes:
+        exterior: outer boundary.
+        holes: areas inside `exterior` which are not part of the polygon.
+    """
+
+    exterior: Ring
+    holes: list[Ring]
+
+
+@dataclass(frozen=True)
+class DeliveryZone:
+    """Area orders are delivered to.
+
+    Attributes:
+        name: zone name stored on orders (example: "center").
+        polygons: parts of the zone.
+    """
+
+    name: str
+    polygons: list[DeliveryPolygon]
@@ -0,0 +1,75 @@
+import re
+
+from pizza_store.services.delivery.exceptions import (
+    AddressNotDeliverableError,
+    AddressNotFoundError,
+)
+from pizza_store.services.delivery.interfaces import IGeocoder
+from pizza_store.services.delivery.models import DeliveryZone, Point
+from pizza_store.services.delivery.zones import ZoneIndex
+from pizza_store.utils import TTLCache
+
+
+def normalize_address(address: str) -> str:
+    """Returns `address` in lower case with punctuation runs as single spaces.
+
+    Geocoders and the geocoding cache are keyed by normalized addresses, so
+    "Baker street 221 B" and "baker street, 221 b" are geocoded once.
+    """
+
+    return re.sub(r"[\s,.;]+", " ", address.casefold()).strip()
+
+
+class DeliveryService:
+    """Finds delivery zones of addresses.
+
+    Geocoded points are cached by normalized address, addresses the geocoder
+    does not know are cached for `negative_ttl` seconds, so only new
+    addresses reach the geocoder. Zones are looked up in the in-memory
+    `ZoneIndex`.
+    """
+
+    def __init__(
+        self,
+        zones: ZoneIndex,
+        geocoder: IGeocoder,
+        cache_size: int = 100_000,
+        cache_ttl: float = 24 * 60 * 60,
+        negative_ttl: float = 60.0,
+    ) -> None:
+        self._zones = zones
+        self._geocoder = geocoder
+        self._points: TTLCache[str, Point] = TTLCache(cache_size, cache_ttl)
+        self._unknown_addresses: TTLCache[str, bool] = TTLCache(
+            cache_size, negative_ttl
+        )
+
+    def get_zones(self) -> list[DeliveryZone]:
+        return self._zones.zones()
+
+    async def get_zone(self, address: str) -> DeliveryZone:
+        """Returns the delivery zone of `address`.
+
+        Raises:
+            AddressNotFoundError: if address can't be geocoded.
+            AddressNotDeliverableError: if address is outside of all zones.
+        """
+
+        zone = self._zones.find(await self._geocode(normalize_address(address)))
+        if zone is None:
+            raise AddressNotDeliverableError
+        return zone
+
+    async def _geocode(self, address: str) -> Point:
+        point = self._points.get(address)
+        if point is not None:
+            return point
+        if self._unknown_addresses.get(address):
+            raise AddressNotFoundError
+
+        point = await self._geocoder.geocode(address)
+        if point is None:
+            self._unknown_addresses.set(address, True)
+            raise AddressNotFoundError
+        self._points.set(address, point)
+        return point
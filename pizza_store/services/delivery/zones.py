@@ -0,0 +1,80 @@
+import math
+
+from pizza_store.services.delivery.models import (
+    DeliveryPolygon,
+    DeliveryZone,
+    Point,
+    Ring,
+)
+
+# min x, min y, max x, max y
+BBox = tuple[float, float, float, float]
+
+
+class ZoneIndex:
+    """Grid index of delivery zones for point lookups.
+
+    Every polygon is registered in the square cells of `cell_size` its
+    bounding box overlaps, so a lookup only tests the few polygons of one
+    cell. Cell size should be about the size of the smallest zone, a smaller
+    one multiplies cells of large zones. Overlapping zones are resolved in
+    favor of the zone listed first.
+    """
+
+    def __init__(self, zones: list[DeliveryZone], cell_size: float = 0.01) -> None:
+        self._cell_size = cell_size
+        self._zones = zones
+        self._cells: dict[tuple[int, int], list[tuple[int, BBox, DeliveryPolygon]]] = {}
+
+        for order, zone in enumerate(zones):
+            for polygon in zone.polygons:
+                bbox = _bbox(polygon.exterior)
+                min_x, min_y = self._cell(bbox[0], bbox[1])
+                max_x, max_y = self._cell(bbox[2], bbox[3])
+                for cx in range(min_x, max_x + 1):
+                    for cy in range(min_y, max_y + 1):
+                        self._cells.setdefault((cx, cy), []).append(
+                            (order, bbox, polygon)
+                        )
+        for candidates in self._cells.values():
+            candidates.sort(key=lambda c: c[0])
+
+    def zones(self) -> list[DeliveryZone]:
+        return list(self._zones)
+
+    def find(self, point: Point) -> DeliveryZone | None:
+        """Returns the zone containing `point`, None if it is not in any zone."""
+
+        x, y = point
+        for order, (min_x, min_y, max_x, max_y), polygon in self._cells.get(
+            self._cell(x, y), ()
+        ):
+            if min_x <= x <= max_x and min_y <= y <= max_y and _contains(polygon, x, y):
+                return self._zones[order]
+        return None
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return math.floor(x / self._cell_size), math.floor(y / self._cell_size)
+
+
+def _bbox(ring: Ring) -> BBox:
+    xs = [x for x, _ in ring]
+    ys = [y for _, y in ring]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _contains(polygon: DeliveryPolygon, x: float, y: float) -> bool:
+    return _ring_contains(polygon.exterior, x, y) and not any(
+        _ring_contains(hole, x, y) for hole in polygon.holes
+    )
+
+
+def _ring_contains(ring: Ring, x: float, y: float) -> bool:
+    # Even-odd ray casting to the right of the point
+    inside = False
+    xj, yj = ring[-1]
+    for xi, yi in ring:
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        xj, yj = xi, yi
+    return inside
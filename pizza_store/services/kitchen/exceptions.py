@@ -0,0 +1,2 @@
+class OrderNotQueuedError(Exception):
+    """Will be raised if order is not in the kitchen queue."""
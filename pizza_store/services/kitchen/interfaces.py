@@ -0,0 +1,19 @@
+import uuid
+from typing import Iterable, Protocol
+
+from pizza_store.entities.orders import Order
+from pizza_store.entities.products import Category
+from pizza_store.services.orders.models import OrdersFilter
+
+
+class IKitchenOrdersRepo(Protocol):
+    async def get_orders(self, filter: OrdersFilter | None = None) -> list[Order]:
+        ...
+
+
+class IKitchenMenu(Protocol):
+    async def get_variant_categories(
+        self, ids: Iterable[uuid.UUID]
+    ) -> dict[uuid.UUID, Category]:
+        """Returns categories of product variants, unknown variants are left out."""
+        ...
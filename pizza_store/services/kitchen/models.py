@@ -0,0 +1,59 @@
+import datetime
+import uuid
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class KitchenConfig:
+    """Kitchen capacity and preparation times.
+
+    Attributes:
+        stations: number of orders prepared at the same time.
+        promise_seconds: time from order creation to the order being ready
+            that customers are promised.
+        base_prep_seconds: preparation time of every order.
+        item_prep_seconds: preparation time of one item of a category which
+            has no time in `category_prep_seconds`.
+        category_prep_seconds: preparation time of one item by category name.
+    """
+
+    stations: int = 4
+    promise_seconds: float = 45 * 60
+    base_prep_seconds: float = 5 * 60
+    item_prep_seconds: float = 2 * 60
+    category_prep_seconds: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class KitchenOrder:
+    """Open order in the kitchen queue.
+
+    Attributes:
+        id: order id.
+        created_at: when the order was created.
+        delivery_zone: delivery zone of the order, None if zones are not checked.
+        prep_seconds: estimated preparation time.
+        start_by: latest moment to start preparing the order to have it ready
+            in promised time, orders are prepared by it.
+    """
+
+    id: uuid.UUID
+    created_at: datetime.datetime
+    delivery_zone: str | None
+    prep_seconds: float
+    start_by: datetime.datetime
+
+
+@dataclass(frozen=True)
+class QueuedOrder:
+    """Kitchen order with its place in the queue.
+
+    Attributes:
+        order: kitchen order.
+        position: number of orders prepared before it.
+        eta: when the order is estimated to be ready.
+    """
+
+    order: KitchenOrder
+    position: int
+    eta: datetime.datetime
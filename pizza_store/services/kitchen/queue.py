@@ -0,0 +1,126 @@
+import datetime
+import heapq
+import itertools
+import json
+import uuid
+from typing import Iterable
+
+from pizza_store.services.kitchen.models import KitchenOrder
+
+# start by, created at, insertion number, order
+_Entry = tuple[float, float, int, KitchenOrder]
+
+
+def dump_kitchen_orders(orders: list[KitchenOrder]) -> bytes:
+    """Serializes orders to share the queue between processes, see
+    `load_kitchen_orders`. Orders can be in any order, e.g. `KitchenQueue.orders`.
+    """
+
+    return json.dumps(
+        [
+            [
+                str(o.id),
+                o.created_at.isoformat(),
+                o.delivery_zone,
+                o.prep_seconds,
+                o.start_by.isoformat(),
+            ]
+            for o in orders
+        ]
+    ).encode("utf-8")
+
+
+def load_kitchen_orders(data: bytes) -> list[KitchenOrder]:
+    return [
+        KitchenOrder(
+            id=uuid.UUID(id),
+            created_at=datetime.datetime.fromisoformat(created_at),
+            delivery_zone=delivery_zone,
+            prep_seconds=prep_seconds,
+            start_by=datetime.datetime.fromisoformat(start_by),
+        )
+        for id, created_at, delivery_zone, prep_seconds, start_by in json.loads(data)
+    ]
+
+
+class KitchenQueue:
+    """Heap of open orders by `KitchenOrder.start_by`, then by creation time.
+
+    Putting and removing an order is O(log n). Replaced and removed orders
+    are left in the heap and skipped, it is compacted once they outnumber
+    current orders. The first `limit` orders are listed and the position of
+    an order is found without sorting the whole queue. Building a queue from
+    orders in any order is O(n).
+    """
+
+    def __init__(self, orders: Iterable[KitchenOrder] = ()) -> None:
+        self._counter = itertools.count()
+        # Current heap entry of every order
+        self._entries: dict[uuid.UUID, _Entry] = {}
+        for order in orders:
+            self._entries[order.id] = self._entry(order)
+        self._heap = list(self._entries.values())
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, id: uuid.UUID) -> KitchenOrder | None:
+        entry = self._entries.get(id)
+        return None if entry is None else entry[-1]
+
+    def put(self, order: KitchenOrder) -> None:
+        """Adds an order or replaces an order with the same id."""
+
+        entry = self._entry(order)
+        self._entries[order.id] = entry
+        heapq.heappush(self._heap, entry)
+        self._compact()
+
+    def remove(self, id: uuid.UUID) -> None:
+        if self._entries.pop(id, None) is not None:
+            self._compact()
+
+    def orders(self) -> list[KitchenOrder]:
+        """Returns orders in no particular order, in O(n)."""
+
+        return [entry[-1] for entry in self._entries.values()]
+
+    def position(self, id: uuid.UUID) -> int | None:
+        """Returns the number of orders before the order, None if not queued.
+
+        O(n), orders are counted without sorting them.
+        """
+
+        entry = self._entries.get(id)
+        if entry is None:
+            return None
+        # Entries differ by insertion number, orders are never compared
+        return sum(1 for e in self._entries.values() if e < entry)
+
+    def head(self, limit: int | None = None) -> list[KitchenOrder]:
+        """Returns the first `limit` orders in preparation order, all if None."""
+
+        entries = (e for e in self._heap if self._is_current(e))
+        if limit is None:
+            return [e[-1] for e in sorted(entries)]
+        return [e[-1] for e in heapq.nsmallest(limit, entries)]
+
+    def _entry(self, order: KitchenOrder) -> _Entry:
+        return (
+            order.start_by.timestamp(),
+            order.created_at.timestamp(),
+            next(self._counter),
+            order,
+        )
+
+    def _is_current(self, entry: _Entry) -> bool:
+        return self._entries.get(entry[-1].id) is entry
+
+    def _compact(self) -> None:
+        heap = self._heap
+        while heap and not self._is_current(heap[0]):
+            heapq.heappop(heap)
+        if len(heap) > 2 * len(self._entries) + 16:
+            self._heap = list(self._entries.values())
+            heapq.heapify(self._heap)
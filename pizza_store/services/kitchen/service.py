@@ -0,0 +1,300 @@
+import asyncio
+import datetime
+import heapq
+import time
+import uuid
+from typing import Callable, Iterable
+
+from pizza_store.services.cache import ISharedCache
+from pizza_store.services.kitchen.exceptions import OrderNotQueuedError
+from pizza_store.services.kitchen.interfaces import IKitchenMenu, IKitchenOrdersRepo
+from pizza_store.services.kitchen.models import KitchenConfig, KitchenOrder, QueuedOrder
+from pizza_store.services.kitchen.queue import (
+    KitchenQueue,
+    dump_kitchen_orders,
+    load_kitchen_orders,
+)
+from pizza_store.services.orders.models import (
+    OrderCreate,
+    OrderItemCreate,
+    OrdersFilter,
+    OrderUpdate,
+)
+
+KITCHEN_CACHE_KEY = "kitchen.queue"
+
+
+class KitchenService:
+    """Queue of uncompleted orders in the order they should be prepared.
+
+    The queue is built from the repo on first use and kept current by order
+    created and updated events, see `KitchenQueue`. Orders are prepared by the
+    latest moment they can be started to be ready in promised time, so large
+    orders are started earlier. ETAs assume `KitchenConfig.stations` orders
+    are prepared at once, each started when its turn comes but not before it
+    was created.
+
+    Orders changed by other workers are seen once the queue is reloaded, after
+    `queue_ttl` seconds. With a shared cache events invalidate the queues of
+    other workers and the updated queue is stored for them, so they reload it
+    from the cache and the repo is queried once per `queue_ttl` and not once
+    per event and worker. Storing it serializes the open orders of the store
+    without sorting them, O(n) per event in the number of open orders.
+
+    A service queues the orders of one store, the repo is bound to the same
+    store.
+    """
+
+    def __init__(
+        self,
+        repo: IKitchenOrdersRepo,
+        menu: IKitchenMenu,
+        config: KitchenConfig = KitchenConfig(),
+        queue_ttl: float = 60.0,
+        shared_cache: ISharedCache | None = None,
+        store: str = "default",
+    ) -> None:
+        self._repo = repo
+        self._menu = menu
+        self._config = config
+        self._queue_ttl = queue_ttl
+        self._shared_cache = shared_cache
+        self._cache_key = f"{KITCHEN_CACHE_KEY}:{store}"
+        # Shared cache version the queue was loaded at
+        self._version = 0
+        self._queue: KitchenQueue | None = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        # Incremented by every event, a queue loaded concurrently with an
+        # event may miss it and is not kept
+        self._generation = 0
+
+    def estimate_prep_seconds(self, items: Iterable[tuple[str, int]]) -> float:
+        """Returns preparation time of an order of (category name, amount) items."""
+
+        config = self._config
+        return config.base_prep_seconds + sum(
+            config.category_prep_seconds.get(category, config.item_prep_seconds)
+            * amount
+            for category, amount in items
+        )
+
+    async def get_queue(
+        self, delivery_zone: str | None = None, limit: int | None = None
+    ) -> list[QueuedOrder]:
+        """Returns queued orders with ETAs in preparation order.
+
+        Args:
+            delivery_zone: only orders to this zone, positions and ETAs still
+                count orders to other zones.
+            limit: maximum number of orders.
+        """
+
+        queue = await self._get_queue()
+        orders = queue.head(limit if delivery_zone is None else None)
+        queued = self._with_etas(orders)
+        if delivery_zone is not None:
+            queued = [q for q in queued if q.order.delivery_zone == delivery_zone]
+        return queued[:limit]
+
+    async def get_queued_order(self, id: uuid.UUID) -> QueuedOrder:
+        """Returns a queued order with its ETA.
+
+        Raises:
+            OrderNotQueuedError: if order is not uncompleted.
+        """
+
+        queue = await self._get_queue()
+        position = queue.position(id)
+        if position is None:
+            raise OrderNotQueuedError
+        return self._with_etas(queue.head(position + 1))[-1]
+
+    async def rebuild(self) -> None:
+        """Loads the queue from the repo, called on startup."""
+
+        await self.invalidate()
+        await self._get_queue()
+
+    async def order_created(self, id: uuid.UUID, order: OrderCreate) -> None:
+        created_at = datetime.datetime.now(datetime.timezone.utc)
+        kitchen_order = await self._get_kitchen_order(
+            id, created_at, order.delivery_zone, order.items
+        )
+        if kitchen_order is None:
+            await self.invalidate()
+            return
+        await self._update_queue(lambda queue: queue.put(kitchen_order))
+
+    async def order_updated(self, order: OrderUpdate) -> None:
+        if order.status != "UNCOMPLETED":
+            await self._update_queue(lambda queue: queue.remove(order.id))
+            return
+
+        queued = self._queue.get(order.id) if self._queue is not None else None
+        if queued is None:
+            # Reopened order, its creation time is in the repo
+            await self.invalidate()
+            return
+        kitchen_order = await self._get_kitchen_order(
+            order.id,
+            queued.created_at,
+            order.delivery_zone or queued.delivery_zone,
+            order.items,
+        )
+        if kitchen_order is None:
+            await self.invalidate()
+            return
+        await self._update_queue(lambda queue: queue.put(kitchen_order))
+
+    async def invalidate(self) -> None:
+        """Drops the queue, it is loaded from the repo on next read."""
+
+        self._generation += 1
+        self._queue = None
+        if self._shared_cache is not None:
+            await self._shared_cache.invalidate(self._cache_key)
+
+    async def _get_kitchen_order(
+        self,
+        id: uuid.UUID,
+        created_at: datetime.datetime,
+        delivery_zone: str | None,
+        items: list[OrderItemCreate],
+    ) -> KitchenOrder | None:
+        """Returns None if a variant is not on the menu index."""
+
+        categories = await self._menu.get_variant_categories(
+            item.product_variant_id for item in items
+        )
+        if len(categories) != len({item.product_variant_id for item in items}):
+            return None
+        return self._kitchen_order(
+            id,
+            created_at,
+            delivery_zone,
+            [(categories[item.product_variant_id].name, item.amount) for item in items],
+        )
+
+    def _kitchen_order(
+        self,
+        id: uuid.UUID,
+        created_at: datetime.datetime,
+        delivery_zone: str | None,
+        items: list[tuple[str, int]],
+    ) -> KitchenOrder:
+        prep_seconds = self.estimate_prep_seconds(items)
+        return KitchenOrder(
+            id=id,
+            created_at=created_at,
+            delivery_zone=delivery_zone,
+            prep_seconds=prep_seconds,
+            start_by=created_at
+            + datetime.timedelta(seconds=self._config.promise_seconds - prep_seconds),
+        )
+
+    def _with_etas(self, orders: list[KitchenOrder]) -> list[QueuedOrder]:
+        now = time.time()
+        # Moments stations are free at
+        stations = [0.0] * self._config.stations
+        queued = []
+        for position, order in enumerate(orders):
+            start = max(heapq.heappop(stations), order.created_at.timestamp())
+            ready = max(now, start + order.prep_seconds)
+            heapq.heappush(stations, ready)
+            queued.append(
+                QueuedOrder(
+                    order=order,
+                    position=position,
+                    eta=datetime.datetime.fromtimestamp(ready, datetime.timezone.utc),
+                )
+            )
+        return queued
+
+    async def _get_queue(self) -> KitchenQueue:
+        version = self._version
+        if self._shared_cache is not None:
+            version = await self._shared_cache.get_version(self._cache_key)
+        if self._is_queue_fresh(version):
+            assert self._queue is not None
+            return self._queue
+
+        async with self._lock:
+            if self._is_queue_fresh(version):
+                assert self._queue is not None
+                return self._queue
+
+            generation = self._generation
+            loaded_at = time.monotonic()
+            if self._shared_cache is None:
+                queue = KitchenQueue(await self._load_orders())
+            else:
+                version, queue = await self._load_shared_queue()
+            if generation == self._generation:
+                self._queue = queue
+                self._loaded_at = loaded_at
+                self._version = version
+            return queue
+
+    async def _load_shared_queue(self) -> tuple[int, KitchenQueue]:
+        """Loads the queue stored by another worker or from the repo."""
+
+        assert self._shared_cache is not None
+        version, data = await self._shared_cache.get(self._cache_key)
+        if data is not None:
+            return version, KitchenQueue(load_kitchen_orders(data))
+        orders = await self._load_orders()
+        # Not stored if another worker changed orders meanwhile
+        await self._shared_cache.set(
+            self._cache_key, version, dump_kitchen_orders(orders), self._queue_ttl
+        )
+        return version, KitchenQueue(orders)
+
+    async def _load_orders(self) -> list[KitchenOrder]:
+        orders = await self._repo.get_orders(OrdersFilter(statuses=["UNCOMPLETED"]))
+        return [
+            self._kitchen_order(
+                o.id,
+                o.created_at,
+                o.delivery_zone,
+                [(i.product_variant.product.category.name, i.amount) for i in o.items],
+            )
+            for o in orders
+        ]
+
+    def _is_queue_fresh(self, version: int) -> bool:
+        return (
+            self._queue is not None
+            and version == self._version
+            and time.monotonic() - self._loaded_at < self._queue_ttl
+        )
+
+    async def _update_queue(self, update: Callable[[KitchenQueue], None]) -> None:
+        """Applies an order event to the queue.
+
+        With a shared cache the event invalidates the queues of other workers
+        and the updated queue is stored for them. If another worker changed
+        orders since the queue was loaded, it is dropped and reloaded on next
+        read.
+        """
+
+        self._generation += 1
+        if self._queue is not None:
+            update(self._queue)
+        if self._shared_cache is None:
+            return
+
+        version = await self._shared_cache.invalidate(self._cache_key)
+        queue = self._queue
+        if queue is None:
+            return
+        if version != self._version + 1:
+            self._queue = None
+            return
+        self._version = version
+        await self._shared_cache.set(
+            self._cache_key,
+            version,
+            dump_kitchen_orders(queue.orders()),
+            self._queue_ttl,
+        )
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+from pizza_store.services.orders.interfaces import (
+    IKitchenQueue,
+    IOrdersJournal,
+    IOrdersServiceRepo,
+)
+from pizza_store.services.orders.models import JournaledOrder
+from pizza_store.services.products.exceptions import ProductVariantNotFoundError
+
+logger = logging.getLogger(__name__)
+
+VARIANT_NOT_FOUND_REASON = "Product variant does not exist."
+
+
+class OrdersJournalDrainer:
+    """Moves journaled orders into the repo in batches.
+
+    Orders are committed in the journal only after the repo stored them.
+    `IOrdersServiceRepo.create_journaled_orders` skips already stored intake ids,
+    so replaying a batch after a crash between the two steps does not duplicate
+    orders. The kitchen queue is invalidated after every stored batch, so it
+    loads the new orders with their ids in the repo.
+
+    Orders which can't be stored because a product variant was deleted after
+    they were accepted are stored as rejected, so they are not lost and their
+    intake ids report the outcome. A batch is committed only after all of its
+    orders are stored either way.
+    """
+
+    def __init__(
+        self,
+        repo: IOrdersServiceRepo,
+        journal: IOrdersJournal,
+        batch_size: int = 100,
+        interval: float = 0.05,
+        max_retries: int = 5,
+        retry_delay: float = 0.1,
+        kitchen: IKitchenQueue | None = None,
+    ) -> None:
+        self._repo = repo
+        self._journal = journal
+        self._batch_size = batch_size
+        self._interval = interval
+        self._max_retries = max_retries
+        self._retry_delay = retry_delay
+        self._kitchen = kitchen
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops the background task and drains what is left in the journal."""
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            while await self.drain_once():
+                pass
+        except Exception:
+            # Orders stay in the journal and are drained after restart
+            logger.exception("Failed to drain orders journal on shutdown")
+
+    async def drain_once(self) -> int:
+        """Stores one batch of journaled orders.
+
+        Returns:
+            Number of orders removed from the journal.
+        """
+
+        batch = self._journal.pending(self._batch_size)
+        if not batch:
+            return 0
+
+        try:
+            await self._store_with_retries(batch)
+        except ProductVariantNotFoundError:
+            # One bad order must not block the whole batch
+            rejected = []
+            for order in batch:
+                try:
+                    await self._store_with_retries([order])
+                except ProductVariantNotFoundError:
+                    logger.warning(
+                        "Rejecting journaled order %s: product variant does not exist",
+                        order.id,
+                    )
+                    rejected.append(order)
+            if rejected:
+                await self._with_retries(
+                    lambda: self._repo.reject_journaled_orders(
+                        rejected, VARIANT_NOT_FOUND_REASON
+                    ),
+                    len(rejected),
+                )
+
+        await self._journal.commit([order.id for order in batch])
+        if self._kitchen is not None:
+            await self._kitchen.invalidate()
+        return len(batch)
+
+    async def _store_with_retries(self, batch: list[JournaledOrder]) -> None:
+        await self._with_retries(
+            lambda: self._repo.create_journaled_orders(batch), len(batch)
+        )
+
+    async def _with_retries(
+        self, store: Callable[[], Awaitable[Any]], count: int
+    ) -> None:
+        attempt = 0
+        while True:
+            try:
+                await store()
+                return
+            except ProductVariantNotFoundError:
+                raise
+            except Exception:
+                attempt += 1
+                if attempt > self._max_retries:
+                    raise
+                logger.exception(
+                    "Failed to store %d journaled orders, retry %d of %d",
+                    count,
+                    attempt,
+                    self._max_retries,
+                )
+                await asyncio.sleep(self._retry_delay * 2 ** (attempt - 1))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                drained = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Orders stay in the journal and are retried on the next pass
+                logger.exception("Failed to drain orders journal")
+                drained = 0
+            if drained < self._batch_size:
+                await asyncio.sleep(self._interval)
@@ -1,2 +1,26 @@
 class OrderNotFoundError(Exception):
     """Will be raised if order does not exist."""
+
+
+class InvalidOrderError(Exception):
+    """Will be raised if order data is not valid."""
+
+
+class OrderVersionConflictError(Exception):
+    """Will be raised if order was changed since the expected version."""
+
+
+class InvalidOrderTransitionError(Exception):
+    """Will be raised if order status can't be changed to the requested one."""
+
+
+class OrderRejectedError(Exception):
+    """Will be raised if journaled order was rejected when it was stored.
+
+    Attributes:
+        reason: why the order was not stored.
+    """
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
@@ -1,12 +1,18 @@
+import datetime
 import uuid
-from typing import Protocol
+from decimal import Decimal
+from typing import Iterable, Protocol
 
-from pizza_store.entities.orders import Order, OrderStatus
+from pizza_store.entities.orders import Order, OrderStatusSummary
+from pizza_store.services.delivery.models import DeliveryZone
 from pizza_store.services.orders.models import (
+    JournaledOrder,
     OrderCreate,
     OrderCreated,
+    OrdersFilter,
     OrderUpdate,
     OrderUpdated,
+    RejectedOrder,
 )
 
 
@@ -14,11 +20,84 @@ class IOrdersServiceRepo(Protocol):
     async def create_order(self, order: OrderCreate) -> OrderCreated:
         ...
 
-    async def get_orders(self, status: OrderStatus | None = None) -> list[Order]:
+    async def create_journaled_orders(
+        self, orders: list[JournaledOrder]
+    ) -> list[OrderCreated]:
+        ...
+
+    async def get_orders(self, filter: OrdersFilter | None = None) -> list[Order]:
         ...
 
     async def get_order(self, id: uuid.UUID) -> Order:
         ...
 
+    async def get_order_by_intake_id(self, intake_id: uuid.UUID) -> Order:
+        ...
+
+    async def get_orders_summary(self) -> list[OrderStatusSummary]:
+        ...
+
+    async def archive_orders(
+        self, created_before: datetime.datetime, batch_size: int
+    ) -> int:
+        ...
+
+    async def get_archived_order(self, id: uuid.UUID) -> Order:
+        ...
+
+    async def reject_journaled_orders(
+        self, orders: list[JournaledOrder], reason: str
+    ) -> None:
+        """Stores journaled orders which can't be created as rejected.
+
+        Orders whose intake id is already rejected are skipped.
+        """
+        ...
+
+    async def get_rejected_order(self, intake_id: uuid.UUID) -> RejectedOrder:
+        ...
+
     async def update_order(self, order: OrderUpdate) -> OrderUpdated:
         ...
+
+
+class IOrdersJournal(Protocol):
+    async def append(self, order: JournaledOrder) -> None:
+        ...
+
+    def pending(self, limit: int) -> list[JournaledOrder]:
+        ...
+
+    async def commit(self, ids: list[uuid.UUID]) -> None:
+        ...
+
+
+class IProductVariants(Protocol):
+    async def get_variant_prices(
+        self, ids: Iterable[uuid.UUID]
+    ) -> dict[uuid.UUID, Decimal]:
+        """Returns prices of product variants, unknown variants are left out."""
+        ...
+
+
+class IDeliveryZones(Protocol):
+    async def get_zone(self, address: str) -> DeliveryZone:
+        """Returns the delivery zone of `address`.
+
+        Raises:
+            AddressNotFoundError: if address can't be geocoded.
+            AddressNotDeliverableError: if address is outside of all zones.
+        """
+        ...
+
+
+class IKitchenQueue(Protocol):
+    async def order_created(self, id: uuid.UUID, order: OrderCreate) -> None:
+        ...
+
+    async def order_updated(self, order: OrderUpdate) -> None:
+        ...
+
+    async def invalidate(self) -> None:
+        """Drops queued orders, they are loaded from the repo on next read."""
+        ...
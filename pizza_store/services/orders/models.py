@@ -1,5 +1,7 @@
+import datetime
 import uuid
 from dataclasses import dataclass
+from decimal import Decimal
 
 from pizza_store.entities.orders import OrderStatus
 
@@ -12,22 +14,64 @@ class OrderItemCreate:
 
 @dataclass(frozen=True)
 class OrderCreate:
-    """Data for creating order."""
+    """Data for creating order.
+
+    `delivery_zone` is set by `OrdersService` from `address`.
+    """
 
     phone: str
     items: list[OrderItemCreate]
     note: str
     address: str
+    delivery_zone: str | None = None
 
 
 @dataclass(frozen=True)
 class OrderCreated:
+    """Created order.
+
+    Attributes:
+        id: order id.
+        total_price: order total by current variant prices, None if the
+            service was not given variant prices.
+    """
+
     id: uuid.UUID
+    total_price: Decimal | None = None
+
+
+@dataclass(frozen=True)
+class OrdersFilter:
+    """Filter for orders listing, `None` fields are not filtered by.
+
+    Attributes:
+        statuses: orders with any of these statuses.
+        created_from: orders created at or after this moment.
+        created_to: orders created before this moment.
+        phone: orders with this customer phone.
+        delivery_zone: orders to this delivery zone.
+    """
+
+    statuses: list[OrderStatus] | None = None
+    created_from: datetime.datetime | None = None
+    created_to: datetime.datetime | None = None
+    phone: str | None = None
+    delivery_zone: str | None = None
 
 
 @dataclass(frozen=True)
 class OrderUpdate:
-    """Data for updating order."""
+    """Data for updating order.
+
+    `delivery_zone` is set by `OrdersService` from `address` and
+    `from_statuses` from `status`.
+
+    Attributes:
+        version: the order is only updated if it still has this version,
+            None updates any version.
+        from_statuses: the order is only updated if it has one of these
+            statuses, None updates any status.
+    """
 
     id: uuid.UUID
     phone: str
@@ -35,8 +79,52 @@ class OrderUpdate:
     status: OrderStatus
     note: str
     address: str
+    delivery_zone: str | None = None
+    version: int | None = None
+    from_statuses: list[OrderStatus] | None = None
 
 
 @dataclass(frozen=True)
 class OrderUpdated:
+    """Updated order.
+
+    Attributes:
+        id: order id.
+        total_price: order total by current variant prices, None if the
+            service was not given variant prices.
+        version: order version after the update.
+    """
+
+    id: uuid.UUID
+    total_price: Decimal | None = None
+    version: int | None = None
+
+
+@dataclass(frozen=True)
+class JournaledOrder:
+    """Order accepted into the intake journal but not yet stored in the database.
+
+    Attributes:
+        id: intake id returned to the customer, stored as `intake_id` on insert.
+        order: accepted order data.
+        accepted_at: moment the order was accepted, used as its `created_at`.
+    """
+
+    id: uuid.UUID
+    order: OrderCreate
+    accepted_at: datetime.datetime
+
+
+@dataclass(frozen=True)
+class RejectedOrder:
+    """Journaled order that was accepted but could not be stored.
+
+    Attributes:
+        id: intake id returned to the customer.
+        reason: why the order was not stored.
+        rejected_at: moment the drainer rejected the order.
+    """
+
     id: uuid.UUID
+    reason: str
+    rejected_at: datetime.datetime
@@ -1,27 +1,301 @@
+import asyncio
+import dataclasses
+import datetime
+import time
 import uuid
+from decimal import Decimal
 
-from pizza_store.entities.orders import Order, OrderStatus
-from pizza_store.services.orders.interfaces import IOrdersServiceRepo
+from pizza_store.entities.orders import Order, OrderStatus, OrderStatusSummary
+from pizza_store.services.orders.exceptions import (
+    InvalidOrderError,
+    OrderNotFoundError,
+    OrderRejectedError,
+)
+from pizza_store.services.orders.interfaces import (
+    IDeliveryZones,
+    IKitchenQueue,
+    IOrdersJournal,
+    IOrdersServiceRepo,
+    IProductVariants,
+)
 from pizza_store.services.orders.models import (
+    JournaledOrder,
     OrderCreate,
     OrderCreated,
+    OrderItemCreate,
+    OrdersFilter,
     OrderUpdate,
     OrderUpdated,
 )
+from pizza_store.services.products.exceptions import ProductVariantNotFoundError
+
+# `orders::OrderItem.amount` is int16
+MAX_ORDER_ITEM_AMOUNT = 32767
+# Statuses an order can be updated to from each status, completed and
+# cancelled orders can still be edited but not reopened
+ORDER_STATUS_TRANSITIONS: dict[OrderStatus, set[OrderStatus]] = {
+    "UNCOMPLETED": {"UNCOMPLETED", "COMPLETED", "CANCELLED"},
+    "COMPLETED": {"COMPLETED"},
+    "CANCELLED": {"CANCELLED"},
+}
 
 
 class OrdersService:
-    def __init__(self, repo: IOrdersServiceRepo) -> None:
+    """Orders service.
+
+    Items of created and updated orders are merged by variant and validated
+    before the repo is called. With `variants`, unknown variants are rejected
+    without a database round trip too, and order totals are returned. With
+    `delivery`, addresses outside of delivery zones are rejected and the zone
+    is stored on the order. With `kitchen`, created and updated orders are
+    passed to the kitchen queue.
+
+    Updates are compare-and-set: the repo applies an update only if the order
+    still has the expected version and a status it can be changed from, see
+    `ORDER_STATUS_TRANSITIONS`, in one conditional statement. Concurrent
+    writers fail with a conflict instead of overwriting each other.
+    """
+
+    def __init__(
+        self,
+        repo: IOrdersServiceRepo,
+        journal: IOrdersJournal | None = None,
+        summary_ttl: float = 5.0,
+        variants: IProductVariants | None = None,
+        delivery: IDeliveryZones | None = None,
+        kitchen: IKitchenQueue | None = None,
+    ) -> None:
         self._repo = repo
+        self._journal = journal
+        self._variants = variants
+        self._delivery = delivery
+        self._kitchen = kitchen
+        self._summary_ttl = summary_ttl
+        self._summary: list[OrderStatusSummary] | None = None
+        self._summary_loaded_at = 0.0
+        self._summary_lock = asyncio.Lock()
+        # Incremented by every mutation, a summary loaded concurrently with
+        # a mutation may miss it and is not cached
+        self._summary_generation = 0
+
+    @classmethod
+    def validate_order(cls, order: OrderCreate) -> None:
+        """Checks order data that can be checked without the database.
+
+        Raises:
+            InvalidOrderError: if order has no items or item amount is out of range.
+        """
+
+        if not order.items:
+            raise InvalidOrderError
+        cls.validate_order_items(order.items)
+
+    @classmethod
+    def validate_order_items(cls, items: list[OrderItemCreate]) -> None:
+        """Raises `InvalidOrderError` if an item amount is out of range."""
+
+        for item in items:
+            if not 0 < item.amount <= MAX_ORDER_ITEM_AMOUNT:
+                raise InvalidOrderError
+
+    @classmethod
+    def get_from_statuses(cls, status: OrderStatus) -> list[OrderStatus]:
+        """Returns statuses an order can be changed to `status` from."""
+
+        return [s for s, to in ORDER_STATUS_TRANSITIONS.items() if status in to]
+
+    @classmethod
+    def merge_order_items(cls, items: list[OrderItemCreate]) -> list[OrderItemCreate]:
+        """Merges items of the same variant into one, summing their amounts.
+
+        Items keep the order of the first item of each variant.
+        """
+
+        amounts: dict[uuid.UUID, int] = {}
+        for item in items:
+            amounts[item.product_variant_id] = (
+                amounts.get(item.product_variant_id, 0) + item.amount
+            )
+        if len(amounts) == len(items):
+            return items
+        return [
+            OrderItemCreate(product_variant_id=id, amount=amount)
+            for id, amount in amounts.items()
+        ]
 
     async def create_order(self, order: OrderCreate) -> OrderCreated:
-        return await self._repo.create_order(order)
+        """Creates an order.
 
-    async def get_orders(self, status: OrderStatus | None = None) -> list[Order]:
-        return await self._repo.get_orders(status)
+        If the service has a journal the order is only validated and appended
+        to it. Returned id is the intake id, the order is stored in the database
+        later by `OrdersJournalDrainer`.
+
+        Raises:
+            InvalidOrderError: if order has no items or item amount is out of range.
+            ProductVariantNotFoundError: if a variant does not exist.
+            AddressNotFoundError: if address can't be geocoded.
+            AddressNotDeliverableError: if address is outside of delivery zones.
+        """
+
+        order = dataclasses.replace(order, items=self.merge_order_items(order.items))
+        self.validate_order(order)
+        total_price = await self._get_total_price(order.items)
+        order = dataclasses.replace(
+            order, delivery_zone=await self._get_delivery_zone(order.address)
+        )
+        if self._journal is None:
+            result = await self._repo.create_order(order)
+            self._invalidate_summary()
+            if self._kitchen is not None:
+                await self._kitchen.order_created(result.id, order)
+            return dataclasses.replace(result, total_price=total_price)
+
+        journaled_order = JournaledOrder(
+            id=uuid.uuid4(),
+            order=order,
+            accepted_at=datetime.datetime.now(datetime.timezone.utc),
+        )
+        await self._journal.append(journaled_order)
+        # Journaled orders are counted once drained, the summary TTL covers
+        # that. The drainer invalidates the kitchen queue
+        return OrderCreated(id=journaled_order.id, total_price=total_price)
+
+    async def get_orders(self, filter: OrdersFilter | None = None) -> list[Order]:
+        return await self._repo.get_orders(filter)
 
     async def get_order(self, id: uuid.UUID) -> Order:
-        return await self._repo.get_order(id)
+        """Returns an order, looking it up in the archive if it was archived.
+
+        `id` can be the intake id returned for a journaled order, which is
+        found once the order is drained.
+
+        Raises:
+            OrderNotFoundError: if order does not exist or is not drained yet.
+            OrderRejectedError: if journaled order was rejected by the drainer.
+        """
+
+        try:
+            return await self._repo.get_order(id)
+        except OrderNotFoundError:
+            pass
+        try:
+            return await self._repo.get_order_by_intake_id(id)
+        except OrderNotFoundError:
+            pass
+        try:
+            return await self._repo.get_archived_order(id)
+        except OrderNotFoundError:
+            rejected = await self._repo.get_rejected_order(id)
+        raise OrderRejectedError(rejected.reason)
+
+    async def archive_orders(
+        self, older_than: datetime.timedelta, batch_size: int = 1000
+    ) -> int:
+        """Moves completed and cancelled orders older than `older_than` to the archive.
+
+        Orders are moved in batches of `batch_size`, each in its own transaction.
+
+        Returns:
+            Number of archived orders.
+        """
+
+        created_before = datetime.datetime.now(datetime.timezone.utc) - older_than
+        archived = 0
+        while True:
+            count = await self._repo.archive_orders(created_before, batch_size)
+            if count == 0:
+                break
+            archived += count
+        if archived:
+            self._invalidate_summary()
+        return archived
+
+    async def get_orders_summary(self) -> list[OrderStatusSummary]:
+        """Returns number and total price of orders per status.
+
+        Result is cached for `summary_ttl` seconds or until an order is created
+        or updated through this service.
+        """
+
+        if self._is_summary_fresh():
+            assert self._summary is not None
+            return self._summary
+
+        async with self._summary_lock:
+            if self._is_summary_fresh():
+                assert self._summary is not None
+                return self._summary
+
+            generation = self._summary_generation
+            loaded_at = time.monotonic()
+            summary = await self._repo.get_orders_summary()
+            if generation == self._summary_generation:
+                self._summary = summary
+                self._summary_loaded_at = loaded_at
+            return summary
 
     async def update_order(self, order: OrderUpdate) -> OrderUpdated:
-        return await self._repo.update_order(order)
+        """Replaces order data and items.
+
+        If `order.version` is set, the order is only updated if it was not
+        changed since that version.
+
+        Raises:
+            InvalidOrderError: if item amount is out of range.
+            ProductVariantNotFoundError: if a variant does not exist.
+            AddressNotFoundError: if address can't be geocoded.
+            AddressNotDeliverableError: if address is outside of delivery zones.
+            OrderNotFoundError: if order does not exist.
+            OrderVersionConflictError: if order version is not `order.version`.
+            InvalidOrderTransitionError: if order status can't be changed to
+                `order.status`.
+        """
+
+        order = dataclasses.replace(order, items=self.merge_order_items(order.items))
+        self.validate_order_items(order.items)
+        total_price = await self._get_total_price(order.items)
+        order = dataclasses.replace(
+            order,
+            delivery_zone=await self._get_delivery_zone(order.address),
+            from_statuses=self.get_from_statuses(order.status),
+        )
+        result = await self._repo.update_order(order)
+        self._invalidate_summary()
+        if self._kitchen is not None:
+            await self._kitchen.order_updated(order)
+        return dataclasses.replace(result, total_price=total_price)
+
+    async def _get_total_price(self, items: list[OrderItemCreate]) -> Decimal | None:
+        """Returns total price of items, None without `variants`.
+
+        Raises:
+            ProductVariantNotFoundError: if a variant does not exist.
+        """
+
+        if self._variants is None:
+            return None
+        prices = await self._variants.get_variant_prices(
+            item.product_variant_id for item in items
+        )
+        if len(prices) != len(items):
+            raise ProductVariantNotFoundError
+        return sum(
+            (prices[item.product_variant_id] * item.amount for item in items),
+            Decimal(0),
+        )
+
+    async def _get_delivery_zone(self, address: str) -> str | None:
+        if self._delivery is None:
+            return None
+        zone = await self._delivery.get_zone(address)
+        return zone.name
+
+    def _is_summary_fresh(self) -> bool:
+        return (
+            self._summary is not None
+            and time.monotonic() - self._summary_loaded_at < self._summary_ttl
+        )
+
+    def _invalidate_summary(self) -> None:
+        self._summary_generation += 1
+        self._summary = None
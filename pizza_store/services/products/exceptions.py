@@ -16,3 +16,15 @@ class ProductNotFoundError(Exception):
 
 class ProductVariantNotFoundError(Exception):
     """Will be raised if product variant does not exist."""
+
+
+class InvalidMenuRowsError(Exception):
+    """Will be raised if menu rows can't be imported."""
+
+
+class InvalidPriceError(Exception):
+    """Will be raised if price is negative."""
+
+
+class PriceListNotFoundError(Exception):
+    """Will be raised if pending price list does not exist."""
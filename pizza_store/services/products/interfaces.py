@@ -1,23 +1,41 @@
+import datetime
 import uuid
-from typing import Protocol
+from decimal import Decimal
+from typing import Iterable, Protocol
 
-from pizza_store.entities.products import Category, Product
+from pizza_store.entities.products import (
+    Category,
+    CategoryWithProducts,
+    PriceList,
+    Product,
+)
 from pizza_store.services.products.models import (
     CategoryCreate,
     CategoryCreated,
     CategoryDeleted,
     CategoryUpdate,
     CategoryUpdated,
+    CategoryUpsert,
+    CategoryUpserted,
+    MenuChangeLog,
+    MenuRow,
+    PriceListCreate,
+    PriceListCreated,
+    PriceListDeleted,
     ProductCreate,
     ProductCreated,
     ProductDeleted,
     ProductUpdate,
     ProductUpdated,
+    ProductUpsert,
+    ProductUpserted,
     ProductVariantCreate,
     ProductVariantCreated,
     ProductVariantDeleted,
     ProductVariantUpdate,
     ProductVariantUpdated,
+    VariantPrice,
+    VariantPricesUpdated,
 )
 
 
@@ -31,15 +49,27 @@ class IProductsServiceRepo(Protocol):
     async def get_category(self, id: uuid.UUID) -> Category:
         ...
 
+    async def get_menu(self) -> list[CategoryWithProducts]:
+        ...
+
+    async def import_menu_rows(self, rows: list[MenuRow]) -> None:
+        ...
+
     async def delete_category(self, id: uuid.UUID) -> CategoryDeleted:
         ...
 
     async def update_category(self, category: CategoryUpdate) -> CategoryUpdated:
         ...
 
+    async def upsert_category(self, category: CategoryUpsert) -> CategoryUpserted:
+        ...
+
     async def create_product(self, product: ProductCreate) -> ProductCreated:
         ...
 
+    async def upsert_product(self, product: ProductUpsert) -> ProductUpserted:
+        ...
+
     async def get_products(self, category_id: uuid.UUID | None = None) -> list[Product]:
         ...
 
@@ -64,3 +94,38 @@ class IProductsServiceRepo(Protocol):
         self, product_variant: ProductVariantUpdate
     ) -> ProductVariantUpdated:
         ...
+
+    async def update_variant_prices(
+        self, prices: list[VariantPrice]
+    ) -> VariantPricesUpdated:
+        ...
+
+    async def get_variant_prices(
+        self, ids: Iterable[uuid.UUID]
+    ) -> dict[uuid.UUID, Decimal]:
+        """Returns prices of variants, unknown variants are left out."""
+        ...
+
+    async def create_price_list(self, price_list: PriceListCreate) -> PriceListCreated:
+        ...
+
+    async def get_price_lists(self) -> list[PriceList]:
+        ...
+
+    async def delete_price_list(self, id: uuid.UUID) -> PriceListDeleted:
+        ...
+
+    async def activate_price_lists(self, now: datetime.datetime) -> list[PriceList]:
+        ...
+
+    async def get_menu_changes(self, since: int | None) -> MenuChangeLog:
+        """Returns changes after version `since`, the whole menu if None."""
+        ...
+
+    async def compact_menu_changes(self, keep_versions: int) -> int:
+        """Deletes changes older than the last `keep_versions` versions.
+
+        Returns:
+            Number of deleted changes.
+        """
+        ...
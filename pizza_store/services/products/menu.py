@@ -0,0 +1,252 @@
+import dataclasses
+import json
+import uuid
+from decimal import Decimal
+from typing import Iterable
+
+from pizza_store.entities.products import (
+    Category,
+    CategoryWithProducts,
+    Product,
+    ProductVariant,
+)
+
+
+def dump_menu(menu: list[CategoryWithProducts]) -> bytes:
+    """Serializes the menu to share it between processes, see `load_menu`."""
+
+    return json.dumps(
+        [
+            [
+                str(c.id),
+                c.name,
+                [
+                    [
+                        str(p.id),
+                        p.name,
+                        p.description,
+                        p.image_url,
+                        [
+                            [
+                                str(v.id),
+                                v.name,
+                                str(v.weight),
+                                v.weight_units,
+                                str(v.price),
+                            ]
+                            for v in p.variants
+                        ],
+                    ]
+                    for p in c.products
+                ],
+            ]
+            for c in menu
+        ],
+        separators=(",", ":"),
+    ).encode()
+
+
+def load_menu(data: bytes) -> list[CategoryWithProducts]:
+    menu = []
+    for category_id, category_name, products in json.loads(data):
+        category = Category(id=uuid.UUID(category_id), name=category_name)
+        menu.append(
+            CategoryWithProducts(
+                id=category.id,
+                name=category.name,
+                products=[
+                    Product(
+                        id=uuid.UUID(id),
+                        name=name,
+                        category=category,
+                        description=description,
+                        image_url=image_url,
+                        variants=[
+                            ProductVariant(
+                                id=uuid.UUID(v[0]),
+                                name=v[1],
+                                weight=Decimal(v[2]),
+                                weight_units=v[3],
+                                price=Decimal(v[4]),
+                            )
+                            for v in variants
+                        ],
+                    )
+                    for id, name, description, image_url, variants in products
+                ],
+            )
+        )
+    return menu
+
+
+class StaleMenuIndexError(Exception):
+    """Will be raised if mutation refers to entity that is not in the index."""
+
+
+class MenuIndex:
+    """In-memory category -> products index of the whole menu.
+
+    Built from one full menu load and kept current by applying the same
+    mutations that were done in the repo. Listings are cached until the next
+    mutation of the index, returned lists must not be modified. Variants are
+    also indexed by id, so orders are priced without loading products.
+    """
+
+    def __init__(self, menu: list[CategoryWithProducts]) -> None:
+        self._categories: dict[uuid.UUID, Category] = {}
+        self._products: dict[uuid.UUID, dict[uuid.UUID, Product]] = {}
+        self._product_category: dict[uuid.UUID, uuid.UUID] = {}
+        self._variant_product: dict[uuid.UUID, uuid.UUID] = {}
+        self._variants: dict[uuid.UUID, ProductVariant] = {}
+        self._listings: dict[uuid.UUID | None, list[Product]] = {}
+        self._menu: list[CategoryWithProducts] | None = None
+
+        for c in menu:
+            self.put_category(Category(id=c.id, name=c.name))
+            for p in c.products:
+                self.put_product(p)
+
+    def categories(self) -> list[Category]:
+        return list(self._categories.values())
+
+    def get_category(self, id: uuid.UUID) -> Category:
+        try:
+            return self._categories[id]
+        except KeyError:
+            raise StaleMenuIndexError
+
+    def get_product(self, id: uuid.UUID) -> Product:
+        try:
+            return self._products[self._product_category[id]][id]
+        except KeyError:
+            raise StaleMenuIndexError
+
+    def get_variant_product_id(self, id: uuid.UUID) -> uuid.UUID:
+        try:
+            return self._variant_product[id]
+        except KeyError:
+            raise StaleMenuIndexError
+
+    def get_variant_prices(self, ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, Decimal]:
+        """Returns prices of variants, unknown variants are left out."""
+
+        variants = self._variants
+        return {id: variants[id].price for id in ids if id in variants}
+
+    def get_variant_categories(
+        self, ids: Iterable[uuid.UUID]
+    ) -> dict[uuid.UUID, Category]:
+        """Returns categories of variants, unknown variants are left out."""
+
+        return {
+            id: self._categories[self._product_category[self._variant_product[id]]]
+            for id in ids
+            if id in self._variant_product
+        }
+
+    def products(self, category_id: uuid.UUID | None = None) -> list[Product]:
+        """Returns products of category or of the whole menu if `category_id` is None."""
+
+        listing = self._listings.get(category_id)
+        if listing is None:
+            if category_id is None:
+                listing = [p for ps in self._products.values() for p in ps.values()]
+            else:
+                listing = list(self._products.get(category_id, {}).values())
+            self._listings[category_id] = listing
+        return listing
+
+    def menu(self) -> list[CategoryWithProducts]:
+        if self._menu is None:
+            self._menu = [
+                CategoryWithProducts(id=c.id, name=c.name, products=self.products(c.id))
+                for c in self._categories.values()
+            ]
+        return self._menu
+
+    def put_category(self, category: Category) -> None:
+        """Adds a category or renames an existing one."""
+
+        self._categories[category.id] = category
+        products = self._products.setdefault(category.id, {})
+        for id, p in products.items():
+            products[id] = dataclasses.replace(p, category=category)
+        self._invalidate(category.id)
+
+    def remove_category(self, id: uuid.UUID) -> None:
+        """Removes a category with its products like `on target delete` does."""
+
+        self._categories.pop(id, None)
+        for product_id in list(self._products.get(id, {})):
+            self.remove_product(product_id)
+        self._products.pop(id, None)
+        self._invalidate(id)
+
+    def put_product(self, product: Product) -> None:
+        """Adds a product or replaces an existing one.
+
+        Raises:
+            StaleMenuIndexError: if product category is not in the index.
+        """
+
+        category = self.get_category(product.category.id)
+        self.remove_product(product.id)
+        product = dataclasses.replace(product, category=category)
+        self._products[category.id][product.id] = product
+        self._product_category[product.id] = category.id
+        for v in product.variants:
+            self._variant_product[v.id] = product.id
+            self._variants[v.id] = v
+        self._invalidate(category.id)
+
+    def remove_product(self, id: uuid.UUID) -> None:
+        category_id = self._product_category.pop(id, None)
+        if category_id is None:
+            return
+        product = self._products[category_id].pop(id)
+        for v in product.variants:
+            self._variant_product.pop(v.id, None)
+            self._variants.pop(v.id, None)
+        self._invalidate(category_id)
+
+    def put_variant(self, product_id: uuid.UUID, variant: ProductVariant) -> None:
+        """Adds a variant to a product or replaces an existing one.
+
+        Raises:
+            StaleMenuIndexError: if product is not in the index.
+        """
+
+        product = self.get_product(product_id)
+        variants = [variant if v.id == variant.id else v for v in product.variants]
+        if variant.id not in self._variant_product:
+            variants.append(variant)
+        self.put_product(dataclasses.replace(product, variants=variants))
+
+    def set_variant_prices(self, prices: dict[uuid.UUID, Decimal]) -> None:
+        """Changes prices of variants, replacing each product once.
+
+        Raises:
+            StaleMenuIndexError: if a variant is not in the index.
+        """
+
+        product_ids = {self.get_variant_product_id(id) for id in prices}
+        for product_id in product_ids:
+            product = self.get_product(product_id)
+            variants = [
+                dataclasses.replace(v, price=prices[v.id]) if v.id in prices else v
+                for v in product.variants
+            ]
+            self.put_product(dataclasses.replace(product, variants=variants))
+
+    def remove_variant(self, id: uuid.UUID) -> None:
+        product_id = self._variant_product.get(id)
+        if product_id is None:
+            return
+        product = self.get_product(product_id)
+        variants = [v for v in product.variants if v.id != id]
+        self.put_product(dataclasses.replace(product, variants=variants))
+
+    def _invalidate(self, category_id: uuid.UUID) -> None:
+        self._listings.pop(category_id, None)
+        self._listings.pop(None, None)
+        self._menu = None
@@ -1,6 +1,17 @@
+import datetime
 import uuid
 from dataclasses import dataclass
 from decimal import Decimal
+from typing import Literal
+
+from pizza_store.entities.products import (
+    Category,
+    ProductVariant,
+    ProductWithoutVariants,
+)
+
+MenuEntity = Literal["category", "product", "variant"]
+MenuChangeOp = Literal["upsert", "delete"]
 
 
 @dataclass(frozen=True)
@@ -29,6 +40,17 @@ class CategoryUpdated:
     id: uuid.UUID
 
 
+@dataclass(frozen=True)
+class CategoryUpsert:
+    name: str
+
+
+@dataclass(frozen=True)
+class CategoryUpserted:
+    id: uuid.UUID
+    created: bool
+
+
 @dataclass(frozen=True)
 class ProductCreate:
     name: str
@@ -61,6 +83,20 @@ class ProductUpdated:
     id: uuid.UUID
 
 
+@dataclass(frozen=True)
+class ProductUpsert:
+    name: str
+    category_id: uuid.UUID
+    description: str
+    image_url: str
+
+
+@dataclass(frozen=True)
+class ProductUpserted:
+    id: uuid.UUID
+    created: bool
+
+
 @dataclass(frozen=True)
 class ProductVariantCreate:
     product_id: uuid.UUID
@@ -92,3 +128,127 @@ class ProductVariantUpdated:
 @dataclass(frozen=True)
 class ProductVariantDeleted:
     id: uuid.UUID
+
+
+@dataclass(frozen=True)
+class VariantPrice:
+    id: uuid.UUID
+    price: Decimal
+
+
+@dataclass(frozen=True)
+class VariantPricesUpdated:
+    ids: list[uuid.UUID]
+
+
+@dataclass(frozen=True)
+class PriceListCreate:
+    activate_at: datetime.datetime
+    prices: list[VariantPrice]
+
+
+@dataclass(frozen=True)
+class PriceListCreated:
+    id: uuid.UUID
+
+
+@dataclass(frozen=True)
+class PriceListDeleted:
+    id: uuid.UUID
+
+
+@dataclass(frozen=True)
+class MenuRow:
+    """Row of an imported or exported menu.
+
+    A row is a category, optionally with a product of it and a variant of the
+    product. Rows are denormalized: every row of a product repeats all of its
+    fields, and the last row wins on import.
+
+    Attributes:
+        line: line number of the row in the file.
+    """
+
+    line: int
+    category: str
+    product: str = ""
+    description: str = ""
+    image_url: str = ""
+    variant: str = ""
+    weight: Decimal | None = None
+    weight_units: str = ""
+    price: Decimal | None = None
+
+
+@dataclass(frozen=True)
+class MenuRowError:
+    line: int
+    message: str
+
+
+@dataclass(frozen=True)
+class MenuImported:
+    rows: int
+    errors: list[MenuRowError]
+
+
+@dataclass(frozen=True)
+class MenuChange:
+    """Entity created, updated or deleted by a menu mutation.
+
+    Attributes:
+        version: menu version of the mutation, all changes of one mutation
+            share it.
+    """
+
+    version: int
+    entity: MenuEntity
+    id: uuid.UUID
+    op: MenuChangeOp
+
+
+@dataclass(frozen=True)
+class MenuChangeLog:
+    """Menu changes since a version with the current state of changed entities.
+
+    Attributes:
+        version: current menu version.
+        compacted_through: changes up to this version are deleted.
+        changes: changes since the requested version, oldest first. Empty for
+            the whole menu.
+        categories: changed categories, all categories for the whole menu.
+        products: changed products, all products for the whole menu.
+        variants: changed variants by product id, all variants for the whole
+            menu.
+    """
+
+    version: int
+    compacted_through: int
+    changes: list[MenuChange]
+    categories: list[Category]
+    products: list[ProductWithoutVariants]
+    variants: dict[uuid.UUID, list[ProductVariant]]
+
+
+@dataclass(frozen=True)
+class MenuChanges:
+    """What a client needs to update its copy of the menu to `version`.
+
+    Deleting a category deletes its products and deleting a product deletes
+    its variants, their deletions are not listed separately.
+
+    Attributes:
+        version: current menu version.
+        snapshot: whether this is the whole menu, which replaces the copy.
+        categories: created or updated categories.
+        products: created or updated products.
+        variants: created or updated variants by product id.
+        deleted: deleted entities.
+    """
+
+    version: int
+    snapshot: bool
+    categories: list[Category]
+    products: list[ProductWithoutVariants]
+    variants: dict[uuid.UUID, list[ProductVariant]]
+    deleted: list[MenuChange]
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+
+from pizza_store.services.products.service import ProductsService
+
+logger = logging.getLogger(__name__)
+
+
+class PriceListScheduler:
+    """Activates due price lists every `interval` seconds in background."""
+
+    def __init__(self, service: ProductsService, interval: float = 1.0) -> None:
+        self._service = service
+        self._interval = interval
+        self._task: asyncio.Task[None] | None = None
+        self._stopping = asyncio.Event()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops the background task after the running activation completes.
+
+        The task is not cancelled, cancelling a query can leave a broken
+        connection in the client pool.
+        """
+
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                activated = await self._service.activate_due_price_lists()
+            except Exception:
+                # Price lists stay pending and are retried on the next pass
+                logger.exception("Failed to activate price lists")
+            else:
+                for price_list in activated:
+                    logger.info(
+                        "Activated price list %s scheduled at %s",
+                        price_list.id,
+                        price_list.activate_at,
+                    )
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self._interval)
+            except asyncio.TimeoutError:
+                pass
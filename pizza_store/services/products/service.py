@@ -1,69 +1,590 @@
+import asyncio
+import dataclasses
+import datetime
+import time
 import uuid
+from decimal import Decimal
+from typing import AsyncIterable, Callable, Iterable
 
-from pizza_store.entities.products import Category, Product
+from pizza_store.entities.products import (
+    Category,
+    CategoryWithProducts,
+    PriceList,
+    Product,
+    ProductVariant,
+)
+from pizza_store.services.cache import ISharedCache
+from pizza_store.services.products.exceptions import (
+    InvalidMenuRowsError,
+    InvalidPriceError,
+)
 from pizza_store.services.products.interfaces import IProductsServiceRepo
+from pizza_store.services.products.menu import (
+    MenuIndex,
+    StaleMenuIndexError,
+    dump_menu,
+    load_menu,
+)
 from pizza_store.services.products.models import (
     CategoryCreate,
     CategoryCreated,
     CategoryDeleted,
     CategoryUpdate,
     CategoryUpdated,
+    CategoryUpsert,
+    CategoryUpserted,
+    MenuChanges,
+    MenuImported,
+    MenuRow,
+    MenuRowError,
+    PriceListCreate,
+    PriceListCreated,
+    PriceListDeleted,
     ProductCreate,
     ProductCreated,
     ProductDeleted,
     ProductUpdate,
     ProductUpdated,
+    ProductUpsert,
+    ProductUpserted,
     ProductVariantCreate,
     ProductVariantCreated,
     ProductVariantDeleted,
     ProductVariantUpdate,
     ProductVariantUpdated,
+    VariantPrice,
+    VariantPricesUpdated,
 )
 
+MENU_CACHE_KEY = "products.menu"
+
 
 class ProductsService:
-    def __init__(self, repo: IProductsServiceRepo) -> None:
+    """Products service.
+
+    Category and product listings are served from `MenuIndex`. The index is
+    loaded from the repo on first use, updated by mutations done through this
+    service and reloaded after `menu_ttl` seconds to pick up mutations done by
+    other processes.
+
+    With a shared cache, workers reload the index as soon as another worker
+    changes the menu, from the menu serialized by that worker, so the repo is
+    queried once per change and not once per worker.
+
+    A service serves the menu of one store, the repo is bound to the same
+    store. Stores have their own index and shared cache key, so a change of
+    one store's menu doesn't reload the menus of others.
+    """
+
+    def __init__(
+        self,
+        repo: IProductsServiceRepo,
+        menu_ttl: float = 60.0,
+        shared_cache: ISharedCache | None = None,
+        store: str = "default",
+    ) -> None:
         self._repo = repo
+        self._menu_ttl = menu_ttl
+        self._shared_cache = shared_cache
+        self._cache_key = f"{MENU_CACHE_KEY}:{store}"
+        # Shared cache version the index was loaded at
+        self._menu_version = 0
+        self._menu_index: MenuIndex | None = None
+        self._menu_loaded_at = 0.0
+        self._menu_lock = asyncio.Lock()
+        # Incremented by every mutation, a menu loaded concurrently with
+        # a mutation may miss it and is not cached
+        self._menu_generation = 0
 
     async def create_category(self, category: CategoryCreate) -> CategoryCreated:
-        return await self._repo.create_category(category)
+        result = await self._repo.create_category(category)
+        await self._update_menu_index(
+            lambda index: index.put_category(Category(id=result.id, name=category.name))
+        )
+        return result
 
     async def get_categories(self) -> list[Category]:
-        return await self._repo.get_categories()
+        index = await self._get_menu_index()
+        return index.categories()
+
+    async def get_menu(self) -> list[CategoryWithProducts]:
+        """Returns all categories with their products."""
+
+        index = await self._get_menu_index()
+        return index.menu()
+
+    async def get_menu_rows(self) -> list[MenuRow]:
+        """Returns the menu as rows, one per variant.
+
+        Categories without products and products without variants get a row
+        without product or variant.
+        """
+
+        rows: list[MenuRow] = []
+        for category in await self.get_menu():
+            if not category.products:
+                rows.append(MenuRow(line=len(rows) + 1, category=category.name))
+            for product in category.products:
+                product_row = MenuRow(
+                    line=len(rows) + 1,
+                    category=category.name,
+                    product=product.name,
+                    description=product.description,
+                    image_url=product.image_url,
+                )
+                if not product.variants:
+                    rows.append(product_row)
+                for variant in product.variants:
+                    rows.append(
+                        dataclasses.replace(
+                            product_row,
+                            line=len(rows) + 1,
+                            variant=variant.name,
+                            weight=variant.weight,
+                            weight_units=variant.weight_units,
+                            price=variant.price,
+                        )
+                    )
+        return rows
+
+    async def import_menu(
+        self, rows: AsyncIterable[MenuRow | MenuRowError], batch_size: int = 500
+    ) -> MenuImported:
+        """Creates or updates categories, products and variants from `rows`.
+
+        Categories and products are matched by name, variants by product and
+        name. Rows are imported in batches of `batch_size`, rows of a failed
+        batch are retried one by one to find the failing ones. Errors in `rows`
+        and invalid rows are reported and skipped.
+        """
+
+        imported = 0
+        errors: list[MenuRowError] = []
+        batch: list[MenuRow] = []
+        async for row in rows:
+            if isinstance(row, MenuRowError):
+                errors.append(row)
+                continue
+            message = self.validate_menu_row(row)
+            if message is not None:
+                errors.append(MenuRowError(line=row.line, message=message))
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                imported += await self._import_menu_batch(batch, errors)
+                batch = []
+        if batch:
+            imported += await self._import_menu_batch(batch, errors)
+
+        if imported:
+            await self._invalidate_menu_index()
+        errors.sort(key=lambda error: error.line)
+        return MenuImported(rows=imported, errors=errors)
+
+    @classmethod
+    def validate_menu_row(cls, row: MenuRow) -> str | None:
+        """Checks row data that can be checked without the database.
+
+        Returns:
+            Error message if row is not valid, otherwise None.
+        """
+
+        if not row.category:
+            return "Category is required."
+        if not row.product:
+            if row.variant:
+                return "Product is required for a variant."
+            return None
+        if not row.image_url:
+            return "Image URL is required for a product."
+        if not row.variant:
+            return None
+        if row.weight is None or row.weight <= 0:
+            return "Weight must be greater than 0."
+        if not row.weight_units:
+            return "Weight units are required for a variant."
+        if row.price is None or row.price < 0:
+            return "Price must not be negative."
+        return None
 
     async def get_category(self, id: uuid.UUID) -> Category:
         return await self._repo.get_category(id)
 
     async def delete_category(self, id: uuid.UUID) -> CategoryDeleted:
-        return await self._repo.delete_category(id)
+        result = await self._repo.delete_category(id)
+        await self._update_menu_index(lambda index: index.remove_category(id))
+        return result
 
     async def update_category(self, category: CategoryUpdate) -> CategoryUpdated:
-        return await self._repo.update_category(category)
+        result = await self._repo.update_category(category)
+        await self._update_menu_index(
+            lambda index: index.put_category(
+                Category(id=category.id, name=category.name)
+            )
+        )
+        return result
+
+    async def upsert_category(self, category: CategoryUpsert) -> CategoryUpserted:
+        """Creates a category if there is no category named `category.name`."""
+
+        result = await self._repo.upsert_category(category)
+        if result.created:
+            await self._update_menu_index(
+                lambda index: index.put_category(
+                    Category(id=result.id, name=category.name)
+                )
+            )
+        return result
 
     async def create_product(self, product: ProductCreate) -> ProductCreated:
-        return await self._repo.create_product(product)
+        result = await self._repo.create_product(product)
+
+        def update(index: MenuIndex) -> None:
+            index.put_product(
+                Product(
+                    id=result.id,
+                    name=product.name,
+                    category=index.get_category(product.category_id),
+                    description=product.description,
+                    image_url=product.image_url,
+                    variants=[],
+                )
+            )
+
+        await self._update_menu_index(update)
+        return result
+
+    async def upsert_product(self, product: ProductUpsert) -> ProductUpserted:
+        """Creates a product or updates the product named `product.name`."""
+
+        result = await self._repo.upsert_product(product)
+
+        def update(index: MenuIndex) -> None:
+            variants = [] if result.created else index.get_product(result.id).variants
+            index.put_product(
+                Product(
+                    id=result.id,
+                    name=product.name,
+                    category=index.get_category(product.category_id),
+                    description=product.description,
+                    image_url=product.image_url,
+                    variants=variants,
+                )
+            )
+
+        await self._update_menu_index(update)
+        return result
 
     async def get_products(self, category_id: uuid.UUID | None = None) -> list[Product]:
-        return await self._repo.get_products(category_id)
+        index = await self._get_menu_index()
+        return index.products(category_id)
+
+    async def get_variant_prices(
+        self, ids: Iterable[uuid.UUID]
+    ) -> dict[uuid.UUID, Decimal]:
+        """Returns prices of variants, unknown variants are left out.
+
+        Read from the menu index, so prices changed by other processes are seen
+        once it is reloaded, just as in listings. Variants missing from it are
+        looked up in the repo, as they may be created by another process.
+        """
+
+        ids = list(ids)
+        index = await self._get_menu_index()
+        prices = index.get_variant_prices(ids)
+        missing = [id for id in ids if id not in prices]
+        if missing:
+            prices.update(await self._repo.get_variant_prices(missing))
+        return prices
+
+    async def get_variant_categories(
+        self, ids: Iterable[uuid.UUID]
+    ) -> dict[uuid.UUID, Category]:
+        """Returns categories of variants on the menu, unknown variants are left out."""
+
+        index = await self._get_menu_index()
+        return index.get_variant_categories(ids)
 
     async def get_product(self, id: uuid.UUID) -> Product:
         return await self._repo.get_product(id)
 
     async def delete_product(self, id: uuid.UUID) -> ProductDeleted:
-        return await self._repo.delete_product(id)
+        result = await self._repo.delete_product(id)
+        await self._update_menu_index(lambda index: index.remove_product(id))
+        return result
 
     async def update_product(self, product: ProductUpdate) -> ProductUpdated:
-        return await self._repo.update_product(product)
+        result = await self._repo.update_product(product)
+
+        def update(index: MenuIndex) -> None:
+            index.put_product(
+                Product(
+                    id=product.id,
+                    name=product.name,
+                    category=index.get_category(product.category_id),
+                    description=product.description,
+                    image_url=product.image_url,
+                    variants=index.get_product(product.id).variants,
+                )
+            )
+
+        await self._update_menu_index(update)
+        return result
 
     async def create_product_variant(
         self, product_variant: ProductVariantCreate
     ) -> ProductVariantCreated:
-        return await self._repo.create_product_variant(product_variant)
+        result = await self._repo.create_product_variant(product_variant)
+        await self._update_menu_index(
+            lambda index: index.put_variant(
+                product_variant.product_id,
+                ProductVariant(
+                    id=result.id,
+                    name=product_variant.name,
+                    weight=product_variant.weight,
+                    weight_units=product_variant.weight_units,
+                    price=product_variant.price,
+                ),
+            )
+        )
+        return result
 
     async def delete_product_variant(self, id: uuid.UUID) -> ProductVariantDeleted:
-        return await self._repo.delete_product_variant(id)
+        result = await self._repo.delete_product_variant(id)
+        await self._update_menu_index(lambda index: index.remove_variant(id))
+        return result
 
     async def update_product_variant(
         self, product_variant: ProductVariantUpdate
     ) -> ProductVariantUpdated:
-        return await self._repo.update_product_variant(product_variant)
+        result = await self._repo.update_product_variant(product_variant)
+
+        def update(index: MenuIndex) -> None:
+            index.put_variant(
+                index.get_variant_product_id(product_variant.id),
+                ProductVariant(
+                    id=product_variant.id,
+                    name=product_variant.name,
+                    weight=product_variant.weight,
+                    weight_units=product_variant.weight_units,
+                    price=product_variant.price,
+                ),
+            )
+
+        await self._update_menu_index(update)
+        return result
+
+    async def update_variant_prices(
+        self, prices: list[VariantPrice]
+    ) -> VariantPricesUpdated:
+        """Changes prices of many product variants at once.
+
+        Raises:
+            InvalidPriceError: if a price is negative.
+            ProductVariantNotFoundError: if a variant does not exist, no prices
+                are changed then.
+        """
+
+        self.validate_prices(prices)
+        result = await self._repo.update_variant_prices(prices)
+        await self._update_menu_index(
+            lambda index: index.set_variant_prices({p.id: p.price for p in prices})
+        )
+        return result
+
+    async def create_price_list(self, price_list: PriceListCreate) -> PriceListCreated:
+        """Schedules prices to be applied at `price_list.activate_at`.
+
+        Price lists are applied by `activate_due_price_lists`.
+
+        Raises:
+            InvalidPriceError: if a price is negative.
+            ProductVariantNotFoundError: if a variant does not exist.
+        """
+
+        self.validate_prices(price_list.prices)
+        return await self._repo.create_price_list(price_list)
+
+    async def get_price_lists(self) -> list[PriceList]:
+        return await self._repo.get_price_lists()
+
+    async def delete_price_list(self, id: uuid.UUID) -> PriceListDeleted:
+        """Cancels a pending price list."""
+
+        return await self._repo.delete_price_list(id)
+
+    async def activate_due_price_lists(self) -> list[PriceList]:
+        """Applies prices of pending price lists that are due, oldest first.
+
+        Price lists are activated in one transaction, each exactly once even
+        if several processes call this.
+
+        Returns:
+            Activated price lists.
+        """
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        activated = await self._repo.activate_price_lists(now)
+        if activated:
+            prices: dict[uuid.UUID, Decimal] = {}
+            for price_list in activated:
+                prices.update(price_list.prices)
+            await self._update_menu_index(
+                lambda index: index.set_variant_prices(prices)
+            )
+        return activated
+
+    async def get_menu_changes(
+        self, since: int | None, max_changes: int = 1000
+    ) -> MenuChanges:
+        """Returns what changed in the menu after version `since`.
+
+        Changes of an entity are compacted to the latest one. The whole menu
+        is returned instead if `since` is None, the changes after it were
+        compacted away, it is ahead of the current version or there are more
+        than `max_changes` changed entities.
+        """
+
+        if since is not None:
+            log = await self._repo.get_menu_changes(since)
+            latest = {(c.entity, c.id): c for c in log.changes}
+            if log.compacted_through <= since <= log.version and (
+                len(latest) <= max_changes
+            ):
+                return MenuChanges(
+                    version=log.version,
+                    snapshot=False,
+                    categories=log.categories,
+                    products=log.products,
+                    variants=log.variants,
+                    deleted=[c for c in latest.values() if c.op == "delete"],
+                )
+
+        log = await self._repo.get_menu_changes(None)
+        return MenuChanges(
+            version=log.version,
+            snapshot=True,
+            categories=log.categories,
+            products=log.products,
+            variants=log.variants,
+            deleted=[],
+        )
+
+    async def compact_menu_changes(self, keep_versions: int) -> int:
+        """Deletes changes older than the last `keep_versions` menu versions.
+
+        Clients behind the kept versions get the whole menu.
+
+        Returns:
+            Number of deleted changes.
+        """
+
+        return await self._repo.compact_menu_changes(keep_versions)
+
+    @classmethod
+    def validate_prices(cls, prices: list[VariantPrice]) -> None:
+        """Raises `InvalidPriceError` if a price is negative."""
+
+        for price in prices:
+            if price.price < 0:
+                raise InvalidPriceError
+
+    async def _import_menu_batch(
+        self, batch: list[MenuRow], errors: list[MenuRowError]
+    ) -> int:
+        try:
+            await self._repo.import_menu_rows(batch)
+            return len(batch)
+        except InvalidMenuRowsError as e:
+            if len(batch) == 1:
+                errors.append(MenuRowError(line=batch[0].line, message=str(e)))
+                return 0
+
+        imported = 0
+        for row in batch:
+            imported += await self._import_menu_batch([row], errors)
+        return imported
+
+    async def _get_menu_index(self) -> MenuIndex:
+        version = self._menu_version
+        if self._shared_cache is not None:
+            version = await self._shared_cache.get_version(self._cache_key)
+        if self._is_menu_index_fresh(version):
+            assert self._menu_index is not None
+            return self._menu_index
+
+        async with self._menu_lock:
+            if self._is_menu_index_fresh(version):
+                assert self._menu_index is not None
+                return self._menu_index
+
+            generation = self._menu_generation
+            loaded_at = time.monotonic()
+            if self._shared_cache is None:
+                index = MenuIndex(await self._repo.get_menu())
+            else:
+                version, index = await self._load_shared_menu_index()
+            if generation == self._menu_generation:
+                self._menu_index = index
+                self._menu_loaded_at = loaded_at
+                self._menu_version = version
+            return index
+
+    async def _load_shared_menu_index(self) -> tuple[int, MenuIndex]:
+        """Loads the menu stored by another worker or from the repo."""
+
+        assert self._shared_cache is not None
+        version, data = await self._shared_cache.get(self._cache_key)
+        if data is not None:
+            return version, MenuIndex(load_menu(data))
+        menu = await self._repo.get_menu()
+        # Not stored if another worker changed the menu meanwhile
+        await self._shared_cache.set(
+            self._cache_key, version, dump_menu(menu), self._menu_ttl
+        )
+        return version, MenuIndex(menu)
+
+    def _is_menu_index_fresh(self, version: int) -> bool:
+        return (
+            self._menu_index is not None
+            and version == self._menu_version
+            and time.monotonic() - self._menu_loaded_at < self._menu_ttl
+        )
+
+    async def _invalidate_menu_index(self) -> None:
+        self._menu_generation += 1
+        self._menu_index = None
+        if self._shared_cache is not None:
+            await self._shared_cache.invalidate(self._cache_key)
+
+    async def _update_menu_index(self, update: Callable[[MenuIndex], None]) -> None:
+        """Applies a repo mutation to the menu index.
+
+        If the index does not know an entity the mutation refers to, it was
+        loaded before that entity was created by another process, so the index
+        is dropped and reloaded on next read. With a shared cache the mutation
+        invalidates the menu of other workers and the updated index is stored
+        for them.
+        """
+
+        self._menu_generation += 1
+        if self._menu_index is not None:
+            try:
+                update(self._menu_index)
+            except StaleMenuIndexError:
+                self._menu_index = None
+        if self._shared_cache is None:
+            return
+
+        version = await self._shared_cache.invalidate(self._cache_key)
+        index = self._menu_index
+        if index is None:
+            return
+        if version != self._menu_version + 1:
+            # Another worker changed the menu since the index was loaded
+            self._menu_index = None
+            return
+        self._menu_version = version
+        await self._shared_cache.set(
+            self._cache_key, version, dump_menu(index.menu()), self._menu_ttl
+        )
@@ -1,13 +1,138 @@
+from typing import Literal
+
 from pydantic import BaseSettings
 
 
 class Settings(BaseSettings):
     app_host: str = "localhost"
     app_port: int = 8000
+    # Imports and creates the app once in the gunicorn master, workers are
+    # forked with it and share its memory copy-on-write. HUP then restarts
+    # workers without reloading code, so deploys need a full restart
+    gunicorn_preload_app: bool = False
+    # Derived from CPUs and EdgeDB connections if not set, see `get_worker_count`
+    gunicorn_workers: int | None = None
+    # "auto" uses uvloop and httptools if installed
+    gunicorn_event_loop: Literal["auto", "uvloop", "asyncio"] = "auto"
+    gunicorn_keepalive: int = 5  # seconds
+    gunicorn_backlog: int = 2048
+    # Workers are restarted after max requests plus random jitter, 0 disables
+    gunicorn_max_requests: int = 10_000
+    gunicorn_max_requests_jitter: int = 1000
     edgedb_dsn: str
+    # Connections per worker and the server limit shared by all workers
+    edgedb_pool_size: int = 10
+    edgedb_max_connections: int = 100
+    # Read-only repo queries go to the replica while its lag, measured every
+    # heartbeat interval, is within max lag. Clients read from the primary for
+    # sticky seconds after they write
+    edgedb_replica_dsn: str | None = None
+    edgedb_replica_max_lag: float = 2.0  # seconds
+    edgedb_replica_heartbeat_interval: float = 1.0  # seconds
+    edgedb_replica_sticky_seconds: float = 5.0
+    # Stores served by the app, requests choose one with the `X-Store` header
+    # and get the first one without it. Stores share the database unless
+    # their DSN is set, e.g. `{"uptown": "edgedb://host/uptown"}`, and only
+    # stores in the shared database read from the replica. Data from before
+    # stores belongs to "default"
+    stores: list[str] = ["default"]
+    store_edgedb_dsns: dict[str, str] = {}
+    # Query durations per repo method, queries over the threshold are logged
+    # with redacted arguments. Analyzing sampled slow queries needs EdgeDB 3.0+
+    db_query_log_enabled: bool = False
+    db_slow_query_threshold: float = 0.1  # seconds
+    db_query_analyze_sample_rate: float = 0.0
+    # Spans of requests, services and queries, written as OTLP/JSON lines to
+    # the file or kept in memory. Share of new traces which are sampled
+    tracing_enabled: bool = False
+    tracing_sample_rate: float = 0.01
+    tracing_exporter: Literal["file", "memory"] = "file"
+    tracing_file_path: str = "traces.jsonl"
+    tracing_service_name: str = "pizza-store"
     jwt_algorithm: str = "HS256"
     jwt_secret: str
     jwt_expires_in: int = 24 * 60 * 60  # 1 day
+    # Directory with asymmetric keys, see `load_jwt_keys`. If set, tokens are
+    # signed with key `jwt_signing_kid` instead of `jwt_secret`
+    jwt_keys_dir: str | None = None
+    jwt_signing_kid: str | None = None
+    # With keys, tokens signed with `jwt_secret` are accepted only if set.
+    # Set it after switching to keys until the older tokens expire
+    jwt_accept_legacy_secret: bool = False
+    # Refresh tokens are not issued if not set
+    jwt_refresh_expires_in: int | None = None
+    # Users cache in front of the auth repo, per worker
+    auth_users_cache_size: int = 1000
+    auth_users_cache_ttl: float = 300
+    auth_unknown_usernames_cache_size: int = 10_000
+    auth_unknown_usernames_cache_ttl: float = 60
+    # Login attempts limits, shared by workers through `login_throttle_path`.
+    # Relative to the working directory like the journal, a file in a shared
+    # directory could be created beforehand by another user
+    login_throttle_enabled: bool = True
+    login_throttle_path: str = "login_throttle"
+    login_username_burst: int = 5
+    login_username_per_minute: float = 5
+    login_ip_burst: int = 20
+    login_ip_per_minute: float = 30
+    # Attempts for one username from all addresses, limits guessing a
+    # password from many addresses
+    login_username_total_burst: int = 50
+    login_username_total_per_minute: float = 20
+    # Responses smaller than minimum size are not compressed, brotli is used if
+    # installed (`pip install brotli`) and accepted by the client
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024  # bytes
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    etag_enabled: bool = True
+    # Menu and users caches shared by workers. "shared_memory" maps
+    # `shared_cache_path` on one host, "redis" needs `pip install redis` and
+    # `shared_cache_redis_url`, "none" keeps caches per worker
+    shared_cache_backend: Literal["none", "shared_memory", "redis"] = "shared_memory"
+    shared_cache_path: str = "shared_cache"
+    shared_cache_max_value_size: int = 8 * 1024 * 1024  # bytes
+    # Keys the "shared_memory" cache can hold, keys are never removed. By
+    # default twice the keys in use: the menu and kitchen queue of every
+    # store and the users
+    shared_cache_slots: int | None = None
+    shared_cache_redis_url: str | None = None
+    menu_index_ttl: float = 60.0  # seconds
+    menu_import_batch_size: int = 500
+    # Clients with more changed entities get the whole menu. Changes of older
+    # versions are deleted by `compact_menu_changes`
+    menu_changes_max_changes: int = 1000
+    menu_changes_keep_versions: int = 10_000
+    price_lists_scheduler_enabled: bool = True
+    price_lists_interval: float = 1.0  # seconds
+    orders_summary_ttl: float = 5.0  # seconds
+    # Uncompleted orders by the moment they should be started, reloaded after
+    # ttl or when another worker changes orders. Category prep seconds is
+    # a JSON object of category name to seconds per item
+    kitchen_queue_enabled: bool = True
+    kitchen_queue_ttl: float = 60.0  # seconds
+    kitchen_stations: int = 4
+    kitchen_promise_minutes: float = 45
+    kitchen_base_prep_seconds: float = 300
+    kitchen_item_prep_seconds: float = 120
+    kitchen_category_prep_seconds: dict[str, float] = {}
+    # GeoJSON feature collection of zones, orders are not checked if not set.
+    # Addresses are geocoded with the `address,longitude,latitude` CSV file
+    delivery_zones_path: str | None = None
+    delivery_zones_cell_size: float = 0.01  # degrees
+    delivery_geocoder_path: str | None = None
+    delivery_geocoding_cache_size: int = 100_000
+    delivery_geocoding_cache_ttl: float = 24 * 60 * 60  # seconds
+    delivery_unknown_addresses_cache_ttl: float = 60  # seconds
+    orders_archive_after_days: int = 90
+    orders_archive_batch_size: int = 1000
+    # "journal" accepts orders into a local journal and stores them in background
+    orders_intake_mode: Literal["sync", "journal"] = "sync"
+    orders_journal_dir: str = "journal"
+    orders_journal_flush_interval: float = 0.002  # seconds
+    orders_journal_drain_batch_size: int = 100
+    orders_journal_drain_interval: float = 0.05  # seconds
+    orders_journal_drain_max_retries: int = 5
 
 
 settings = Settings(_env_file=".env", _env_file_encoding="utf-8")  # type: ignore
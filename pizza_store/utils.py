@@ -1,6 +1,11 @@
 import json
+import time
 import uuid
-from typing import Any
+from collections import OrderedDict
+from typing import Any, Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
 
 
 class UUIDEncoder(json.JSONEncoder):
@@ -8,3 +13,40 @@ class UUIDEncoder(json.JSONEncoder):
         if isinstance(o, uuid.UUID):
             return str(o)
         return super().default(o)
+
+
+class TTLCache(Generic[K, V]):
+    """Bounded cache which forgets values after `ttl` seconds.
+
+    When full, the least recently set value is evicted.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._values: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: K) -> V | None:
+        item = self._values.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._values[key]
+            return None
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        self._values.pop(key, None)
+        self._values[key] = (time.monotonic() + self._ttl, value)
+        while len(self._values) > self._max_size:
+            self._values.popitem(last=False)
+
+    def delete(self, key: K) -> None:
+        self._values.pop(key, None)
+
+    def clear(self) -> None:
+        self._values.clear()
@@ -0,0 +1,6 @@
+import os
+
+# `pizza_store.settings` requires these on import, tests don't connect to
+# EdgeDB or check tokens signed with the real secret
+os.environ.setdefault("EDGEDB_DSN", "edgedb://localhost/test")
+os.environ.setdefault("JWT_SECRET", "test secret")
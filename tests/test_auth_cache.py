@@ -0,0 +1,101 @@
+import asyncio
+import uuid
+
+import jwt
+import pytest
+
+from pizza_store.services.auth.cache import CachedAuthServiceRepo
+from pizza_store.services.auth.exceptions import (
+    InvalidAccessToken,
+    InvalidRefreshToken,
+    UserAlreadyExistsError,
+    UserNotFoundError,
+)
+from pizza_store.services.auth.models import (
+    JWTConfig,
+    User,
+    UserCreated,
+    UserInRepoCreate,
+)
+from pizza_store.services.auth.service import AuthService
+from pizza_store.services.cache import InMemorySharedCache
+
+
+class FakeAuthServiceRepo:
+    def __init__(self) -> None:
+        self.users: dict[str, User] = {}
+        self.get_user_calls = 0
+
+    async def create_user(self, user: UserInRepoCreate) -> UserCreated:
+        if user.username in self.users:
+            raise UserAlreadyExistsError
+        id = uuid.uuid4()
+        self.users[user.username] = User(
+            id, user.username, user.password_hash, user.is_admin
+        )
+        return UserCreated(id=id)
+
+    async def get_user(self, username: str) -> User:
+        self.get_user_calls += 1
+        try:
+            return self.users[username]
+        except KeyError:
+            raise UserNotFoundError
+
+
+def test_cached_auth_service_repo() -> None:
+    async def run() -> None:
+        fake_repo = FakeAuthServiceRepo()
+        repo = CachedAuthServiceRepo(fake_repo)
+
+        for _ in range(3):
+            with pytest.raises(UserNotFoundError):
+                await repo.get_user("admin")
+        assert fake_repo.get_user_calls == 1
+
+        await repo.create_user(UserInRepoCreate("admin", "hash", True))
+        for _ in range(3):
+            assert (await repo.get_user("admin")).is_admin
+        assert fake_repo.get_user_calls == 2
+
+        with pytest.raises(UserAlreadyExistsError):
+            await repo.create_user(UserInRepoCreate("admin", "hash", False))
+
+    asyncio.run(run())
+
+
+def test_cached_auth_service_repo_with_shared_cache() -> None:
+    async def run() -> None:
+        fake_repo = FakeAuthServiceRepo()
+        shared_cache = InMemorySharedCache()
+        # Repos of two workers
+        repo = CachedAuthServiceRepo(fake_repo, shared_cache=shared_cache)
+        other_repo = CachedAuthServiceRepo(fake_repo, shared_cache=shared_cache)
+
+        with pytest.raises(UserNotFoundError):
+            await other_repo.get_user("admin")
+        await repo.create_user(UserInRepoCreate("admin", "hash", True))
+        assert (await other_repo.get_user("admin")).is_admin
+
+    asyncio.run(run())
+
+
+def test_refresh_user_token() -> None:
+    config = JWTConfig(
+        algorithm="HS256", secret="secret", expires_in=60, refresh_expires_in=3600
+    )
+    service = AuthService(FakeAuthServiceRepo(), config)
+    user_token = service._create_user_token(uuid.uuid4(), is_admin=True)
+    assert user_token.refresh_token is not None
+
+    token = service.refresh_user_token(user_token.refresh_token)
+    assert service.get_user_from_token(token.access_token, is_admin_required=True)
+    assert token.refresh_token == user_token.refresh_token
+
+    with pytest.raises(InvalidAccessToken):
+        service.get_user_from_token(user_token.refresh_token, is_admin_required=False)
+    with pytest.raises(InvalidRefreshToken):
+        service.refresh_user_token(user_token.access_token)
+    # Other services verifying access tokens with the same key
+    with pytest.raises(jwt.InvalidAudienceError):
+        jwt.decode(user_token.refresh_token, "secret", algorithms=["HS256"])
@@ -0,0 +1,119 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from pizza_store.adapters.geo.geocoder import CsvGeocoder
+from pizza_store.adapters.geo.zones import load_delivery_zones
+from pizza_store.services.delivery.exceptions import (
+    AddressNotDeliverableError,
+    AddressNotFoundError,
+)
+from pizza_store.services.delivery.models import DeliveryPolygon, DeliveryZone, Point
+from pizza_store.services.delivery.service import DeliveryService
+from pizza_store.services.delivery.zones import ZoneIndex
+
+# Square 0..4 with a hole 1..2
+CENTER = DeliveryZone(
+    name="center",
+    polygons=[
+        DeliveryPolygon(
+            exterior=[(0, 0), (4, 0), (4, 4), (0, 4), (0, 0)],
+            holes=[[(1, 1), (2, 1), (2, 2), (1, 2)]],
+        )
+    ],
+)
+# L shape around the center square, overlaps it at 3..4
+SUBURBS = DeliveryZone(
+    name="suburbs",
+    polygons=[
+        DeliveryPolygon(
+            exterior=[(3, 0), (8, 0), (8, 8), (0, 8), (0, 3), (3, 3)],
+            holes=[],
+        )
+    ],
+)
+
+
+def test_zone_index() -> None:
+    for cell_size in (0.5, 1, 100):
+        index = ZoneIndex([CENTER, SUBURBS], cell_size=cell_size)
+        assert index.find((0.5, 0.5)) is CENTER
+        assert index.find((3.5, 3.5)) is CENTER
+        # Hole of the center is not delivered to
+        assert index.find((1.5, 1.5)) is None
+        assert index.find((7, 7)) is SUBURBS
+        # Inside the bounding box of suburbs, outside of the L
+        assert index.find((5, 5)) is SUBURBS
+        assert index.find((8.5, 1)) is None
+        assert index.find((-1, -1)) is None
+
+
+class FakeGeocoder:
+    def __init__(self, points: dict[str, Point]) -> None:
+        self.points = points
+        self.calls = 0
+
+    async def geocode(self, address: str) -> Point | None:
+        self.calls += 1
+        return self.points.get(address)
+
+
+def test_delivery_service_caches_geocoding() -> None:
+    geocoder = FakeGeocoder({"baker street 221 b": (0.5, 0.5), "hole 1": (1.5, 1.5)})
+    service = DeliveryService(ZoneIndex([CENTER, SUBURBS]), geocoder)
+
+    async def run() -> None:
+        assert await service.get_zone("Baker street 221 B") is CENTER
+        assert await service.get_zone("baker street, 221 b.") is CENTER
+        assert geocoder.calls == 1
+
+        with pytest.raises(AddressNotDeliverableError):
+            await service.get_zone("Hole 1")
+        for _ in range(2):
+            with pytest.raises(AddressNotFoundError):
+                await service.get_zone("Nowhere 0")
+        assert geocoder.calls == 3
+
+    asyncio.run(run())
+
+
+def test_zones_and_gazetteer_files(tmp_path: Path) -> None:
+    zones_path = tmp_path / "zones.geojson"
+    zones_path.write_text(
+        json.dumps(
+            {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "properties": {"name": "center"},
+                        "geometry": {
+                            "type": "MultiPolygon",
+                            "coordinates": [
+                                [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+                                [[[2, 2], [3, 2], [3, 3], [2, 3], [2, 2]]],
+                            ],
+                        },
+                    }
+                ],
+            }
+        )
+    )
+    addresses_path = tmp_path / "addresses.csv"
+    addresses_path.write_text(
+        "address,longitude,latitude\n"
+        '"Baker street, 221 B",0.5,0.5\n'
+        "Main street 1,2.5,2.5\n"
+    )
+    service = DeliveryService(
+        ZoneIndex(load_delivery_zones(str(zones_path))),
+        CsvGeocoder(str(addresses_path)),
+    )
+
+    async def run() -> None:
+        assert (await service.get_zone("baker street 221 b")).name == "center"
+        assert (await service.get_zone("MAIN STREET 1")).name == "center"
+
+    asyncio.run(run())
@@ -0,0 +1,97 @@
+import dataclasses
+import os
+import uuid
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+from pizza_store.adapters.crypto.jwt_keys import load_jwt_keys
+from pizza_store.services.auth.exceptions import InvalidAccessToken
+from pizza_store.services.auth.models import JWTConfig, UserTokenData
+from pizza_store.services.auth.service import AuthService
+
+USER = UserTokenData(
+    id=uuid.UUID("f7240c84-f12f-4bce-bbe4-76c3105cf6a6"), is_admin=True
+)
+
+
+def _write_key(directory: str, filename: str, key: object, public: bool) -> None:
+    if public:
+        data = key.public_key().public_bytes(  # type: ignore
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    else:
+        data = key.private_bytes(  # type: ignore
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    with open(os.path.join(directory, filename), "wb") as f:
+        f.write(data)
+
+
+def test_tokens_are_verified_after_key_rotation(tmp_path: str) -> None:
+    old_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    new_key = ed25519.Ed25519PrivateKey.generate()
+
+    _write_key(str(tmp_path), "2022-01.pem", old_key, public=False)
+    old_config = JWTConfig(
+        algorithm="HS256",
+        secret="secret",
+        expires_in=3600,
+        keys=load_jwt_keys(str(tmp_path)),
+        signing_kid="2022-01",
+    )
+    old_token = AuthService.create_access_token(USER, 2**31, old_config)
+
+    # Rotation: the old private key is retired, only its public part is kept
+    os.remove(os.path.join(tmp_path, "2022-01.pem"))
+    _write_key(str(tmp_path), "2022-01.pub.pem", old_key, public=True)
+    _write_key(str(tmp_path), "2022-02.pem", new_key, public=False)
+    keys = load_jwt_keys(str(tmp_path))
+    config = JWTConfig(
+        algorithm="HS256",
+        secret="secret",
+        expires_in=3600,
+        keys=keys,
+        signing_kid="2022-02",
+    )
+    new_token = AuthService.create_access_token(USER, 2**31, config)
+
+    assert [(k.kid, k.algorithm) for k in keys] == [
+        ("2022-01", "RS256"),
+        ("2022-02", "EdDSA"),
+    ]
+    assert keys[1].jwk["kid"] == "2022-02" and keys[1].jwk["kty"] == "OKP"
+    assert AuthService.decode_access_token(
+        old_token, config
+    ) == AuthService.decode_access_token(new_token, config)
+
+    unknown_kid_config = JWTConfig(
+        algorithm="HS256", secret="secret", expires_in=3600, keys=keys[:1]
+    )
+    with pytest.raises(InvalidAccessToken):
+        AuthService.decode_access_token(new_token, unknown_kid_config)
+
+
+def test_secret_tokens_are_rejected_after_switching_to_keys(tmp_path: str) -> None:
+    secret_config = JWTConfig(algorithm="HS256", secret="secret", expires_in=3600)
+    secret_token = AuthService.create_access_token(USER, 2**31, secret_config)
+
+    key = ed25519.Ed25519PrivateKey.generate()
+    _write_key(str(tmp_path), "2022-01.pem", key, public=False)
+    config = dataclasses.replace(
+        secret_config, keys=load_jwt_keys(str(tmp_path)), signing_kid="2022-01"
+    )
+    with pytest.raises(InvalidAccessToken):
+        AuthService.decode_access_token(secret_token, config)
+
+    legacy_config = dataclasses.replace(config, accept_legacy_secret=True)
+    assert AuthService.decode_access_token(
+        secret_token, legacy_config
+    ) == AuthService.decode_access_token(secret_token, secret_config)
@@ -0,0 +1,169 @@
+import asyncio
+import datetime
+import uuid
+from decimal import Decimal
+from typing import Iterable
+
+from pizza_store.entities.orders import Order, OrderItem
+from pizza_store.entities.products import (
+    Category,
+    ProductVariantWithProduct,
+    ProductWithoutVariants,
+)
+from pizza_store.services.cache import InMemorySharedCache
+from pizza_store.services.kitchen.models import KitchenConfig, KitchenOrder
+from pizza_store.services.kitchen.queue import KitchenQueue
+from pizza_store.services.kitchen.service import KitchenService
+from pizza_store.services.orders.models import (
+    OrderCreate,
+    OrderItemCreate,
+    OrdersFilter,
+    OrderUpdate,
+)
+
+PIZZAS = Category(id=uuid.uuid4(), name="Pizzas")
+DRINKS = Category(id=uuid.uuid4(), name="Drinks")
+PIZZA = ProductVariantWithProduct(
+    id=uuid.uuid4(),
+    name="Small",
+    weight=Decimal(300),
+    weight_units="g",
+    price=Decimal("5"),
+    product=ProductWithoutVariants(
+        id=uuid.uuid4(),
+        name="Margarita",
+        category=PIZZAS,
+        description="",
+        image_url="https://image.url",
+    ),
+)
+COLA_ID = uuid.uuid4()
+CONFIG = KitchenConfig(
+    stations=1,
+    promise_seconds=3600,
+    base_prep_seconds=60,
+    item_prep_seconds=10,
+    category_prep_seconds={"Pizzas": 600},
+)
+
+
+def _kitchen_order(start_by: int, created_at: int = 0) -> KitchenOrder:
+    epoch = datetime.datetime(2022, 3, 2, tzinfo=datetime.timezone.utc)
+    return KitchenOrder(
+        id=uuid.uuid4(),
+        created_at=epoch + datetime.timedelta(seconds=created_at),
+        delivery_zone=None,
+        prep_seconds=60,
+        start_by=epoch + datetime.timedelta(seconds=start_by),
+    )
+
+
+def test_kitchen_queue() -> None:
+    first, second, third = _kitchen_order(1), _kitchen_order(2), _kitchen_order(3)
+    queue = KitchenQueue([third, first])
+    queue.put(second)
+    assert queue.head() == [first, second, third]
+    assert queue.head(limit=2) == [first, second]
+
+    moved = _kitchen_order(0)
+    moved = KitchenOrder(**{**moved.__dict__, "id": third.id})
+    queue.put(moved)
+    queue.remove(first.id)
+    assert queue.head() == [moved, second]
+    assert len(queue) == 2 and queue.get(first.id) is None
+    assert queue.position(second.id) == 1 and queue.position(first.id) is None
+    # Shared between workers without sorting
+    assert KitchenQueue(queue.orders()).head() == [moved, second]
+
+    # Replaced orders don't pile up in the heap
+    for _ in range(100):
+        queue.put(_kitchen_order(5, created_at=1))
+        queue.remove(second.id)
+        queue.put(second)
+    assert len(queue._heap) <= 2 * len(queue) + 16
+
+
+class FakeOrdersRepo:
+    def __init__(self, orders: list[Order]) -> None:
+        self.orders = orders
+        self.loads = 0
+
+    async def get_orders(self, filter: OrdersFilter | None = None) -> list[Order]:
+        self.loads += 1
+        return self.orders
+
+
+class FakeMenu:
+    async def get_variant_categories(
+        self, ids: Iterable[uuid.UUID]
+    ) -> dict[uuid.UUID, Category]:
+        categories = {PIZZA.id: PIZZAS, COLA_ID: DRINKS}
+        return {id: categories[id] for id in ids if id in categories}
+
+
+def _order_create(items: dict[uuid.UUID, int]) -> OrderCreate:
+    return OrderCreate(
+        phone="+380991231212",
+        items=[
+            OrderItemCreate(product_variant_id=id, amount=a) for id, a in items.items()
+        ],
+        note="",
+        address="Baker street 221 B",
+    )
+
+
+def test_kitchen_service() -> None:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    stored = Order(
+        id=uuid.uuid4(),
+        phone="+380991231212",
+        items=[OrderItem(id=uuid.uuid4(), product_variant=PIZZA, amount=1)],
+        status="UNCOMPLETED",
+        note="",
+        address="Baker street 221 B",
+        created_at=now - datetime.timedelta(minutes=5),
+        delivery_zone="center",
+    )
+    repo = FakeOrdersRepo([stored])
+    cache = InMemorySharedCache()
+    service = KitchenService(repo, FakeMenu(), CONFIG, shared_cache=cache)
+    other_worker = KitchenService(repo, FakeMenu(), CONFIG, shared_cache=cache)
+
+    async def run() -> None:
+        await service.rebuild()
+        [queued] = await service.get_queue()
+        assert queued.order.id == stored.id and queued.order.prep_seconds == 660
+        # Started when created, ready 11 minutes later
+        eta = stored.created_at + datetime.timedelta(seconds=660)
+        assert abs(queued.eta - eta) < datetime.timedelta(milliseconds=1)
+
+        drinks, pizzas = uuid.uuid4(), uuid.uuid4()
+        await service.order_created(drinks, _order_create({COLA_ID: 2}))
+        await service.order_created(pizzas, _order_create({PIZZA.id: 3}))
+        queue = await service.get_queue()
+        # Large orders are started before earlier small ones
+        assert [q.order.id for q in queue] == [pizzas, stored.id, drinks]
+        eta = queue[1].eta + datetime.timedelta(seconds=80)
+        assert abs(queue[2].eta - eta) < datetime.timedelta(milliseconds=1)
+        assert (await service.get_queued_order(drinks)).position == 2
+        assert await service.get_queue(delivery_zone="center", limit=1) == queue[1:2]
+        assert repo.loads == 1
+
+        # Another worker gets the queue stored by the first one
+        assert await other_worker.get_queue() == queue
+        await service.order_updated(
+            OrderUpdate(
+                id=pizzas,
+                phone="+380991231212",
+                items=[],
+                status="COMPLETED",
+                note="",
+                address="Baker street 221 B",
+            )
+        )
+        queue = await service.get_queue()
+        assert [q.order.id for q in queue] == [stored.id, drinks]
+        assert await other_worker.get_queue() == queue
+        assert repo.loads == 1
+
+    asyncio.run(run())
@@ -0,0 +1,121 @@
+import asyncio
+import fcntl
+import os
+import time
+
+from pizza_store.adapters.shared_memory.locks import RangeLock
+from pizza_store.adapters.shared_memory.token_buckets import SharedMemoryTokenBuckets
+from pizza_store.services.auth.exceptions import TooManyLoginAttemptsError
+from pizza_store.services.auth.throttling import (
+    InMemoryTokenBuckets,
+    LoginThrottleConfig,
+    LoginThrottler,
+    refill_and_take,
+)
+
+CONFIG = LoginThrottleConfig(
+    username_burst=3,
+    username_per_minute=1,
+    ip_burst=5,
+    ip_per_minute=1,
+    username_total_burst=8,
+    username_total_per_minute=1,
+)
+
+
+def _attempts(throttler: LoginThrottler, username: str, ip: str, count: int) -> int:
+    allowed = 0
+    for _ in range(count):
+        try:
+            asyncio.run(throttler.check(username, ip))
+        except TooManyLoginAttemptsError as e:
+            assert e.retry_after > 0
+        else:
+            allowed += 1
+    return allowed
+
+
+def test_refill_and_take() -> None:
+    assert refill_and_take(0, 0, 30, capacity=5, rate=0.1) == (2, 0)
+    assert refill_and_take(0, 0, 100, capacity=5, rate=0.1) == (4, 0)
+    tokens, retry_after = refill_and_take(0.5, 0, 0, capacity=5, rate=0.1)
+    assert tokens == 0.5 and retry_after == 5
+
+
+def test_login_throttler_limits_username_and_ip() -> None:
+    throttler = LoginThrottler(InMemoryTokenBuckets(), CONFIG)
+
+    assert _attempts(throttler, "admin", "10.0.0.1", 10) == 3
+    # Other usernames from the same IP are limited by the IP bucket
+    assert _attempts(throttler, "root", "10.0.0.1", 10) == 0
+    assert _attempts(throttler, "root", "10.0.0.2", 10) == 3
+    # Attempts from other IPs don't lock the username out
+    assert _attempts(throttler, "admin", "10.0.0.3", 10) == 3
+    # Until attempts from all IPs reach the total
+    assert _attempts(throttler, "admin", "10.0.0.4", 10) == 2
+    assert _attempts(throttler, "admin", "10.0.0.5", 10) == 0
+
+
+def test_shared_memory_token_buckets_are_shared(tmp_path: str) -> None:
+    path = os.path.join(tmp_path, "buckets")
+    first = SharedMemoryTokenBuckets(path, slots=16)
+    second = SharedMemoryTokenBuckets(path, slots=16)
+    throttler = LoginThrottler(first, CONFIG)
+    other_throttler = LoginThrottler(second, CONFIG)
+
+    assert _attempts(throttler, "admin", "10.0.0.1", 2) == 2
+    assert _attempts(other_throttler, "admin", "10.0.0.1", 10) == 1
+    first.close()
+    second.close()
+
+
+def test_shared_memory_token_buckets_wait_off_event_loop(tmp_path: str) -> None:
+    path = os.path.join(tmp_path, "buckets")
+    buckets = SharedMemoryTokenBuckets(path, slots=16)
+    ready_read, ready_write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # Other worker holding every slot for a while
+        fd = os.open(path, os.O_RDWR)
+        fcntl.lockf(fd, fcntl.LOCK_EX)
+        os.write(ready_write, b"1")
+        time.sleep(0.2)
+        os._exit(0)
+    os.read(ready_read, 1)
+
+    async def run() -> None:
+        ticks = 0
+
+        async def tick() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        # All wait in executor threads, which must not update the bucket at once
+        results = await asyncio.gather(
+            *(buckets.take("ip:10.0.0.1", 5, 0.001) for _ in range(20))
+        )
+        ticker.cancel()
+        assert ticks > 5
+        assert results.count(0) == 5
+
+    try:
+        asyncio.run(run())
+    finally:
+        os.waitpid(pid, 0)
+        buckets.close()
+
+
+def test_range_lock_excludes_threads_of_the_process(tmp_path: str) -> None:
+    fd = os.open(os.path.join(tmp_path, "buckets"), os.O_RDWR | os.O_CREAT)
+    lock = RangeLock(fd)
+
+    assert lock.acquire(0, 8)
+    # `lockf` alone would grant the range again to the same process
+    assert not lock.acquire(0, 8, blocking=False)
+    lock.release(0, 8)
+    assert lock.acquire(0, 8, blocking=False)
+    lock.release(0, 8)
+    os.close(fd)
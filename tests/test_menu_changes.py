@@ -0,0 +1,57 @@
+import asyncio
+import uuid
+
+from pizza_store.entities.products import Category
+from pizza_store.services.products.models import MenuChange, MenuChangeLog
+from pizza_store.services.products.service import ProductsService
+
+PIZZAS = Category(id=uuid.uuid4(), name="Pizzas")
+DRINKS = Category(id=uuid.uuid4(), name="Drinks")
+
+
+class FakeProductsRepo:
+    def __init__(self) -> None:
+        self.changes = [
+            MenuChange(1, "category", PIZZAS.id, "upsert"),
+            MenuChange(2, "category", DRINKS.id, "upsert"),
+            MenuChange(3, "category", PIZZAS.id, "upsert"),
+            MenuChange(4, "category", DRINKS.id, "delete"),
+        ]
+        self.compacted_through = 1
+
+    async def get_menu_changes(self, since: int | None) -> MenuChangeLog:
+        changes = [c for c in self.changes if since is not None and c.version > since]
+        return MenuChangeLog(
+            version=4,
+            compacted_through=self.compacted_through,
+            changes=changes,
+            categories=[PIZZAS],
+            products=[],
+            variants={},
+        )
+
+
+def test_menu_changes() -> None:
+    repo = FakeProductsRepo()
+    service = ProductsService(repo)  # type: ignore
+
+    async def run() -> None:
+        result = await service.get_menu_changes(since=1)
+        assert not result.snapshot and result.version == 4
+        assert result.categories == [PIZZAS]
+        # Changes of one entity are compacted to the latest
+        assert result.deleted == [MenuChange(4, "category", DRINKS.id, "delete")]
+
+        result = await service.get_menu_changes(since=4)
+        assert not result.snapshot and result.deleted == []
+
+        # Changes after the client version were compacted away
+        repo.compacted_through = 2
+        result = await service.get_menu_changes(since=1)
+        assert result.snapshot and result.deleted == []
+
+        assert (await service.get_menu_changes(since=None)).snapshot
+        assert (await service.get_menu_changes(since=5)).snapshot
+        assert (await service.get_menu_changes(since=2, max_changes=1)).snapshot
+
+    asyncio.run(run())
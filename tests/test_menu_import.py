@@ -0,0 +1,83 @@
+import asyncio
+from decimal import Decimal
+from typing import AsyncIterator
+
+from pizza_store.adapters.files.menu import (
+    MenuFileFormat,
+    read_menu_rows,
+    write_menu_rows,
+)
+from pizza_store.services.products.exceptions import InvalidMenuRowsError
+from pizza_store.services.products.models import MenuRow, MenuRowError
+from pizza_store.services.products.service import ProductsService
+
+CSV_MENU = b"""\xef\xbb\xbfcategory,product,description,image_url,variant,weight,weight_units,price
+Pizzas,Margarita,"Tomato,
+mozzarella",https://image.url,Small,300,g,4.5
+Pizzas,Margarita,"Tomato,
+mozzarella",https://image.url,Large,abc,g,7
+
+Drinks
+"""
+
+
+async def _chunks(data: bytes, size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+async def _read(data: bytes, format: MenuFileFormat) -> list[MenuRow | MenuRowError]:
+    return [row async for row in read_menu_rows(_chunks(data, 7), format)]
+
+
+def test_read_menu_rows() -> None:
+    rows = asyncio.run(_read(CSV_MENU, "csv"))
+
+    assert rows == [
+        MenuRow(
+            line=2,
+            category="Pizzas",
+            product="Margarita",
+            description="Tomato,\nmozzarella",
+            image_url="https://image.url",
+            variant="Small",
+            weight=Decimal(300),
+            weight_units="g",
+            price=Decimal("4.5"),
+        ),
+        MenuRowError(line=4, message="Invalid weight 'abc'."),
+        MenuRow(line=7, category="Drinks"),
+    ]
+    exported = "".join(write_menu_rows(rows[::2], "jsonl"))  # type: ignore
+    assert asyncio.run(_read(exported.encode(), "jsonl")) == [
+        MenuRow(**{**rows[0].__dict__, "line": 1}),
+        MenuRow(line=2, category="Drinks"),
+    ]
+
+
+class FakeProductsRepo:
+    def __init__(self) -> None:
+        self.imported: list[MenuRow] = []
+
+    async def import_menu_rows(self, rows: list[MenuRow]) -> None:
+        if any(row.product == "Broken" for row in rows):
+            raise InvalidMenuRowsError("Broken product.")
+        self.imported.extend(rows)
+
+
+def test_import_menu_reports_row_errors() -> None:
+    async def rows() -> AsyncIterator[MenuRow | MenuRowError]:
+        yield MenuRowError(line=1, message="Invalid JSON.")
+        for line in range(2, 7):
+            yield MenuRow(line=line, category="Pizzas", product=f"Pizza {line}")
+        yield MenuRow(line=7, category="Pizzas", product="Broken", image_url="url")
+        yield MenuRow(line=8, category="Pizzas", product="Pizza", image_url="url")
+
+    repo = FakeProductsRepo()
+    service = ProductsService(repo)  # type: ignore
+    result = asyncio.run(service.import_menu(rows(), batch_size=2))
+
+    assert result.rows == 1
+    assert [row.line for row in repo.imported] == [8]
+    assert [error.line for error in result.errors] == [1, 2, 3, 4, 5, 6, 7]
+    assert result.errors[-1].message == "Broken product."
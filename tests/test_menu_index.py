@@ -0,0 +1,270 @@
+import asyncio
+import datetime
+import uuid
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterable
+
+from pizza_store.adapters.shared_memory.cache import SharedMemoryCache
+from pizza_store.entities.products import (
+    Category,
+    CategoryWithProducts,
+    PriceList,
+    Product,
+    ProductVariant,
+)
+from pizza_store.services.products.models import (
+    CategoryUpdate,
+    CategoryUpdated,
+    ProductCreate,
+    ProductCreated,
+    ProductUpsert,
+    ProductUpserted,
+    ProductVariantUpdate,
+    ProductVariantUpdated,
+    VariantPrice,
+    VariantPricesUpdated,
+)
+from pizza_store.services.products.service import ProductsService
+
+PIZZAS = Category(id=uuid.UUID("a552c613-8853-4e37-b2d9-05b995fcd26f"), name="Pizzas")
+DRINKS = Category(id=uuid.UUID("b552c613-8853-4e37-b2d9-05b995fcd26f"), name="Drinks")
+SMALL = ProductVariant(
+    id=uuid.UUID("35f3b5cd-a8b9-441d-aadb-c5bda6498230"),
+    name="Small",
+    weight=Decimal(100),
+    weight_units="g",
+    price=Decimal("2.5"),
+)
+MARGARITA = Product(
+    id=uuid.UUID("2026ab43-1f78-47fd-812e-7570e5b205f3"),
+    name="Margarita",
+    category=PIZZAS,
+    description="",
+    image_url="https://image.url",
+    variants=[SMALL],
+)
+
+
+class FakeProductsRepo:
+    def __init__(self) -> None:
+        self.menu_loads = 0
+        # Variants created by other processes
+        self.variant_prices: dict[uuid.UUID, Decimal] = {}
+        self.price_lookups: list[list[uuid.UUID]] = []
+
+    async def get_menu(self) -> list[CategoryWithProducts]:
+        self.menu_loads += 1
+        return [
+            CategoryWithProducts(id=PIZZAS.id, name=PIZZAS.name, products=[MARGARITA]),
+            CategoryWithProducts(id=DRINKS.id, name=DRINKS.name, products=[]),
+        ]
+
+    async def update_category(self, category: CategoryUpdate) -> CategoryUpdated:
+        return CategoryUpdated(id=category.id)
+
+    async def create_product(self, product: ProductCreate) -> ProductCreated:
+        return ProductCreated(id=uuid.UUID("3026ab43-1f78-47fd-812e-7570e5b205f3"))
+
+    async def upsert_product(self, product: ProductUpsert) -> ProductUpserted:
+        if product.name == MARGARITA.name:
+            return ProductUpserted(id=MARGARITA.id, created=False)
+        return ProductUpserted(id=uuid.uuid4(), created=True)
+
+    async def update_variant_prices(
+        self, prices: list[VariantPrice]
+    ) -> VariantPricesUpdated:
+        return VariantPricesUpdated(ids=[p.id for p in prices])
+
+    async def get_variant_prices(
+        self, ids: Iterable[uuid.UUID]
+    ) -> dict[uuid.UUID, Decimal]:
+        ids = list(ids)
+        self.price_lookups.append(ids)
+        return {id: self.variant_prices[id] for id in ids if id in self.variant_prices}
+
+    async def activate_price_lists(self, now: datetime.datetime) -> list[PriceList]:
+        return [
+            PriceList(
+                id=uuid.uuid4(),
+                activate_at=now,
+                prices={SMALL.id: Decimal(price)},
+                activated_at=now,
+            )
+            for price in ("4", "5")
+        ]
+
+    async def update_product_variant(
+        self, product_variant: ProductVariantUpdate
+    ) -> ProductVariantUpdated:
+        return ProductVariantUpdated(id=product_variant.id)
+
+
+def test_menu_index_is_maintained_by_mutations() -> None:
+    repo = FakeProductsRepo()
+    service = ProductsService(repo)  # type: ignore
+
+    async def run() -> None:
+        assert await service.get_products(PIZZAS.id) == [MARGARITA]
+        assert await service.get_products(DRINKS.id) == []
+
+        await service.update_category(CategoryUpdate(id=PIZZAS.id, name="Pizza"))
+        [product] = await service.get_products(PIZZAS.id)
+        assert product.category.name == "Pizza"
+
+        await service.create_product(
+            ProductCreate(
+                name="Cola",
+                category_id=DRINKS.id,
+                description="",
+                image_url="https://image.url",
+            )
+        )
+        menu = await service.get_menu()
+        assert [len(c.products) for c in menu] == [1, 1]
+
+        await service.update_product_variant(
+            ProductVariantUpdate(
+                id=SMALL.id,
+                name=SMALL.name,
+                weight=SMALL.weight,
+                weight_units=SMALL.weight_units,
+                price=Decimal("3"),
+            )
+        )
+        [product] = await service.get_products(PIZZAS.id)
+        assert product.variants[0].price == Decimal("3")
+
+        await service.upsert_product(
+            ProductUpsert(
+                name=MARGARITA.name,
+                category_id=DRINKS.id,
+                description="Tomato",
+                image_url="https://image.url",
+            )
+        )
+        assert await service.get_products(PIZZAS.id) == []
+        [_, product] = await service.get_products(DRINKS.id)
+        assert product.description == "Tomato" and product.variants[0].id == SMALL.id
+
+    asyncio.run(run())
+    assert repo.menu_loads == 1
+
+
+def test_variant_prices_are_applied_to_menu_index() -> None:
+    repo = FakeProductsRepo()
+    service = ProductsService(repo)  # type: ignore
+
+    async def run() -> None:
+        await service.get_menu()
+        await service.update_variant_prices([VariantPrice(SMALL.id, Decimal("3"))])
+        [product] = await service.get_products(PIZZAS.id)
+        assert product.variants[0].price == Decimal("3")
+        prices = await service.get_variant_prices([SMALL.id, uuid.uuid4()])
+        assert prices == {SMALL.id: Decimal("3")}
+
+        # The latest price list wins
+        await service.activate_due_price_lists()
+        [product] = await service.get_products(PIZZAS.id)
+        assert product.variants[0].price == Decimal("5")
+        assert await service.get_variant_prices([SMALL.id]) == {SMALL.id: Decimal("5")}
+
+    asyncio.run(run())
+    assert repo.menu_loads == 1
+
+
+def test_variants_missing_from_menu_index_are_looked_up() -> None:
+    repo = FakeProductsRepo()
+    service = ProductsService(repo)  # type: ignore
+    # Variant created by another process, the menu index doesn't know it yet
+    new_variant_id = uuid.uuid4()
+    repo.variant_prices[new_variant_id] = Decimal("4")
+
+    async def run() -> None:
+        assert await service.get_variant_prices([SMALL.id]) == {SMALL.id: SMALL.price}
+        assert repo.price_lookups == []
+
+        unknown_id = uuid.uuid4()
+        prices = await service.get_variant_prices(
+            [SMALL.id, new_variant_id, unknown_id]
+        )
+        assert prices == {SMALL.id: SMALL.price, new_variant_id: Decimal("4")}
+        assert repo.price_lookups == [[new_variant_id, unknown_id]]
+
+    asyncio.run(run())
+    assert repo.menu_loads == 1
+
+
+def test_menu_index_is_reloaded_if_stale() -> None:
+    repo = FakeProductsRepo()
+    service = ProductsService(repo)  # type: ignore
+
+    async def run() -> None:
+        await service.get_categories()
+        # Category created by another process
+        await service.create_product(
+            ProductCreate(
+                name="Burger",
+                category_id=uuid.uuid4(),
+                description="",
+                image_url="https://image.url",
+            )
+        )
+        await service.get_categories()
+
+    asyncio.run(run())
+    assert repo.menu_loads == 2
+
+
+def test_menu_is_shared_between_workers(tmp_path: Path) -> None:
+    repo = FakeProductsRepo()
+    path = str(tmp_path / "cache")
+    # Services of two workers, each maps the file
+    worker = ProductsService(repo, shared_cache=SharedMemoryCache(path))  # type: ignore
+    other_worker = ProductsService(
+        repo, shared_cache=SharedMemoryCache(path)  # type: ignore
+    )
+
+    async def run() -> None:
+        assert await worker.get_menu() == await other_worker.get_menu()
+        assert repo.menu_loads == 1
+
+        await worker.update_category(CategoryUpdate(id=PIZZAS.id, name="Pizza"))
+        [product] = await other_worker.get_products(PIZZAS.id)
+        assert product.category.name == "Pizza"
+        assert repo.menu_loads == 1
+
+        # Menu of the worker misses the change of the other worker, so it is
+        # not stored and workers reload the menu from the repo
+        await other_worker.update_variant_prices([VariantPrice(SMALL.id, Decimal("3"))])
+        await worker.update_category(CategoryUpdate(id=PIZZAS.id, name="Pizza"))
+        await other_worker.get_menu()
+        await worker.get_menu()
+        assert repo.menu_loads == 2
+
+    asyncio.run(run())
+
+
+def test_stores_have_own_menus(tmp_path: Path) -> None:
+    path = str(tmp_path / "cache")
+    repo, other_repo = FakeProductsRepo(), FakeProductsRepo()
+    service = ProductsService(
+        repo, shared_cache=SharedMemoryCache(path), store="downtown"  # type: ignore
+    )
+    other_store = ProductsService(
+        other_repo,  # type: ignore
+        shared_cache=SharedMemoryCache(path),
+        store="uptown",
+    )
+
+    async def run() -> None:
+        await service.get_menu()
+        await other_store.get_menu()
+        await service.update_category(CategoryUpdate(id=PIZZAS.id, name="Pizza"))
+
+        # The change of one store's menu doesn't reload menus of others
+        [category, _] = await other_store.get_categories()
+        assert category.name == "Pizzas"
+        assert (repo.menu_loads, other_repo.menu_loads) == (1, 1)
+
+    asyncio.run(run())
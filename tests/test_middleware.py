@@ -0,0 +1,78 @@
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from pizza_store.adapters.app.middleware import (
+    CompressionMiddleware,
+    ETagMiddleware,
+    parse_accept_encoding,
+)
+
+PRODUCTS = [
+    {"id": i, "name": f"Pizza {i}", "description": "Tomato"} for i in range(100)
+]
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/products")
+    async def get_products() -> list[dict[str, object]]:
+        return PRODUCTS
+
+    @app.get("/products/1")
+    async def get_product() -> dict[str, object]:
+        return PRODUCTS[1]
+
+    @app.get("/export")
+    async def export() -> StreamingResponse:
+        return StreamingResponse(
+            (f"{p}\n" for p in PRODUCTS), media_type="application/x-ndjson"
+        )
+
+    app.add_middleware(ETagMiddleware)
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return app
+
+
+def test_parse_accept_encoding() -> None:
+    assert parse_accept_encoding("gzip, br;q=0.5, identity;q=0") == {
+        "gzip": 1.0,
+        "br": 0.5,
+        "identity": 0.0,
+    }
+
+
+def test_compression() -> None:
+    client = TestClient(create_app())
+
+    response = client.get("/products", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.json() == PRODUCTS
+
+    response = client.get("/products/1", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+    response = client.get("/export", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.text.count("\n") == len(PRODUCTS)
+
+
+def test_etag() -> None:
+    client = TestClient(create_app())
+
+    response = client.get("/products", headers={"Accept-Encoding": "identity"})
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    response = client.get("/products", headers={"If-None-Match": f'"x", {etag}'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    response = client.get("/products", headers={"If-None-Match": '"x"'})
+    assert response.status_code == 200
+
+    response = client.get("/export")
+    assert "ETag" not in response.headers
@@ -0,0 +1,202 @@
+import asyncio
+import dataclasses
+import datetime
+import os
+import uuid
+
+from pizza_store.adapters.journal.orders import OrdersJournal
+from pizza_store.services.orders.drainer import (
+    VARIANT_NOT_FOUND_REASON,
+    OrdersJournalDrainer,
+)
+from pizza_store.services.orders.models import (
+    JournaledOrder,
+    OrderCreate,
+    OrderCreated,
+    OrderItemCreate,
+)
+from pizza_store.services.products.exceptions import ProductVariantNotFoundError
+
+
+def _journaled_order() -> JournaledOrder:
+    return JournaledOrder(
+        id=uuid.uuid4(),
+        order=OrderCreate(
+            phone="+380991231212",
+            items=[
+                OrderItemCreate(
+                    product_variant_id=uuid.UUID(
+                        "35f3b5cd-a8b9-441d-aadb-c5bda6498230"
+                    ),
+                    amount=2,
+                )
+            ],
+            note="",
+            address="Baker street 221 B",
+        ),
+        accepted_at=datetime.datetime(2022, 3, 2, 19, 15, tzinfo=datetime.timezone.utc),
+    )
+
+
+class FakeOrdersRepo:
+    def __init__(self) -> None:
+        self.intake_ids: list[uuid.UUID] = []
+        self.deleted_variant_ids: set[uuid.UUID] = set()
+        self.rejected: dict[uuid.UUID, str] = {}
+
+    async def create_journaled_orders(
+        self, orders: list[JournaledOrder]
+    ) -> list[OrderCreated]:
+        for order in orders:
+            for item in order.order.items:
+                if item.product_variant_id in self.deleted_variant_ids:
+                    raise ProductVariantNotFoundError
+        new = [o for o in orders if o.id not in self.intake_ids]
+        self.intake_ids.extend(o.id for o in new)
+        return [OrderCreated(id=o.id) for o in new]
+
+    async def reject_journaled_orders(
+        self, orders: list[JournaledOrder], reason: str
+    ) -> None:
+        for order in orders:
+            self.rejected.setdefault(order.id, reason)
+
+
+def test_journal_replays_pending_orders(tmp_path: str) -> None:
+    first, second = _journaled_order(), _journaled_order()
+
+    async def write() -> None:
+        journal = OrdersJournal(str(tmp_path))
+        journal.open()
+        await asyncio.gather(journal.append(first), journal.append(second))
+        await journal.commit([first.id])
+        journal.close()
+
+    asyncio.run(write())
+    # Torn write of an unacknowledged record
+    with open(os.path.join(tmp_path, "orders-0.journal"), "ab") as f:
+        f.write(b'{"type": "order", "id": ')
+
+    journal = OrdersJournal(str(tmp_path))
+    journal.open()
+    assert journal.pending(10) == [second]
+    journal.close()
+
+
+def test_journal_slots_are_exclusive(tmp_path: str) -> None:
+    first, second = OrdersJournal(str(tmp_path)), OrdersJournal(str(tmp_path))
+    first.open()
+    second.open()
+    assert first.path != second.path
+    first.close()
+    second.close()
+
+
+def test_journal_compaction_keeps_pending_orders(tmp_path: str) -> None:
+    orders = [_journaled_order() for _ in range(20)]
+
+    async def write() -> None:
+        journal = OrdersJournal(str(tmp_path), compact_size=2048)
+        journal.open()
+        await asyncio.gather(*(journal.append(o) for o in orders))
+        await journal.commit([o.id for o in orders[:15]])
+        assert os.path.getsize(journal.path or "") < 2048
+        journal.close()
+
+    asyncio.run(write())
+    journal = OrdersJournal(str(tmp_path))
+    journal.open()
+    assert journal.pending(100) == orders[15:]
+    journal.close()
+
+
+def test_drainer_stores_each_order_once(tmp_path: str) -> None:
+    repo = FakeOrdersRepo()
+    orders = [_journaled_order() for _ in range(5)]
+
+    async def drain() -> None:
+        journal = OrdersJournal(str(tmp_path))
+        journal.open()
+        await asyncio.gather(*(journal.append(o) for o in orders))
+        # Crash after the repo stored the batch but before the journal commit
+        await repo.create_journaled_orders(orders[:3])
+        drainer = OrdersJournalDrainer(repo, journal, batch_size=2)
+        await drainer.stop()
+        assert journal.pending(10) == []
+        journal.close()
+
+    asyncio.run(drain())
+    assert repo.intake_ids == [o.id for o in orders]
+
+
+def test_drainer_rejects_orders_of_deleted_variants(tmp_path: str) -> None:
+    repo = FakeOrdersRepo()
+    orders = [_journaled_order() for _ in range(3)]
+    deleted_variant_id = uuid.uuid4()
+    orders[1] = dataclasses.replace(
+        orders[1],
+        order=dataclasses.replace(
+            orders[1].order,
+            items=[OrderItemCreate(product_variant_id=deleted_variant_id, amount=1)],
+        ),
+    )
+    repo.deleted_variant_ids.add(deleted_variant_id)
+
+    async def drain() -> None:
+        journal = OrdersJournal(str(tmp_path))
+        journal.open()
+        await asyncio.gather(*(journal.append(o) for o in orders))
+        drainer = OrdersJournalDrainer(repo, journal)
+        assert await drainer.drain_once() == 3
+        assert journal.pending(10) == []
+        journal.close()
+
+    asyncio.run(drain())
+    assert repo.intake_ids == [orders[0].id, orders[2].id]
+    assert repo.rejected == {orders[1].id: VARIANT_NOT_FOUND_REASON}
+
+
+def test_journal_appends_after_torn_record(tmp_path: str) -> None:
+    first, second = _journaled_order(), _journaled_order()
+
+    async def append(order: JournaledOrder) -> None:
+        journal = OrdersJournal(str(tmp_path))
+        journal.open()
+        await journal.append(order)
+        journal.close()
+
+    asyncio.run(append(first))
+    with open(os.path.join(tmp_path, "orders-0.journal"), "ab") as f:
+        f.write(b'{"type": "order", "id": ')
+    asyncio.run(append(second))
+
+    journal = OrdersJournal(str(tmp_path))
+    journal.open()
+    assert journal.pending(10) == [first, second]
+    journal.close()
+
+
+def test_journal_adopts_slots_of_removed_workers(tmp_path: str) -> None:
+    orders = [_journaled_order() for _ in range(2)]
+
+    async def write() -> None:
+        # Two workers, scaled down to one afterwards
+        journals = [OrdersJournal(str(tmp_path)) for _ in orders]
+        for journal, order in zip(journals, orders):
+            journal.open()
+            await journal.append(order)
+        for journal in journals:
+            journal.close()
+
+    asyncio.run(write())
+    journal = OrdersJournal(str(tmp_path))
+    journal.open()
+    assert journal.pending(10) == orders
+    journal.close()
+
+    # Orders are moved, not copied
+    assert os.path.getsize(os.path.join(tmp_path, "orders-1.journal")) == 0
+    journal = OrdersJournal(str(tmp_path))
+    journal.open()
+    assert journal.pending(10) == orders
+    journal.close()
@@ -0,0 +1,86 @@
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from pizza_store.adapters.app.dependencies import get_auth_service, get_orders_service
+from pizza_store.adapters.app.routes.orders import router
+from pizza_store.entities.orders import Order
+from pizza_store.services.auth.models import JWTConfig, UserTokenData
+from pizza_store.services.auth.service import AuthService
+from pizza_store.services.orders.models import OrdersFilter, OrderUpdate, OrderUpdated
+
+JWT_CONFIG = JWTConfig(algorithm="HS256", secret="secret", expires_in=3600)
+ADMIN_TOKEN = AuthService.create_access_token(
+    UserTokenData(id=uuid.uuid4(), is_admin=True), 2**31, JWT_CONFIG
+)
+ORDER = {
+    "phone": "+380991231212",
+    "items": [
+        {"product_variant_id": "35f3b5cd-a8b9-441d-aadb-c5bda6498230", "amount": 1}
+    ],
+    "status": "COMPLETED",
+    "note": "",
+    "address": "Baker street 221 B",
+}
+
+
+class FakeOrdersService:
+    def __init__(self) -> None:
+        self.updates: list[OrderUpdate] = []
+        self.filters: list[OrdersFilter] = []
+
+    async def get_orders(self, filter: OrdersFilter) -> list[Order]:
+        self.filters.append(filter)
+        return []
+
+    async def update_order(self, order: OrderUpdate) -> OrderUpdated:
+        self.updates.append(order)
+        return OrderUpdated(id=order.id, version=(order.version or 1) + 1)
+
+
+def create_client(service: FakeOrdersService) -> TestClient:
+    app = FastAPI()
+    app.include_router(router)
+
+    async def get_fake_orders_service() -> FakeOrdersService:
+        return service
+
+    app.dependency_overrides[get_orders_service] = get_fake_orders_service
+    app.dependency_overrides[get_auth_service] = lambda: AuthService(
+        None, JWT_CONFIG  # type: ignore
+    )
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {ADMIN_TOKEN}"
+    return client
+
+
+def test_update_order_requires_if_match() -> None:
+    service = FakeOrdersService()
+    client = create_client(service)
+    id = uuid.uuid4()
+
+    response = client.put(f"/orders/{id}", json=ORDER)
+    assert response.status_code == 428
+    assert service.updates == []
+
+    response = client.put(f"/orders/{id}", json=ORDER, headers={"If-Match": '"3"'})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"4"'
+    assert service.updates[-1].version == 3
+
+    response = client.put(f"/orders/{id}", json=ORDER, headers={"If-Match": "*"})
+    assert response.status_code == 200
+    assert service.updates[-1].version is None
+
+
+def test_get_orders_with_several_statuses() -> None:
+    service = FakeOrdersService()
+    client = create_client(service)
+
+    response = client.get("/orders?status=UNCOMPLETED&status=COMPLETED")
+    assert response.status_code == 200
+    assert service.filters == [OrdersFilter(statuses=["UNCOMPLETED", "COMPLETED"])]
+
+    response = client.get("/orders?status=DELIVERED")
+    assert response.status_code == 422
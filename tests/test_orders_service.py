@@ -0,0 +1,366 @@
+import asyncio
+import dataclasses
+import datetime
+import uuid
+from decimal import Decimal
+from typing import Iterable
+
+import pytest
+
+from pizza_store.adapters.db.repos.orders import OrdersServiceRepo
+from pizza_store.entities.orders import Order, OrderStatusSummary
+from pizza_store.services.delivery.exceptions import AddressNotDeliverableError
+from pizza_store.services.delivery.models import DeliveryZone
+from pizza_store.services.orders.exceptions import (
+    InvalidOrderError,
+    InvalidOrderTransitionError,
+    OrderNotFoundError,
+    OrderRejectedError,
+    OrderVersionConflictError,
+)
+from pizza_store.services.orders.models import (
+    OrderCreate,
+    OrderCreated,
+    OrderItemCreate,
+    OrdersFilter,
+    OrderUpdate,
+    OrderUpdated,
+    RejectedOrder,
+)
+from pizza_store.services.orders.service import OrdersService
+from pizza_store.services.products.exceptions import ProductVariantNotFoundError
+
+ORDER = OrderCreate(
+    phone="+380991231212",
+    items=[
+        OrderItemCreate(
+            product_variant_id=uuid.UUID("35f3b5cd-a8b9-441d-aadb-c5bda6498230"),
+            amount=2,
+        )
+    ],
+    note="",
+    address="Baker street 221 B",
+)
+
+
+ARCHIVED_ORDER = Order(
+    id=uuid.UUID("f7240c84-f12f-4bce-bbe4-76c3105cf6a6"),
+    phone="+380991231212",
+    address="Baker street 221 B",
+    items=[],
+    status="COMPLETED",
+    note="",
+    created_at=datetime.datetime(2022, 3, 2, 19, 15),
+)
+
+
+class FakeOrdersRepo:
+    def __init__(self) -> None:
+        self.summary_loads = 0
+        self.orders_to_archive = 0
+        self.journaled_orders: dict[uuid.UUID, Order] = {}
+        self.rejected_orders: dict[uuid.UUID, RejectedOrder] = {}
+
+    async def create_order(self, order: OrderCreate) -> OrderCreated:
+        return OrderCreated(id=uuid.uuid4())
+
+    async def get_order(self, id: uuid.UUID) -> Order:
+        raise OrderNotFoundError
+
+    async def get_order_by_intake_id(self, intake_id: uuid.UUID) -> Order:
+        if intake_id not in self.journaled_orders:
+            raise OrderNotFoundError
+        return self.journaled_orders[intake_id]
+
+    async def get_archived_order(self, id: uuid.UUID) -> Order:
+        if id != ARCHIVED_ORDER.id:
+            raise OrderNotFoundError
+        return ARCHIVED_ORDER
+
+    async def get_rejected_order(self, intake_id: uuid.UUID) -> RejectedOrder:
+        if intake_id not in self.rejected_orders:
+            raise OrderNotFoundError
+        return self.rejected_orders[intake_id]
+
+    async def archive_orders(
+        self, created_before: datetime.datetime, batch_size: int
+    ) -> int:
+        count = min(batch_size, self.orders_to_archive)
+        self.orders_to_archive -= count
+        return count
+
+    async def get_orders_summary(self) -> list[OrderStatusSummary]:
+        self.summary_loads += 1
+        return [
+            OrderStatusSummary(status="UNCOMPLETED", count=1, total_price=Decimal("5"))
+        ]
+
+
+def test_orders_summary_is_cached_until_mutation() -> None:
+    repo = FakeOrdersRepo()
+    service = OrdersService(repo)  # type: ignore
+
+    async def run() -> None:
+        await asyncio.gather(*(service.get_orders_summary() for _ in range(10)))
+        assert repo.summary_loads == 1
+        await service.create_order(ORDER)
+        await service.get_orders_summary()
+        assert repo.summary_loads == 2
+
+    asyncio.run(run())
+
+
+def test_orders_summary_expires() -> None:
+    repo = FakeOrdersRepo()
+    service = OrdersService(repo, summary_ttl=0)  # type: ignore
+
+    async def run() -> None:
+        await service.get_orders_summary()
+        await service.get_orders_summary()
+
+    asyncio.run(run())
+    assert repo.summary_loads == 2
+
+
+def test_get_order_falls_back_to_archive() -> None:
+    service = OrdersService(FakeOrdersRepo())  # type: ignore
+
+    assert asyncio.run(service.get_order(ARCHIVED_ORDER.id)) == ARCHIVED_ORDER
+    try:
+        asyncio.run(service.get_order(uuid.uuid4()))
+    except OrderNotFoundError:
+        pass
+    else:
+        assert False, "OrderNotFoundError was not raised"
+
+
+def test_get_order_by_intake_id() -> None:
+    repo = FakeOrdersRepo()
+    intake_id = uuid.uuid4()
+    service = OrdersService(repo)  # type: ignore
+
+    async def run() -> None:
+        # Accepted into the journal, not drained yet
+        with pytest.raises(OrderNotFoundError):
+            await service.get_order(intake_id)
+        order = dataclasses.replace(ARCHIVED_ORDER, id=uuid.uuid4())
+        repo.journaled_orders[intake_id] = order
+        assert await service.get_order(intake_id) == order
+
+        rejected_id = uuid.uuid4()
+        repo.rejected_orders[rejected_id] = RejectedOrder(
+            id=rejected_id,
+            reason="Product variant does not exist.",
+            rejected_at=datetime.datetime.now(datetime.timezone.utc),
+        )
+        with pytest.raises(OrderRejectedError) as e:
+            await service.get_order(rejected_id)
+        assert e.value.reason == "Product variant does not exist."
+
+    asyncio.run(run())
+
+
+def test_archive_orders_in_batches() -> None:
+    repo = FakeOrdersRepo()
+    repo.orders_to_archive = 2500
+    service = OrdersService(repo)  # type: ignore
+
+    archived = asyncio.run(
+        service.archive_orders(datetime.timedelta(days=90), batch_size=1000)
+    )
+    assert archived == 2500
+    assert repo.orders_to_archive == 0
+
+
+class FakeVariants:
+    def __init__(self, prices: dict[uuid.UUID, Decimal]) -> None:
+        self.prices = prices
+
+    async def get_variant_prices(
+        self, ids: Iterable[uuid.UUID]
+    ) -> dict[uuid.UUID, Decimal]:
+        return {id: self.prices[id] for id in ids if id in self.prices}
+
+
+def test_order_items_are_merged_and_priced_before_create() -> None:
+    variant_id = ORDER.items[0].product_variant_id
+    other_id = uuid.uuid4()
+    repo = FakeOrdersRepo()
+    created: list[OrderCreate] = []
+
+    async def create_order(order: OrderCreate) -> OrderCreated:
+        created.append(order)
+        return OrderCreated(id=uuid.uuid4())
+
+    repo.create_order = create_order  # type: ignore
+    variants = FakeVariants({variant_id: Decimal("2.5"), other_id: Decimal("1")})
+    service = OrdersService(repo, variants=variants)  # type: ignore
+    order = dataclasses.replace(
+        ORDER,
+        items=[
+            OrderItemCreate(product_variant_id=variant_id, amount=2),
+            OrderItemCreate(product_variant_id=other_id, amount=1),
+            OrderItemCreate(product_variant_id=variant_id, amount=3),
+        ],
+    )
+
+    async def run() -> None:
+        result = await service.create_order(order)
+        assert result.total_price == Decimal("13.5")
+        assert created[0].items == [
+            OrderItemCreate(product_variant_id=variant_id, amount=5),
+            OrderItemCreate(product_variant_id=other_id, amount=1),
+        ]
+
+        unknown = dataclasses.replace(
+            ORDER, items=[OrderItemCreate(product_variant_id=uuid.uuid4(), amount=1)]
+        )
+        with pytest.raises(ProductVariantNotFoundError):
+            await service.create_order(unknown)
+        assert len(created) == 1
+
+        # Merged amount is validated too
+        too_many = dataclasses.replace(
+            ORDER,
+            items=[
+                OrderItemCreate(product_variant_id=variant_id, amount=20000),
+                OrderItemCreate(product_variant_id=variant_id, amount=20000),
+            ],
+        )
+        with pytest.raises(InvalidOrderError):
+            await service.create_order(too_many)
+        assert len(created) == 1
+
+    asyncio.run(run())
+
+
+def test_delivery_zone_is_stored_on_order() -> None:
+    repo = FakeOrdersRepo()
+    created: list[OrderCreate] = []
+
+    async def create_order(order: OrderCreate) -> OrderCreated:
+        created.append(order)
+        return OrderCreated(id=uuid.uuid4())
+
+    repo.create_order = create_order  # type: ignore
+    zone = DeliveryZone(name="center", polygons=[])
+
+    class FakeDelivery:
+        async def get_zone(self, address: str) -> DeliveryZone:
+            if address != ORDER.address:
+                raise AddressNotDeliverableError
+            return zone
+
+    service = OrdersService(repo, delivery=FakeDelivery())  # type: ignore
+
+    async def run() -> None:
+        await service.create_order(ORDER)
+        assert created[0].delivery_zone == "center"
+        with pytest.raises(AddressNotDeliverableError):
+            await service.create_order(dataclasses.replace(ORDER, address="Moon"))
+        assert len(created) == 1
+
+    asyncio.run(run())
+
+
+class RecordingClient:
+    def __init__(self) -> None:
+        self.queries: list[tuple[str, dict[str, object]]] = []
+
+    async def query(self, query: str, **kwargs: object) -> list[object]:
+        self.queries.append((query, kwargs))
+        return []
+
+
+def test_orders_repo_queries_are_filtered_by_store() -> None:
+    client = RecordingClient()
+    repo = OrdersServiceRepo(client, store="uptown")  # type: ignore
+
+    async def run() -> None:
+        await repo.get_orders()
+        await repo.get_orders(OrdersFilter(phone="+380991231212"))
+        for query, kwargs in client.queries:
+            assert ".store = <str>$store" in query
+            assert kwargs["store"] == "uptown"
+
+    asyncio.run(run())
+
+
+def test_orders_filter_conditions() -> None:
+    repo = OrdersServiceRepo(RecordingClient(), store="uptown")  # type: ignore
+    created_from = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+    created_to = datetime.datetime(2022, 2, 1, tzinfo=datetime.timezone.utc)
+
+    assert repo._build_orders_filter(OrdersFilter()) == (
+        [".store = <str>$store"],
+        {"store": "uptown"},
+    )
+    assert repo._build_orders_filter(
+        OrdersFilter(
+            statuses=["UNCOMPLETED", "COMPLETED"],
+            created_from=created_from,
+            created_to=created_to,
+            phone="+380991231212",
+            delivery_zone="center",
+        )
+    ) == (
+        [
+            ".store = <str>$store",
+            ".status in <orders::OrderStatus>array_unpack(<array<str>>$statuses)",
+            ".created_at >= <datetime>$created_from",
+            ".created_at < <datetime>$created_to",
+            ".phone = <str>$phone",
+            ".delivery_zone = <str>$delivery_zone",
+        ],
+        {
+            "store": "uptown",
+            "statuses": ["UNCOMPLETED", "COMPLETED"],
+            "created_from": created_from,
+            "created_to": created_to,
+            "phone": "+380991231212",
+            "delivery_zone": "center",
+        },
+    )
+
+
+def test_updates_are_compare_and_set() -> None:
+    repo = FakeOrdersRepo()
+    stored = {"status": "UNCOMPLETED", "version": 1}
+
+    async def update_order(order: OrderUpdate) -> OrderUpdated:
+        # Matches like the conditional update of the repo
+        if order.version is not None and order.version != stored["version"]:
+            raise OrderVersionConflictError
+        assert order.from_statuses is not None
+        if stored["status"] not in order.from_statuses:
+            raise InvalidOrderTransitionError
+        stored["status"] = order.status
+        stored["version"] = int(stored["version"]) + 1
+        return OrderUpdated(id=order.id, version=int(stored["version"]))
+
+    repo.update_order = update_order  # type: ignore
+    service = OrdersService(repo)  # type: ignore
+    update = OrderUpdate(
+        id=uuid.uuid4(),
+        phone=ORDER.phone,
+        items=ORDER.items,
+        status="CANCELLED",
+        note="",
+        address=ORDER.address,
+        version=1,
+    )
+
+    async def run() -> None:
+        assert (await service.update_order(update)).version == 2
+        # Another writer still has version 1
+        with pytest.raises(OrderVersionConflictError):
+            await service.update_order(update)
+        # Cancelled orders can be edited but not reopened
+        await service.update_order(dataclasses.replace(update, version=2))
+        with pytest.raises(InvalidOrderTransitionError):
+            await service.update_order(
+                dataclasses.replace(update, status="UNCOMPLETED", version=None)
+            )
+        assert stored == {"status": "CANCELLED", "version": 3}
+
+    asyncio.run(run())
@@ -0,0 +1,107 @@
+import asyncio
+import uuid
+from typing import Any, AsyncIterator
+
+from pizza_store.adapters.db.query_log import InstrumentedClient, QueryLog, redact_args
+
+
+class FakeExecutor:
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+
+    async def query(self, query: str, *args: Any, **kwargs: Any) -> list[int]:
+        await asyncio.sleep(self.delay)
+        return [1, 2, 3]
+
+    async def query_single(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        await asyncio.sleep(self.delay)
+        if query.startswith("analyze"):
+            return "plan"
+        return None
+
+
+class FakeTransaction(FakeExecutor):
+    async def __aenter__(self) -> "FakeTransaction":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+
+class FakeClient(FakeExecutor):
+    def transaction(self) -> AsyncIterator[FakeTransaction]:
+        async def attempts() -> AsyncIterator[FakeTransaction]:
+            # The first attempt is retried
+            yield FakeTransaction(0)
+            yield FakeTransaction(self.delay)
+
+        return attempts()
+
+
+class FakeRepo:
+    def __init__(self, client: Any) -> None:
+        self._client = client
+
+    async def get_products(self) -> None:
+        await self._client.query("select Product { name }", limit=10)
+
+    async def get_user(self, username: str) -> None:
+        await self._client.query_single(
+            "select User filter .username = <str>$username", username=username
+        )
+
+    async def update_prices(self) -> None:
+        async for tx in self._client.transaction():
+            async with tx:
+                await tx.query("update ProductVariant set { price := 1 }")
+
+
+def test_redact_args() -> None:
+    id = uuid.uuid4()
+    assert redact_args(("secret",), {"id": id, "limit": 5, "ids": [1, 2]}) == {
+        "0": "<str len=6>",
+        "id": str(id),
+        "limit": "5",
+        "ids": "<list len=2>",
+    }
+
+
+def test_query_log() -> None:
+    log = QueryLog(slow_threshold=0.01, analyze_sample_rate=1.0)
+    repo = FakeRepo(InstrumentedClient(FakeClient(0.02), log))  # type: ignore
+
+    async def run() -> None:
+        await repo.get_products()
+        await repo.get_user("admin")
+        await repo.update_prices()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+
+    stats = {s.name: s for s in log.get_top()}
+    assert set(stats) == {
+        "FakeRepo.get_products",
+        "FakeRepo.get_user",
+        "FakeRepo.update_prices",
+    }
+
+    products = stats["FakeRepo.get_products"]
+    assert products.query == "select Product { name }"
+    assert products.count == products.slow_count == 1
+    assert products.last_slow is not None
+    assert products.last_slow.rows == 3
+    assert products.last_slow.args == {"limit": "10"}
+    assert products.analyze == "plan"
+
+    user = stats["FakeRepo.get_user"]
+    assert user.last_slow is not None
+    assert user.last_slow.rows == 0
+    assert user.last_slow.args == {"username": "<str len=5>"}
+
+    prices = stats["FakeRepo.update_prices"]
+    assert prices.count == 2
+    assert prices.slow_count == 1
+    assert prices.last_slow is not None
+    assert prices.last_slow.retries == 1
+    # Write queries are not analyzed
+    assert prices.analyze is None
@@ -0,0 +1,87 @@
+import asyncio
+import datetime
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from pizza_store.adapters.app.middleware import ReadYourWritesMiddleware
+from pizza_store.adapters.db.replicas import ReplicaRouter, _primary_reads
+
+
+class FakePrimary:
+    def __init__(self) -> None:
+        self.heartbeat: datetime.datetime | None = None
+
+    async def query(self, query: str, **kwargs: Any) -> list[Any]:
+        self.heartbeat = kwargs["at"]
+        return []
+
+
+class FakeReplica:
+    def __init__(self, primary: FakePrimary, lag: float) -> None:
+        self.primary = primary
+        self.lag = lag
+
+    async def query_single(self, query: str, **kwargs: Any) -> Any:
+        if self.primary.heartbeat is None:
+            return None
+        return SimpleNamespace(
+            at=self.primary.heartbeat - datetime.timedelta(seconds=self.lag)
+        )
+
+
+def create_router(lag: float) -> ReplicaRouter:
+    primary = FakePrimary()
+    replica = FakeReplica(primary, lag)
+    return ReplicaRouter(primary, replica, max_lag=2.0)  # type: ignore
+
+
+def test_replica_router() -> None:
+    async def run() -> None:
+        router = create_router(lag=0.5)
+        # Lag is unknown until checked
+        assert router.reader() is router.primary
+
+        assert 0.5 <= await router.check_lag() < 1
+        assert router.reader() is router.replica
+        token = _primary_reads.set(True)
+        assert router.reader() is router.primary
+        _primary_reads.reset(token)
+
+        # Lag expires if the heartbeat is not checked
+        router._lag_expires_at = time.monotonic() - 1
+        assert router.reader() is router.primary
+
+        router = create_router(lag=5)
+        await router.check_lag()
+        assert router.reader() is router.primary
+
+    asyncio.run(run())
+
+
+def test_read_your_writes_middleware() -> None:
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=5)
+
+    @app.get("/reads")
+    async def get_reads() -> bool:
+        return _primary_reads.get()
+
+    @app.post("/writes")
+    async def create_write(request: Request) -> bool:
+        return _primary_reads.get()
+
+    client = TestClient(app)
+    assert client.get("/reads").json() is False
+    response = client.post("/writes")
+    assert response.json() is True
+    assert "HttpOnly" in response.headers["set-cookie"]
+    # Cookie is kept by the client
+    assert client.get("/reads").json() is True
+
+    client.cookies.clear()
+    client.cookies.set("primary_reads_until", str(int(time.time()) - 1))
+    assert client.get("/reads").json() is False
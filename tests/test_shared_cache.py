@@ -0,0 +1,68 @@
+import asyncio
+import fcntl
+import os
+import time
+from pathlib import Path
+
+from pizza_store.adapters.shared_memory.cache import SharedMemoryCache
+
+
+def test_shared_memory_cache(tmp_path: Path) -> None:
+    path = str(tmp_path / "cache")
+    cache = SharedMemoryCache(path, slots=2, max_value_size=16)
+    other_cache = SharedMemoryCache(path, slots=2, max_value_size=16)
+
+    async def run() -> None:
+        assert await cache.get("menu") == (0, None)
+        assert await cache.set("menu", 0, b"v0", ttl=60)
+        assert await other_cache.get("menu") == (0, b"v0")
+
+        assert await other_cache.invalidate("menu") == 1
+        assert await cache.get("menu") == (1, None)
+        # Computed before the invalidation
+        assert not await cache.set("menu", 0, b"v0", ttl=60)
+        assert not await cache.set("menu", 1, b"x" * 17, ttl=60)
+        assert await cache.set("menu", 1, b"v1", ttl=-1)
+        assert await other_cache.get("menu") == (1, None)
+
+        assert await cache.invalidate("users") == 1
+        assert await other_cache.get_version("users") == 1
+        assert await other_cache.get_version("menu") == 1
+
+    asyncio.run(run())
+
+
+def test_shared_memory_cache_waits_off_event_loop(tmp_path: Path) -> None:
+    path = str(tmp_path / "cache")
+    cache = SharedMemoryCache(path, slots=2, max_value_size=16)
+    ready_read, ready_write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # Other worker holding every slot for a while
+        fd = os.open(path, os.O_RDWR)
+        fcntl.lockf(fd, fcntl.LOCK_EX)
+        os.write(ready_write, b"1")
+        time.sleep(0.2)
+        os._exit(0)
+    os.read(ready_read, 1)
+
+    async def run() -> None:
+        ticks = 0
+
+        async def tick() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        assert await cache.set("menu", 0, b"v0", ttl=60)
+        assert await cache.get("menu") == (0, b"v0")
+        ticker.cancel()
+        assert ticks > 5
+
+    try:
+        asyncio.run(run())
+    finally:
+        os.waitpid(pid, 0)
+        cache.close()
@@ -0,0 +1,123 @@
+import json
+import os
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from pizza_store.adapters.app.tracing import (
+    TracingMiddleware,
+    instrument_routes,
+    trace_service,
+)
+from pizza_store.adapters.tracing.tracer import (
+    FileSpanExporter,
+    InMemorySpanExporter,
+    SpanContext,
+    Tracer,
+    format_traceparent,
+    parse_traceparent,
+    to_otlp_json,
+)
+
+TRACEPARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+class PizzaService:
+    async def get_pizza(self, id: int) -> dict[str, object]:
+        return {"id": id, "name": "Margherita"}
+
+
+def create_app(tracer: Tracer) -> FastAPI:
+    app = FastAPI()
+    service = trace_service(PizzaService(), tracer)
+
+    def get_service() -> PizzaService:
+        return service
+
+    @app.get("/pizzas/{id}")
+    async def get_pizza(
+        id: int, service: PizzaService = Depends(get_service)
+    ) -> dict[str, object]:
+        return await service.get_pizza(id)
+
+    instrument_routes(app, tracer)
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+    return app
+
+
+def test_traceparent() -> None:
+    context = parse_traceparent(TRACEPARENT)
+    assert context == SpanContext(
+        trace_id=0x4BF92F3577B34DA6A3CE929D0E0E4736,
+        span_id=0x00F067AA0BA902B7,
+        sampled=True,
+    )
+    assert format_traceparent(context) == TRACEPARENT
+    assert parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01") is None
+    assert parse_traceparent("ff" + TRACEPARENT[2:]) is None
+    assert parse_traceparent("garbage") is None
+
+
+def test_request_spans() -> None:
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(exporter, sample_rate=0.0)
+    client = TestClient(create_app(tracer))
+
+    # Not sampled locally, the sampled parent decides
+    response = client.get("/pizzas/1", headers={"traceparent": TRACEPARENT})
+    assert response.json() == {"id": 1, "name": "Margherita"}
+    tracer.flush()
+
+    spans = {span.name: span for span in exporter.spans}
+    assert set(spans) == {
+        "GET /pizzas/{id}",
+        "resolve dependencies",
+        "get_pizza",
+        "PizzaService.get_pizza",
+        "serialize response",
+    }
+    assert {span.context.trace_id for span in exporter.spans} == {
+        0x4BF92F3577B34DA6A3CE929D0E0E4736
+    }
+    request = spans["GET /pizzas/{id}"]
+    assert request.kind == "SERVER"
+    assert request.parent_id == 0x00F067AA0BA902B7
+    assert request.attributes["http.status_code"] == 200
+    assert spans["get_pizza"].parent_id == request.context.span_id
+    assert (
+        spans["PizzaService.get_pizza"].parent_id == spans["get_pizza"].context.span_id
+    )
+
+    otlp_spans = to_otlp_json(tracer.resource, [request])["resourceSpans"][0][
+        "scopeSpans"
+    ][0]["spans"]
+    assert otlp_spans[0]["traceId"] == TRACEPARENT[3:35]
+    assert otlp_spans[0]["kind"] == "SPAN_KIND_SERVER"
+
+
+def test_not_sampled_requests_export_nothing() -> None:
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(exporter, sample_rate=0.0)
+    client = TestClient(create_app(tracer))
+
+    client.get("/pizzas/1")
+    client.get("/pizzas/1", headers={"traceparent": TRACEPARENT[:-2] + "00"})
+    tracer.flush()
+    assert not exporter.spans
+
+
+def test_file_exporter_writes_batches_on_shutdown(tmp_path: str) -> None:
+    path = os.path.join(tmp_path, "traces.jsonl")
+    tracer = Tracer(FileSpanExporter(path), sample_rate=1.0)
+
+    for name in ("first", "second"):
+        with tracer.span(name):
+            pass
+        tracer.flush()
+    tracer.shutdown()
+
+    with open(path) as f:
+        batches = [json.loads(line) for line in f]
+    assert [
+        b["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["name"] for b in batches
+    ] == ["first", "second"]
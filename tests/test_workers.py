@@ -0,0 +1,19 @@
+from pizza_store.adapters.app.workers import (
+    AsyncioWorker,
+    get_worker_class,
+    get_worker_count,
+    has_uvloop,
+)
+
+
+def test_worker_count() -> None:
+    assert get_worker_count(4, 10, 100) == 4
+    assert get_worker_count(16, 10, 100) == 10
+    assert get_worker_count(4, 50, 30) == 1
+
+
+def test_worker_class() -> None:
+    asyncio_worker = f"{AsyncioWorker.__module__}.{AsyncioWorker.__qualname__}"
+    assert get_worker_class("asyncio") == asyncio_worker
+    assert get_worker_class("uvloop").endswith("UvloopWorker")
+    assert (get_worker_class("auto") == asyncio_worker) is not has_uvloop